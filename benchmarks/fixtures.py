@@ -0,0 +1,160 @@
+"""
+Response fixtures for the offline benchmark.
+Builds synthetic search results of any size in the format of each careers
+API, or replays recorded response bodies from a directory.
+"""
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+# Results per page served by the paged stand-in APIs
+MICROSOFT_PAGE_SIZE = 20
+APPLE_PAGE_SIZE = 20
+GOOGLE_PAGE_SIZE = 20
+
+# Values per facet in Amazon responses, which ask for up to 9999 of them
+AMAZON_FACET_VALUES = 2000
+
+LOCATIONS = ['Seattle, WA', 'New York, NY', 'Austin, TX', 'London, UK', 'Munich, DE', 'Dublin, IE']
+TEAMS = ['Software Development', 'Machine Learning', 'Hardware', 'Operations', 'Security']
+TITLES = ['Software Engineer Intern', 'Data Science Intern', 'Hardware Engineering Intern', 'Product Intern']
+
+# Fixed epoch so repeated runs serve identical bodies
+POSTED_TS = 1735689600
+
+def job_id(source: str, index: int) -> str:
+    """Deterministic numeric job ID, unique per source."""
+    prefix = {'amazon': 1, 'microsoft': 2, 'facebook': 3, 'google': 4, 'apple': 5}.get(source, 9)
+    return f'{prefix}{index:08d}'
+
+class Fixtures:
+    """Serves careers API responses for a fixed number of jobs per source.
+    
+    Recorded bodies, if a directory is given, are files named after the
+    host (e.g., www.amazon.jobs.json, www.google.com.html) and are
+    returned as-is for every request to that host.
+    """
+    
+    def __init__(self, jobs: int, recorded_dir: Optional[str] = None):
+        self.jobs = jobs
+        self.recorded: Dict[str, bytes] = {}
+        # Sent along with every Amazon page, like the value counts of the real API
+        values = range(min(jobs, AMAZON_FACET_VALUES))
+        self.amazon_facets = {
+            'titleFacet': [[f'{TITLES[i % len(TITLES)]} {i}', 1] for i in values],
+            'locationFacet': [[f'{LOCATIONS[i % len(LOCATIONS)]} {i}', 1] for i in values],
+            'jobFamilyFacet': [[f'{TEAMS[i % len(TEAMS)]} {i}', 1] for i in values],
+            'businessCategoryFacet': [[f'category-{i}', 1] for i in values]
+        }
+        if recorded_dir:
+            for name in os.listdir(recorded_dir):
+                host, ext = os.path.splitext(name)
+                if ext in ('.json', '.html'):
+                    with open(os.path.join(recorded_dir, name), 'rb') as f:
+                        self.recorded[host] = f.read()
+    
+    def _item(self, source: str, index: int) -> Dict[str, Any]:
+        title = f'{TITLES[index % len(TITLES)]} {index}'
+        location = LOCATIONS[index % len(LOCATIONS)]
+        team = TEAMS[index % len(TEAMS)]
+        jid = job_id(source, index)
+        
+        if source == 'amazon':
+            return {'fields': {
+                'title': [title],
+                'country': ['US'],
+                'updatedDate': [str(POSTED_TS + index)],
+                'location': [location],
+                'jobRole': ['Intern'],
+                'jobFamily': [team],
+                'category': [team],
+                'icimsJobId': [jid]
+            }}
+        if source == 'microsoft':
+            return {
+                'id': int(jid),
+                'name': title,
+                'postedTs': POSTED_TS + index,
+                'locations': [location],
+                'department': team
+            }
+        if source == 'facebook':
+            return {
+                'id': jid,
+                'title': title,
+                'locations': [location],
+                'sub_teams': [team],
+                'teams': ['University Grad - Engineering, Tech & Design']
+            }
+        if source == 'apple':
+            return {
+                'postingId': jid,
+                'postingTitle': title,
+                'locations': [{'name': location}],
+                'team': {'teamName': team},
+                'postingType': 'Internship',
+                'postingDate': '2025-01-01'
+            }
+        raise ValueError(f"No JSON fixture for source: {source}")
+    
+    def _items(self, source: str, start: int, count: int) -> List[Dict[str, Any]]:
+        return [self._item(source, index) for index in range(start, min(start + count, self.jobs))]
+    
+    def amazon(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        start, size = int(body.get('start', 0)), int(body.get('size', 100))
+        return {'hits': self.jobs, 'facets': self.amazon_facets, 'searchHits': self._items('amazon', start, size)}
+    
+    def microsoft(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        start = int(query.get('start', ['0'])[0])
+        return {'data': {'count': self.jobs, 'positions': self._items('microsoft', start, MICROSOFT_PAGE_SIZE)}}
+    
+    def facebook(self) -> Dict[str, Any]:
+        return {'data': {'job_search_with_featured_jobs': {'all_jobs': self._items('facebook', 0, self.jobs)}}}
+    
+    def apple(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        page = int(body.get('page', 1))
+        return {'res': {
+            'totalRecords': self.jobs,
+            'searchResults': self._items('apple', (page - 1) * APPLE_PAGE_SIZE, APPLE_PAGE_SIZE)
+        }}
+    
+    def google(self, query: Dict[str, List[str]]) -> str:
+        """Results page with job links and the embedded data blocks."""
+        page = int(query.get('page', ['1'])[0])
+        pages = math.ceil(self.jobs / GOOGLE_PAGE_SIZE)
+        start = (page - 1) * GOOGLE_PAGE_SIZE
+        indexes = range(start, min(start + GOOGLE_PAGE_SIZE, self.jobs)) if page <= pages else range(0)
+        
+        links = ''.join(
+            f'<li><a href="jobs/results/{job_id("google", i)}-{TITLES[i % len(TITLES)].lower().replace(" ", "-")}'
+            f'?employment_type=INTERN">{TITLES[i % len(TITLES)]}</a></li>'
+            for i in indexes
+        )
+        records = ','.join(
+            f'["{job_id("google", i)}","{TITLES[i % len(TITLES)]} {i}","https://careers.google.com/jobs/{i}",'
+            f'[["{LOCATIONS[i % len(LOCATIONS)]}",["{LOCATIONS[i % len(LOCATIONS)]}"]]]]'
+            for i in indexes
+        )
+        # Filler stands in for the scripts and styles of the real page
+        filler = '<div class="filler">' + 'x' * 2048 + '</div>'
+        return f'<html><body><ul>{links}</ul>{filler * 8}<script>AF_initDataCallback({{data:[[{records}]]}});</script></body></html>'
+    
+    def response(self, host: str, path: str, query: str, body: bytes) -> Optional[bytes]:
+        """Body for a careers API request, or None if the host is unknown."""
+        if host in self.recorded:
+            return self.recorded[host]
+        
+        params = parse_qs(query)
+        if host == 'www.amazon.jobs':
+            return json.dumps(self.amazon(json.loads(body or b'{}'))).encode()
+        if host == 'apply.careers.microsoft.com':
+            return json.dumps(self.microsoft(params)).encode()
+        if host == 'www.metacareers.com':
+            return json.dumps(self.facebook()).encode()
+        if host == 'jobs.apple.com':
+            return json.dumps(self.apple(json.loads(body or b'{}'))).encode()
+        if host == 'www.google.com':
+            return self.google(params).encode()
+        return None
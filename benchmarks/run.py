@@ -0,0 +1,181 @@
+"""
+Offline benchmark of a full monitoring run.
+Starts the local stub server, routes all HTTP traffic of the run to it and
+runs the regular poll cycle several times: the first iteration announces
+the unknown jobs, later ones exercise the unchanged-response path. Reports
+end-to-end time, per-stage time and memory per iteration.
+
+Usage:
+    python -m benchmarks.run --jobs 10000 --iterations 2 --output bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+COMPANIES = ['amazon', 'microsoft', 'facebook', 'google', 'apple']
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark against a local stand-in server")
+    parser.add_argument('--jobs', type=int, default=1000, help="jobs served per source (default: 1000)")
+    parser.add_argument(
+        '--known-ratio', type=float, default=0.0,
+        help="fraction of each source's jobs already in storage before the first run (default: 0)"
+    )
+    parser.add_argument('--iterations', type=int, default=2, help="poll cycles to run (default: 2)")
+    parser.add_argument('--sources', nargs='*', help="only run these sources (default: all)")
+    parser.add_argument('--storage', choices=['github', 'sqlite'], default='github', help="storage backend")
+    parser.add_argument('--fixtures', help="directory of recorded response bodies named <host>.json or <host>.html")
+    parser.add_argument('--upstream-latency', type=float, default=0.0, help="careers API latency in seconds")
+    parser.add_argument('--discord-latency', type=float, default=0.0, help="webhook latency in seconds")
+    parser.add_argument('--discord-429-every', type=int, default=0, help="answer every Nth webhook with 429")
+    parser.add_argument('--discord-retry-after', type=float, default=0.05, help="Retry-After of 429 answers")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc, which slows down the run")
+    parser.add_argument('--output', help="write the JSON results to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the log output of the run")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    """Point the configuration at stub endpoints. Must run before config is imported."""
+    os.environ['WEBHOOK_URLS_JSON'] = json.dumps({
+        company: f'https://discord.com/api/webhooks/bench/{company}' for company in COMPANIES
+    })
+    os.environ['GH_TOKEN'] = 'bench'
+    os.environ['STORAGE_BACKEND'] = args.storage
+    os.environ['SQLITE_STORAGE_PATH'] = os.path.join(workdir, 'known_jobs.db')
+    os.environ['JSON_STORAGE_PATH'] = os.path.join(workdir, 'known_jobs.json')
+    os.environ['ID_INDEX_PATH'] = os.path.join(workdir, 'known_jobs.idx')
+    os.environ['SIMILARITY_INDEX_PATH'] = os.path.join(workdir, 'postings.idx')
+    os.environ['HTTP_CACHE_PATH'] = ''
+    os.environ['RUN_REPORT_PATH'] = ''
+
+def seed_storage(args: argparse.Namespace, files: Dict[str, bytes]) -> None:
+    """Write the initially known job IDs for the chosen storage backend."""
+    from benchmarks.fixtures import job_id
+    from config import GITHUB_STORAGE_URL, JSON_STORAGE_PATH
+    
+    known = int(args.jobs * args.known_ratio)
+    content = json.dumps({
+        company: [job_id(company, index) for index in range(known)] for company in COMPANIES
+    }).encode()
+    
+    if args.storage == 'github':
+        files[urlsplit(GITHUB_STORAGE_URL).path] = content
+    else:
+        with open(JSON_STORAGE_PATH, 'wb') as f:
+            f.write(content)
+
+def summarize(iteration: Dict[str, Any]) -> str:
+    """Human readable summary of one iteration."""
+    lines = [
+        f"Iteration {iteration['iteration']}: {iteration['seconds']:.2f}s, "
+        f"{iteration['new_jobs']} new jobs, {iteration['http_requests']} requests"
+        + (f", peak memory {iteration['peak_memory_bytes'] / 2 ** 20:.1f} MiB" if 'peak_memory_bytes' in iteration else '')
+    ]
+    if iteration['failed']:
+        lines.append(f"  failed: {', '.join(iteration['failed'])}")
+    
+    stages = sorted(iteration['stages'], key=lambda stage: stage['seconds'], reverse=True)
+    for stage in stages[:15]:
+        labels = ','.join(f'{value}' for value in stage['labels'].values())
+        lines.append(f"  {stage['stage']:<16} {labels:<30} {stage['seconds']:>9.3f}s  x{stage['count']}")
+    return '\n'.join(lines)
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    workdir = tempfile.mkdtemp(prefix='bigtech-bench-')
+    configure_environment(args, workdir)
+    
+    import main as monitor
+    from benchmarks.fixtures import Fixtures
+    from benchmarks.stub_server import StubServer, StubState, install
+    from utils import http_client, metrics
+    from utils.job_storage import load_job_storage
+    from utils.sources import discover_sources
+    
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    
+    state = StubState(
+        Fixtures(args.jobs, args.fixtures),
+        upstream_latency=args.upstream_latency,
+        discord_latency=args.discord_latency,
+        discord_429_every=args.discord_429_every,
+        discord_retry_after=args.discord_retry_after
+    )
+    seed_storage(args, state.files)
+    server = StubServer(state).start()
+    install(http_client.get_session(), server.base_url)
+    http_client.add_timing_hook(metrics.record_http)
+    
+    sources = [source for source in discover_sources() if not args.sources or source.name in args.sources]
+    results: Dict[str, Any] = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'verbose')},
+        'iterations': []
+    }
+    
+    try:
+        if not args.no_memory:
+            tracemalloc.start()
+        
+        start = time.perf_counter()
+        if not load_job_storage():
+            print("Failed to load job storage from the stub server", file=sys.stderr)
+            return 1
+        results['load_seconds'] = round(time.perf_counter() - start, 6)
+        
+        for number in range(1, args.iterations + 1):
+            metrics.reset()
+            if not args.no_memory:
+                tracemalloc.reset_peak()
+            
+            start = time.perf_counter()
+            total_new_jobs, failed = monitor.run_cycle(sources)
+            elapsed = time.perf_counter() - start
+            
+            report = metrics.report()
+            iteration = {
+                'iteration': number,
+                'seconds': round(elapsed, 6),
+                'new_jobs': total_new_jobs,
+                'failed': failed,
+                'http_requests': int(sum(
+                    counter['value'] for counter in report['counters'] if counter['name'] == 'http_requests'
+                )),
+                'stages': report['stages'],
+                'counters': report['counters'],
+            }
+            if not args.no_memory:
+                iteration['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            results['iterations'].append(iteration)
+            print(summarize(iteration))
+    finally:
+        server.stop()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+    results['stub'] = {
+        'requests': state.requests,
+        'webhook_messages': state.webhook_messages,
+        'webhook_embeds': state.webhook_embeds,
+        'github_files': len(state.files)
+    }
+    print(f"Max RSS {results['max_rss_bytes'] / 2 ** 20:.1f} MiB, "
+          f"{state.webhook_embeds} embeds in {state.webhook_messages} webhook messages")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
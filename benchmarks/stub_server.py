@@ -0,0 +1,230 @@
+"""
+Local stand-in server for all upstreams of a run.
+Answers careers API requests from fixtures, emulates the GitHub contents
+API with an in-memory file store and Discord webhooks with configurable
+latency and rate limiting. A transport adapter redirects the shared HTTP
+session to the server, so the real request code paths are exercised.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.fixtures import Fixtures
+
+class StubState:
+    """Behavior settings and recorded traffic of the stub server."""
+    
+    def __init__(
+        self,
+        fixtures: Fixtures,
+        upstream_latency: float = 0.0,
+        discord_latency: float = 0.0,
+        discord_429_every: int = 0,
+        discord_retry_after: float = 0.05
+    ):
+        self.fixtures = fixtures
+        self.upstream_latency = upstream_latency
+        self.discord_latency = discord_latency
+        self.discord_429_every = discord_429_every
+        self.discord_retry_after = discord_retry_after
+        # GitHub contents API files: path -> content
+        self.files: Dict[str, bytes] = {}
+        self.requests: Dict[str, int] = {}
+        self.webhook_embeds = 0
+        self.webhook_messages = 0
+        self._lock = threading.Lock()
+    
+    def count(self, host: str) -> int:
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+            return self.requests[host]
+
+def _sha(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes /<original host>/<original path> to the emulated upstream."""
+    
+    protocol_version = 'HTTP/1.1'
+    state: StubState
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+    
+    def _split(self) -> Tuple[str, str, str]:
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        return host, '/' + path, parts.query
+    
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+    
+    def _reply(
+        self,
+        status: int,
+        body: bytes = b'',
+        content_type: str = 'application/json',
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+    
+    def _handle(self, method: str) -> None:
+        host, path, query = self._split()
+        body = self._body()
+        self.state.count(host)
+        
+        if host == 'api.github.com':
+            self._github(method, path, body)
+        elif host.endswith('discord.com'):
+            self._discord(body)
+        else:
+            if self.state.upstream_latency:
+                time.sleep(self.state.upstream_latency)
+            content = self.state.fixtures.response(host, path, query, body)
+            if content is None:
+                self._reply(404, b'{}')
+            elif content.lstrip()[:1] in (b'{', b'['):
+                self._reply(200, content)
+            else:
+                self._reply(200, content, 'text/html; charset=utf-8')
+    
+    def _github(self, method: str, path: str, body: bytes) -> None:
+        files = self.state.files
+        if method == 'GET':
+            if path in files:
+                content = files[path]
+                etag = f'"{_sha(content)}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self._reply(304, headers={'ETag': etag})
+                    return
+                data = {'content': base64.b64encode(content).decode(), 'sha': _sha(content)}
+                self._reply(200, json.dumps(data).encode(), headers={'ETag': etag})
+                return
+            prefix = path.rstrip('/') + '/'
+            entries = [
+                {
+                    'name': name[len(prefix):],
+                    'type': 'file',
+                    'url': f'https://api.github.com{name}',
+                    'sha': _sha(content)
+                }
+                for name, content in sorted(files.items())
+                if name.startswith(prefix) and '/' not in name[len(prefix):]
+            ]
+            if entries:
+                self._reply(200, json.dumps(entries).encode())
+            else:
+                self._reply(404, b'{"message": "Not Found"}')
+        elif method == 'PUT':
+            content = base64.b64decode(json.loads(body)['content'])
+            files[path] = content
+            self._reply(201, json.dumps({'content': {'sha': _sha(content)}}).encode())
+        elif method == 'DELETE':
+            files.pop(path, None)
+            self._reply(200, b'{}')
+        else:
+            self._reply(405, b'{}')
+    
+    def _discord(self, body: bytes) -> None:
+        state = self.state
+        if state.discord_latency:
+            time.sleep(state.discord_latency)
+        
+        with state._lock:
+            state.webhook_messages += 1
+            number = state.webhook_messages
+        if state.discord_429_every and number % state.discord_429_every == 0:
+            retry_after = state.discord_retry_after
+            self._reply(429, json.dumps({'retry_after': retry_after}).encode(), headers={
+                'Retry-After': f'{retry_after:.3f}',
+                'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Reset-After': f'{retry_after:.3f}'
+            })
+            return
+        
+        with state._lock:
+            state.webhook_embeds += len(json.loads(body or b'{}').get('embeds', []))
+        self._reply(204, headers={'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset-After': '0.001'})
+    
+    def do_GET(self) -> None:
+        self._handle('GET')
+    
+    def do_POST(self) -> None:
+        self._handle('POST')
+    
+    def do_PUT(self) -> None:
+        self._handle('PUT')
+    
+    def do_DELETE(self) -> None:
+        self._handle('DELETE')
+
+class StubServer:
+    """Runs the stub handler on a local port in a background thread."""
+    
+    def __init__(self, state: StubState, host: str = '127.0.0.1', port: int = 0):
+        self.state = state
+        handler = type('BoundStubHandler', (StubHandler,), {'state': state})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='stub-server', daemon=True)
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def start(self) -> 'StubServer':
+        self.thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+class StubAdapter(HTTPAdapter):
+    """Sends https:// requests to the stub server instead of the real host.
+    
+    The request and response keep the original URL, so logs, metrics and
+    cache keys look the same as in a live run.
+    """
+    
+    def __init__(self, base_url: str, **kwargs: Any):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+    
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        original = request.url
+        parts = urlsplit(original)
+        request.url = f'{self.base_url}/{parts.netloc}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            request.url = original
+        response.url = original
+        return response
+
+def install(session: requests.Session, base_url: str) -> None:
+    """Route all https:// traffic of a session to the stub server."""
+    current = session.get_adapter('https://')
+    session.mount('https://', StubAdapter(
+        base_url,
+        pool_connections=getattr(current, '_pool_connections', 10),
+        pool_maxsize=getattr(current, '_pool_maxsize', 10),
+        max_retries=current.max_retries
+    ))
@@ -37,8 +37,150 @@ def load_webhook_urls() -> dict:
 
 # Configuration constants
 WEBHOOK_URLS = load_webhook_urls()
-GITHUB_TOKEN = get_required_env('GH_TOKEN')
-GITHUB_STORAGE_URL = 'https://api.github.com/repos/wiestju/bigtech-internship-monitoring/contents/data/known_jobs.json'
+
+# Storage backend for known job IDs: 'github' or 'sqlite'
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'github')
+
+# The GitHub token is only required when storing job IDs on GitHub
+GITHUB_TOKEN = get_required_env('GH_TOKEN') if STORAGE_BACKEND == 'github' else os.getenv('GH_TOKEN')
+GITHUB_STORAGE_URL = os.getenv(
+    'GITHUB_STORAGE_URL',
+    'https://api.github.com/repos/wiestju/bigtech-internship-monitoring/contents/data/known_jobs.json'
+)
+
+# Directory of append-only delta segments next to the base snapshot
+GITHUB_SEGMENTS_URL = os.getenv('GITHUB_SEGMENTS_URL', GITHUB_STORAGE_URL.rsplit('.json', 1)[0] + '.d')
+
+# Notifications waiting for delivery, retried on the next run
+GITHUB_OUTBOX_URL = os.getenv('GITHUB_OUTBOX_URL', GITHUB_STORAGE_URL.rsplit('/', 1)[0] + '/outbox.json')
+
+# Times at which new job IDs appeared per company, used for adaptive polling
+GITHUB_HISTORY_URL = os.getenv('GITHUB_HISTORY_URL', GITHUB_STORAGE_URL.rsplit('/', 1)[0] + '/history.json')
+
+# Recently notified postings, compared with new ones to detect reposts
+GITHUB_POSTINGS_URL = os.getenv('GITHUB_POSTINGS_URL', GITHUB_STORAGE_URL.rsplit('/', 1)[0] + '/postings.json')
+
+# Directory of delta segments holding the postings notified since the last compaction
+GITHUB_POSTINGS_SEGMENTS_URL = os.getenv(
+    'GITHUB_POSTINGS_SEGMENTS_URL',
+    GITHUB_POSTINGS_URL.rsplit('.json', 1)[0] + '.d'
+)
+
+# First and last time each job ID was seen, used to drop long-closed postings
+GITHUB_LIFECYCLE_URL = os.getenv('GITHUB_LIFECYCLE_URL', GITHUB_STORAGE_URL.rsplit('/', 1)[0] + '/lifecycle.json')
+
+# Directory of delta segments holding the lifecycle changes since the last compaction
+GITHUB_LIFECYCLE_SEGMENTS_URL = os.getenv(
+    'GITHUB_LIFECYCLE_SEGMENTS_URL',
+    GITHUB_LIFECYCLE_URL.rsplit('.json', 1)[0] + '.d'
+)
+
+# Fold delta segments back into the base snapshot once there are this many
+GITHUB_COMPACT_SEGMENTS = int(os.getenv('GITHUB_COMPACT_SEGMENTS', '20'))
+
+# Local SQLite database, seeded from the JSON file on first use
+SQLITE_STORAGE_PATH = os.getenv('SQLITE_STORAGE_PATH', 'data/known_jobs.db')
+JSON_STORAGE_PATH = os.getenv('JSON_STORAGE_PATH', 'data/known_jobs.json')
+
+# Memory-mapped binary index of known job IDs, rebuilt when the stored data changed (empty = memory only)
+ID_INDEX_PATH = os.getenv('ID_INDEX_PATH', '.cache/known_jobs.idx')
+
+# Days a job ID stays known after its posting disappeared (0 = forever). Closed postings that reopen
+# within this time are not notified again; older ones are dropped from storage in daily steps.
+JOB_RETENTION_DAYS = float(os.getenv('JOB_RETENTION_DAYS', '90'))
+
+# Repost detection: minimum similarity (0-1) of title, team and location for a new posting to count
+# as a duplicate of a recently notified one (0 = disabled), and days a notified posting is compared with
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', '0.7'))
+SIMILARITY_WINDOW_DAYS = float(os.getenv('SIMILARITY_WINDOW_DAYS', '180'))
+
+# Most recent postings a repost lookup scans per title word, team or location (0 = all). This bounds
+# the time spent on postings made of common words, at the cost of missing older duplicates of them
+SIMILARITY_SCAN_LIMIT = int(os.getenv('SIMILARITY_SCAN_LIMIT', '200'))
+
+# Memory-mapped similarity index of recently notified postings (empty = memory only)
+SIMILARITY_INDEX_PATH = os.getenv('SIMILARITY_INDEX_PATH', '.cache/postings.idx')
 
 # Request timeout in seconds
-REQUEST_TIMEOUT = 30
\ No newline at end of file
+REQUEST_TIMEOUT = 30
+
+# Shared HTTP session: retries for idempotent requests and connections per host
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# Circuit breaker per source: failure rate within the window (seconds) that opens it,
+# minimum requests in the window before it can open, seconds until half-open
+# and concurrent trial requests let through while half-open
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '300'))
+CIRCUIT_MIN_REQUESTS = int(os.getenv('CIRCUIT_MIN_REQUESTS', '2'))
+CIRCUIT_COOLDOWN = int(os.getenv('CIRCUIT_COOLDOWN', '300'))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', '3'))
+
+# Hedged source requests: latency quantile after which a duplicate request is sent,
+# samples needed before hedging and maximum share of hedged requests (0 = disabled)
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', '0.95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '5'))
+HEDGE_MAX_RATIO = float(os.getenv('HEDGE_MAX_RATIO', '0.1'))
+
+# Validators and body hashes of upstream responses, kept between runs (empty = memory only)
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', '.cache/http_cache.json')
+
+# Paged search APIs: safety limit on pages and concurrent page requests per host
+PAGINATION_MAX_PAGES = int(os.getenv('PAGINATION_MAX_PAGES', '20'))
+PAGINATION_HOST_CONCURRENCY = int(os.getenv('PAGINATION_HOST_CONCURRENCY', '4'))
+
+# Google results pages fetched speculatively ahead of the page being processed
+GOOGLE_PAGE_WINDOW = int(os.getenv('GOOGLE_PAGE_WINDOW', '3'))
+
+# Retries per webhook message on rate limits and server errors
+WEBHOOK_MAX_RETRIES = int(os.getenv('WEBHOOK_MAX_RETRIES', '5'))
+
+# An undelivered notification is given up on once it failed in this many runs and its first failure
+# is this many hours old, so that frequent runs in daemon mode do not drop it during a short outage
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_MAX_AGE_HOURS = float(os.getenv('OUTBOX_MAX_AGE_HOURS', '24'))
+
+# Maximum number of company scrapers running at the same time (1 = serial)
+SCRAPER_MAX_WORKERS = int(os.getenv('SCRAPER_MAX_WORKERS', '5'))
+
+# Time budget per company scraper in seconds
+SCRAPER_TIMEOUT = int(os.getenv('SCRAPER_TIMEOUT', '300'))
+# Retries of a whole source fetch after a network error
+SCRAPER_MAX_RETRIES = int(os.getenv('SCRAPER_MAX_RETRIES', '2'))
+
+# Pipeline stages: postings handed from a fetch to dedup at once, entries buffered
+# between stages before fetching or dedup waits, and concurrent notifier workers
+PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '100'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '32'))
+PIPELINE_NOTIFIERS = int(os.getenv('PIPELINE_NOTIFIERS', '5'))
+
+# Daemon mode (main.py --daemon): seconds between polls of a source without change history
+DAEMON_POLL_INTERVAL = int(os.getenv('DAEMON_POLL_INTERVAL', '1800'))
+
+# Per-company intervals for sources without change history, e.g. {"apple": 7200}
+DAEMON_POLL_INTERVALS = json.loads(os.getenv('DAEMON_POLL_INTERVALS_JSON', '{}'))
+
+# Random spread of each poll interval, as a fraction of it
+DAEMON_POLL_JITTER = float(os.getenv('DAEMON_POLL_JITTER', '0.1'))
+
+# Months (1-12) of the main recruiting season and the interval factor applied in them
+DAEMON_SEASON_MONTHS = [int(month) for month in os.getenv('DAEMON_SEASON_MONTHS', '8,9,10,11').split(',') if month.strip()]
+DAEMON_SEASON_FACTOR = float(os.getenv('DAEMON_SEASON_FACTOR', '0.5'))
+
+# Bounds of adaptive poll intervals in seconds
+DAEMON_MIN_POLL_INTERVAL = int(os.getenv('DAEMON_MIN_POLL_INTERVAL', '300'))
+DAEMON_MAX_POLL_INTERVAL = int(os.getenv('DAEMON_MAX_POLL_INTERVAL', '21600'))
+
+# Next poll interval as a multiple of the time since a source last produced new jobs
+DAEMON_BACKOFF_FACTOR = float(os.getenv('DAEMON_BACKOFF_FACTOR', '1.0'))
+
+# New-job arrival times kept per company
+CHANGE_HISTORY_SIZE = int(os.getenv('CHANGE_HISTORY_SIZE', '50'))
+
+# JSON report of stage timings and counters, written after every run (empty = disabled)
+RUN_REPORT_PATH = os.getenv('RUN_REPORT_PATH', 'run_report.json')
+
+# Port of the Prometheus metrics endpoint in daemon mode (0 = disabled)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
@@ -1,23 +1,29 @@
 """Amazon internship job scraper."""
-import datetime
-import logging
-from typing import Optional
+from typing import Any, Dict
 
-import requests
-from utils.webhook import send_webhook
-from utils.job_storage import is_new_job
+from utils.http_cache import CachedResponse, cached_request
+from utils.job_posting import JobPosting, discord_timestamp
+from utils.sources import PagedSource, register_source
 from config import REQUEST_TIMEOUT
 
-logger = logging.getLogger(__name__)
+# Results per page of the search API
+PAGE_SIZE = 100
 
-def getJobsAmazon() -> Optional[int]:
-    """Fetch internship jobs from Amazon careers API.
+@register_source
+class AmazonSource(PagedSource):
+    """Amazon careers search API, paged by item offset."""
     
-    Returns:
-        Number of new jobs found, or None if error occurred.
-    """
-    try:
-        r = requests.post(
+    name = 'amazon'
+    display_name = 'Amazon'
+    host = 'www.amazon.jobs'
+    page_size = PAGE_SIZE
+    items_path = ('searchHits',)
+    total_path = ('hits',)
+    
+    def fetch_page(self, page: int, offset: int) -> CachedResponse:
+        """Fetch one page of Amazon internship search results."""
+        return cached_request(
+            'POST',
             'https://www.amazon.jobs/api/jobs/search',
             params={
                 'is_als': 'true'
@@ -42,98 +48,43 @@ def getJobsAmazon() -> Optional[int]:
                         "values": [{"name": "Intern"}]
                     }
                 ],
-                "size": 100,
-                "start": 0,
+                "size": PAGE_SIZE,
+                "start": offset,
                 "sort": {
                     "sortOrder": "DESCENDING",
                     "sortType": "SCORE"
                 },
                 "treatment": "OM",
             },
-            headers={
-                'accept-encoding': 'plain'
-            },
-            timeout=REQUEST_TIMEOUT
+            timeout=REQUEST_TIMEOUT,
+            stream=True
         )
-        r.raise_for_status()
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch Amazon jobs: {e}")
-        return None
-
-    try:
-        data = r.json()
-        searchHits = data.get('searchHits', [])
-    except (ValueError, KeyError) as e:
-        logger.error(f"Failed to parse Amazon API response: {e}")
-        return None
     
-    new_jobs_count = 0
-    for hit in searchHits:
-        try:
-            hit = hit['fields']
-            title = hit['title'][0]
-            country = hit['country'][0]
-            updatedDate = hit['updatedDate'][0]
-            location = hit['location'][0]
-            jobRole = hit['jobRole'][0] if 'jobRole' in hit else '---'
-            jobFamily = hit['jobFamily'][0] if 'jobFamily' in hit else '---'
-            category = hit['category'][0]
-            jobId = hit['icimsJobId'][0]
-            url = 'https://www.amazon.jobs/jobs/' + jobId
-        except (KeyError, IndexError) as e:
-            logger.warning(f"Skipping malformed Amazon job entry: {e}")
-            continue
-
-        try:
-            payload = {
-                # 'content': '--',
-                'username': 'BigTech Internship Monitoring',
-                'avatar_url': None,
-                'embeds': [
-                    {
-                        'title': f'New Internship: {title}',
-                        'url': url,
-                        'thumbnail': {
-                            'url': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Fi.pinimg.com%2Foriginals%2F01%2Fca%2Fda%2F01cada77a0a7d326d85b7969fe26a728.jpg&f=1&nofb=1&ipt=a8ca1c611878925024fc134526698e3eb4cddf2dcf414253365c37e85112f708'
-                        },
-                        'fields': [
-                            {
-                                'name': 'Job Family',
-                                'value': f'{jobFamily}',
-                            },
-                            {
-                                'name': 'Job Role',
-                                'value': f'{jobRole}'
-                            },
-                            {
-                                'name': 'Category',
-                                'value': f'{category}'
-                            },
-                            {
-                                'name': 'Location',
-                                'value': f':flag_{country.lower()}: {location}',
-                            }, {
-                                'name': 'Updated At',
-                                'value': f'<t:{updatedDate}:f> | <t:{updatedDate}:R>'
-                            }
-                        ],
-                        'color': int('FF9900', 16),
-                        'timestamp': datetime.datetime.now().isoformat(),
-                        'footer': {
-                            'text': 'BigTech Internship Monitoring | by wiestju'
-                        }
-                    }
-                ]
-            }
-
-            company = 'amazon'
-            if is_new_job(company, jobId):
-                if send_webhook(company, payload):
-                    new_jobs_count += 1
-                    logger.info(f"New Amazon job posted: {title} ({jobId})")
-        except Exception as e:
-            logger.error(f"Error processing Amazon job: {e}")
-            continue
-    
-    logger.info(f"Amazon: Found {new_jobs_count} new jobs")
-    return new_jobs_count
\ No newline at end of file
+    def normalize(self, hit: Dict[str, Any]) -> JobPosting:
+        """Turn an Amazon search hit into a job posting."""
+        hit = hit['fields']
+        title = hit['title'][0]
+        country = hit['country'][0]
+        updatedDate = hit['updatedDate'][0]
+        location = hit['location'][0]
+        jobRole = hit['jobRole'][0] if 'jobRole' in hit else '---'
+        jobFamily = hit['jobFamily'][0] if 'jobFamily' in hit else '---'
+        category = hit['category'][0]
+        jobId = hit['icimsJobId'][0]
+        
+        return JobPosting(
+            company='amazon',
+            job_id=jobId,
+            title=title,
+            url='https://www.amazon.jobs/jobs/' + jobId,
+            location=location,
+            team=jobFamily,
+            posted_at=int(updatedDate) if str(updatedDate).isdigit() else None,
+            fields=[
+                ('Job Family', f'{jobFamily}'),
+                ('Job Role', f'{jobRole}'),
+                ('Category', f'{category}'),
+                ('Location', f':flag_{country.lower()}: {location}'),
+                ('Updated At', discord_timestamp(updatedDate))
+            ]
+        )
@@ -1,144 +1,295 @@
 """Google internship job scraper."""
-import datetime
+import json
 import logging
+import queue
 import re
-from typing import Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 
 import requests
-from bs4 import BeautifulSoup
-from utils.webhook import send_webhook
-from utils.job_storage import is_new_job
-from config import REQUEST_TIMEOUT
+from utils import http_client
+from utils.pagination import PageItems, host_limit
+from utils.job_posting import JobPosting
+from utils.sources import Source, register_source
+from config import REQUEST_TIMEOUT, GOOGLE_PAGE_WINDOW
 
 logger = logging.getLogger(__name__)
 
-def getJobsGoogle() -> Optional[int]:
-    """Fetch internship jobs from Google careers page.
-    
-    Google uses a Single Page Application that loads jobs dynamically.
-    We scrape the initial HTML to extract job IDs and titles.
-    Google shows max 20 jobs per page, so we need to paginate.
+# Job links in the HTML: jobs/results/<job_id>-<job-slug>
+JOB_LINK_PATTERN = re.compile(r'jobs/results/(\d+)-([^?"\'\s]+)')
+
+# Job records in the embedded data blocks: ["<job_id>","<title>","https://...
+JOB_RECORD_PATTERN = re.compile(r'\["(\d{6,})","((?:[^"\\]|\\.)*)","https://')
+
+# First location of a job record: [["<location>",[
+JOB_LOCATION_PATTERN = re.compile(r'\[\["((?:[^"\\]|\\.)*)",\[')
+
+# Bytes read from the socket per chunk
+STREAM_CHUNK_SIZE = 16384
+
+# Characters kept between chunks so matches spanning a chunk boundary are not cut
+STREAM_TAIL = 4096
+
+def _unescape(value: str) -> str:
+    """Decode JavaScript string escapes such as \\u0026."""
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+# Job found on a results page: (job_id, slug, details)
+GoogleJob = Tuple[str, str, Dict[str, str]]
+
+class GoogleResultsParser:
+    """Incremental extractor for Google careers results pages.
     
-    Returns:
-        Number of new jobs found, or None if error occurred.
+    Chunks of the HTML are fed as they are downloaded. Only a small tail of
+    unprocessed text is kept between chunks, so memory stays bounded no
+    matter how large the page is.
     """
-    all_unique_jobs = []
-    seen = set()
-    page = 1
-    max_pages = 10  # Safety limit to avoid infinite loops
     
-    try:
-        url = 'https://www.google.com/about/careers/applications/jobs/results/'
-        base_params = {
-            'company': ['Fitbit', 'Google', 'YouTube'],
-            'employment_type': 'INTERN'
-        }
-        
-        while page <= max_pages:
-            params = base_params.copy()
-            if page > 1:
-                params['page'] = str(page)
-            
-            try:
-                r = requests.get(
-                    url,
-                    params=params,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    },
-                    timeout=REQUEST_TIMEOUT
-                )
-                r.raise_for_status()
-            except requests.RequestException as e:
-                logger.error(f"Failed to fetch Google jobs page {page}: {e}")
-                if page == 1:
-                    return None  # First page failed
-                else:
-                    break  # Continue with jobs found so far
-            
-            html = r.text
-            
-            # Extract job IDs and slugs from the HTML
-            # Pattern: jobs/results/<job_id>-<job-slug>
-            job_pattern = r'jobs/results/(\d+)-([^?"\'\s]+)'
-            matches = re.findall(job_pattern, html)
-            
-            if not matches:
-                logger.info(f"No more jobs found on page {page}")
-                break
-            
-            # Track jobs found on this page
-            page_jobs_count = 0
-            for job_id, slug in matches:
-                if job_id not in seen:
-                    seen.add(job_id)
-                    all_unique_jobs.append((job_id, slug))
-                    page_jobs_count += 1
-            
-            logger.info(f"Page {page}: Found {page_jobs_count} new unique jobs ({len(matches)} total matches)")
+    def __init__(self):
+        # (job_id, slug) for every job link, in page order, including repeats
+        self.matches: List[Tuple[str, str]] = []
+        # job_id -> {'title': ..., 'location': ...} from the embedded data blocks
+        self.details: Dict[str, Dict[str, str]] = {}
+        # Linked jobs whose data block has not been parsed yet, in page order
+        self._waiting: Dict[str, str] = {}
+        # Job IDs already returned by feed()
+        self._emitted = set()
+        self._buffer = ''
+    
+    def feed(self, chunk: str, final: bool = False) -> List[GoogleJob]:
+        """Parse the next chunk of HTML.
+        
+        Matches starting in the last STREAM_TAIL characters are left for the
+        next call, since they may continue in the next chunk. A linked job is
+        returned once its data block was parsed too; the last chunk returns
+        the remaining ones without details.
+        
+        Args:
+            chunk: Next piece of the page
+            final: True for the last chunk, flushes the kept tail
             
-            # If we found fewer than 20 jobs, we've likely reached the end
-            if len(matches) < 20:
-                logger.info(f"Reached last page (page {page})")
+        Returns:
+            Jobs that became complete with this chunk, each job once.
+        """
+        buffer = self._buffer + chunk
+        cut = len(buffer) if final else max(0, len(buffer) - STREAM_TAIL)
+        
+        found = []
+        for match in JOB_LINK_PATTERN.finditer(buffer):
+            if match.start() >= cut:
                 break
-            
-            # If no new unique jobs were found on this page, stop
-            if page_jobs_count == 0:
-                logger.info(f"No new unique jobs on page {page}, stopping pagination")
+            found.append((match.group(1), match.group(2)))
+        
+        for match in JOB_RECORD_PATTERN.finditer(buffer):
+            if match.start() >= cut:
                 break
-            
-            page += 1
+            job_id = match.group(1)
+            if job_id in self.details:
+                continue
+            details = {'title': _unescape(match.group(2))}
+            location = JOB_LOCATION_PATTERN.search(buffer, match.end(), match.end() + STREAM_TAIL)
+            if location:
+                details['location'] = _unescape(location.group(1))
+            self.details[job_id] = details
         
-        logger.info(f"Found {len(all_unique_jobs)} total unique jobs across {page} page(s)")
+        self.matches.extend(found)
+        self._buffer = buffer[cut:]
         
-        if not all_unique_jobs:
-            logger.warning("No job patterns found in Google careers pages")
-            return 0
+        for job_id, slug in found:
+            if job_id not in self._emitted:
+                self._waiting.setdefault(job_id, slug)
+        ready = [
+            (job_id, slug, self.details.get(job_id, {}))
+            for job_id, slug in self._waiting.items()
+            if final or job_id in self.details
+        ]
+        for job_id, _, _ in ready:
+            del self._waiting[job_id]
+            self._emitted.add(job_id)
+        return ready
+
+def _fetch_page(page: int, jobs: queue.Queue, stop: threading.Event) -> GoogleResultsParser:
+    """Download and parse one Google careers results page as it streams in.
+    
+    Jobs are put on the queue in lists as soon as the parser completes
+    them, followed by None once the page is done or failed. The download is
+    abandoned when stop is set.
+    
+    Raises:
+        requests.RequestException: If the page could not be fetched.
+    """
+    params = {
+        'company': ['Fitbit', 'Google', 'YouTube'],
+        'employment_type': 'INTERN'
+    }
+    if page > 1:
+        params['page'] = str(page)
+    
+    parser = GoogleResultsParser()
+    try:
+        with host_limit('www.google.com'):
+            r = http_client.get(
+                'https://www.google.com/about/careers/applications/jobs/results/',
+                params=params,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                },
+                timeout=REQUEST_TIMEOUT,
+                stream=True
+            )
+            with r:
+                r.raise_for_status()
+                r.encoding = r.encoding or 'utf-8'
+                for chunk in r.iter_content(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True):
+                    if stop.is_set():
+                        return parser
+                    ready = parser.feed(chunk)
+                    if ready:
+                        jobs.put(ready)
+                jobs.put(parser.feed('', final=True))
+    finally:
+        jobs.put(None)
+    return parser
+
+@register_source
+class GoogleSource(Source):
+    """Google careers results pages, scraped from the server-rendered HTML."""
+    
+    name = 'google'
+    display_name = 'Google'
+    host = 'www.google.com'
+    
+    def fetch(self) -> PageItems:
+        """Fetch job links and their details from the Google careers pages.
+        
+        The result is complete once the last page was reached without a
+        failed page, so the postings of Google are tracked as open or closed.
         
-    except Exception as e:
-        logger.error(f"Failed to parse Google jobs pages: {e}")
-        return None
+        Returns:
+            PageItems over the jobs of all pages.
+        """
+        result = PageItems()
+        result.items = self._fetch_jobs(result)
+        return result
     
-    new_jobs_count = 0
-    for job_id, job_slug in all_unique_jobs:
+    def _fetch_jobs(self, result: PageItems) -> Iterator[GoogleJob]:
+        """Yield the jobs of all results pages, marking result complete at the end.
+        
+        Google uses a Single Page Application that loads jobs dynamically.
+        We scrape the initial HTML to extract job IDs, titles and locations.
+        Google shows max 20 jobs per page, so we need to paginate.
+        
+        Pages are fetched speculatively in a sliding window of
+        GOOGLE_PAGE_WINDOW parallel requests but processed in order, so the
+        early-stop rules still apply. The jobs of the page being processed
+        are yielded while it is still downloading. Requests past the last
+        page are cancelled.
+        
+        Yields:
+            Tuples of (job ID, job slug, details) for each unique job.
+            
+        Raises:
+            requests.RequestException: If the first page could not be fetched.
+        """
+        total_unique_jobs = 0
+        seen = set()
+        page = 1
+        max_pages = 10  # Safety limit to avoid infinite loops
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, GOOGLE_PAGE_WINDOW), thread_name_prefix='google')
+        stop = threading.Event()
+        pages: Dict[int, Tuple[Future, queue.Queue]] = {}
+        
+        def submit(number: int) -> None:
+            jobs: queue.Queue = queue.Queue()
+            pages[number] = (executor.submit(_fetch_page, number, jobs, stop), jobs)
+        
         try:
-            # Convert slug to title
-            title = job_slug.replace('-', ' ').title()
-            url = f'https://www.google.com/about/careers/applications/jobs/results/{job_id}'
+            next_page = 1
+            while next_page <= min(GOOGLE_PAGE_WINDOW, max_pages):
+                submit(next_page)
+                next_page += 1
             
-            payload = {
-                'username': 'BigTech Internship Monitoring',
-                'avatar_url': None,
-                'embeds': [
-                    {
-                        'title': f'New Internship: {title}',
-                        'url': url,
-                        'thumbnail': {
-                            'url': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Ftse1.mm.bing.net%2Fth%2Fid%2FOIP.KOKzZsAVKlqyZLa1L-ICYAHaHa%3Fpid%3DApi&f=1'
-                        },
-                        'fields': [
-                            {
-                                'name': 'Job ID',
-                                'value': job_id
-                            }
-                        ],
-                        'color': int('4285F4', 16),  # Google Blue
-                        'timestamp': datetime.datetime.now().isoformat(),
-                        'footer': {
-                            'text': 'BigTech Internship Monitoring | by wiestju'
-                        }
-                    }
-                ]
-            }
-
-            company = 'google'
-            if is_new_job(company, job_id):
-                if send_webhook(company, payload):
-                    new_jobs_count += 1
-                    logger.info(f"New Google job posted: {title} ({job_id})")
-        except Exception as e:
-            logger.error(f"Error processing Google job {job_id}: {e}")
-            continue
+            while page <= max_pages:
+                future, jobs = pages.pop(page)
+                # Track jobs found on this page
+                page_jobs_count = 0
+                # A failed page ends its queue early; the error comes from its future below
+                for batch in iter(jobs.get, None):
+                    for job in batch:
+                        if job[0] not in seen:
+                            seen.add(job[0])
+                            page_jobs_count += 1
+                            yield job
+                
+                try:
+                    matches = future.result().matches
+                except requests.RequestException as e:
+                    if page == 1:
+                        raise  # First page failed
+                    logger.error(f"Failed to fetch Google jobs page {page}: {e}")
+                    break  # Continue with jobs found so far
+                total_unique_jobs += page_jobs_count
+                
+                if not matches:
+                    logger.info(f"No more jobs found on page {page}")
+                    result.complete = True
+                    break
+                
+                logger.info(f"Page {page}: Found {page_jobs_count} new unique jobs ({len(matches)} total matches)")
+                
+                # If we found fewer than 20 jobs, we've likely reached the end
+                if len(matches) < 20:
+                    logger.info(f"Reached last page (page {page})")
+                    result.complete = True
+                    break
+                
+                # If no new unique jobs were found on this page, stop
+                if page_jobs_count == 0:
+                    logger.info(f"No new unique jobs on page {page}, stopping pagination")
+                    result.complete = True
+                    break
+                
+                page += 1
+                
+                # Keep the window full
+                if next_page <= max_pages:
+                    submit(next_page)
+                    next_page += 1
+            
+            logger.info(f"Found {total_unique_jobs} total unique jobs across {page} page(s)")
+            
+            if not total_unique_jobs:
+                logger.warning("No job patterns found in Google careers pages")
+                # An empty listing more likely means the page layout changed
+                result.complete = False
+        finally:
+            # Drop speculative requests past the last page without waiting for them
+            stop.set()
+            for future, _ in pages.values():
+                future.cancel()
+            executor.shutdown(wait=False)
     
-    logger.info(f"Google: Found {new_jobs_count} new jobs")
-    return new_jobs_count
+    def normalize(self, job: Tuple[str, str, Dict[str, str]]) -> JobPosting:
+        """Turn a job link and its data block details into a job posting."""
+        job_id, job_slug, job_details = job
+        # Prefer the real title from the data blocks, fall back to the slug
+        title = job_details.get('title') or job_slug.replace('-', ' ').title()
+        location = job_details.get('location')
+        
+        fields = [('Job ID', job_id)]
+        if location:
+            fields.append(('Location', location))
+        
+        return JobPosting(
+            company='google',
+            job_id=job_id,
+            title=title,
+            url=f'https://www.google.com/about/careers/applications/jobs/results/{job_id}',
+            location=location,
+            fields=fields
+        )
@@ -2,15 +2,22 @@
 BigTech Internship Monitoring - Main Script
 Monitors internship postings from major tech companies and sends Discord notifications.
 """
+import argparse
+import asyncio
 import logging
+import signal
 import sys
+from typing import Callable, List, Optional, Tuple
 
+from config import METRICS_PORT, RUN_REPORT_PATH, STORAGE_BACKEND
+from utils import metrics
+from utils.http_client import add_timing_hook
 from utils.job_storage import load_job_storage, update_job_storage
-from jobs.amazon import getJobsAmazon
-from jobs.microsoft import getJobsMicrosoft
-from jobs.facebook import getJobsFacebook
-from jobs.google import getJobsGoogle
-from jobs.apple import getJobsApple
+from utils.http_cache import save_http_cache
+from utils.outbox import retry_outbox, flush_outbox
+from utils.pipeline import run_pipeline
+from utils.scheduler import Scheduler
+from utils.sources import Source, discover_sources
 
 # Configure logging
 logging.basicConfig(
@@ -23,46 +30,96 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def run_cycle(
+    sources: List[Source],
+    on_result: Optional[Callable[[Source, Optional[int]], None]] = None
+) -> Tuple[int, List[str]]:
+    """Poll the given sources once, send notifications and save storage.
+    
+    Args:
+        sources: Sources to poll
+        on_result: Called with each source and its number of new jobs
+        
+    Returns:
+        Tuple of (total new jobs, list of failed source names).
+    """
+    # Retry notifications that could not be delivered in earlier runs
+    with metrics.timer('retry_outbox'):
+        retry_outbox()
+    
+    total_new_jobs, failed_companies = asyncio.run(run_pipeline(sources, on_result=on_result))
+    
+    # Send remaining batched notifications
+    logger.info("Sending queued webhook notifications...")
+    with metrics.timer('flush_outbox'):
+        flushed = flush_outbox()
+    if not flushed:
+        logger.warning("Some webhook notifications could not be sent")
+    
+    # Update job storage
+    logger.info(f"Updating job storage ({STORAGE_BACKEND})...")
+    with metrics.timer('save_storage'):
+        saved = update_job_storage()
+    if saved:
+        logger.info("Job storage updated successfully")
+        # Cached responses count as processed only once their jobs are stored
+        with metrics.timer('save_http_cache'):
+            save_http_cache()
+    else:
+        logger.warning("Job storage update failed or no changes")
+    
+    metrics.incr('cycles')
+    if RUN_REPORT_PATH:
+        metrics.write_report(
+            RUN_REPORT_PATH,
+            last_cycle={
+                'sources': [source.name for source in sources],
+                'new_jobs': total_new_jobs,
+                'failed': failed_companies
+            }
+        )
+    
+    return total_new_jobs, failed_companies
+
 def main():
     """Main function to fetch jobs from all companies and update storage."""
+    parser = argparse.ArgumentParser(description="BigTech Internship Monitoring")
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help="keep running and poll each company on its own interval"
+    )
+    args = parser.parse_args()
+    
     logger.info("=" * 60)
     logger.info("BigTech Internship Monitoring - Starting")
     logger.info("=" * 60)
     
+    # Count requests, bytes and statuses of all HTTP traffic
+    add_timing_hook(metrics.record_http)
+    
     # Load existing job storage
-    logger.info("Loading job storage from GitHub...")
-    if not load_job_storage():
+    logger.info(f"Loading job storage ({STORAGE_BACKEND})...")
+    with metrics.timer('load_storage'):
+        loaded = load_job_storage()
+    if not loaded:
         logger.error("Failed to load job storage. Exiting.")
         sys.exit(1)
     
-    # Fetch jobs from all companies
-    companies = [
-        ("Amazon", getJobsAmazon),
-        ("Microsoft", getJobsMicrosoft),
-        ("Meta/Facebook", getJobsFacebook),
-        ("Google", getJobsGoogle),
-        ("Apple", getJobsApple)
-    ]
-    
-    total_new_jobs = 0
-    failed_companies = []
+    # Find all sources in the jobs package
+    sources = discover_sources()
+    logger.info(f"Loaded {len(sources)} sources: {', '.join(source.label for source in sources)}")
     
-    for company_name, fetch_func in companies:
-        logger.info(f"Fetching jobs from {company_name}...")
-        result = fetch_func()
-        
-        if result is None:
-            logger.warning(f"Failed to fetch jobs from {company_name}")
-            failed_companies.append(company_name)
-        else:
-            total_new_jobs += result
+    if args.daemon:
+        scheduler = Scheduler(sources, run_cycle)
+        signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+        if METRICS_PORT:
+            metrics.start_metrics_server(METRICS_PORT)
+        logger.info("Running in daemon mode")
+        scheduler.run()
+        return
     
-    # Update job storage
-    logger.info("Updating job storage on GitHub...")
-    if update_job_storage():
-        logger.info("Job storage updated successfully")
-    else:
-        logger.warning("Job storage update failed or no changes")
+    total_new_jobs, failed_companies = run_cycle(sources)
     
     # Summary
     logger.info("=" * 60)
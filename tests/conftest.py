@@ -0,0 +1,10 @@
+"""
+Shared test setup.
+config reads its settings from the environment on import, so the tests set
+the required ones before any module under test is imported.
+"""
+import os
+
+os.environ.setdefault('WEBHOOK_URLS_JSON', '{"amazon": "https://discord.test/webhooks/amazon"}')
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('GH_TOKEN', 'test-token')
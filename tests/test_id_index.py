@@ -0,0 +1,74 @@
+"""
+Tests for the binary job ID index.
+"""
+import pytest
+
+from utils.id_index import MAX_INT_ID, IdIndex, as_int_id, encode_index, write_index
+
+DATA = {
+    'amazon': ['12', '3', '0042', 'R-100', str(MAX_INT_ID), str(MAX_INT_ID + 1), 'zürich-7'],
+    'google': [],
+    'apple': [200, '200', 'a', 'b'],
+}
+
+@pytest.mark.parametrize('job_id, expected', [
+    ('0', 0),
+    ('123', 123),
+    ('0042', None),
+    ('R-100', None),
+    ('١٢', None),
+    (str(MAX_INT_ID), MAX_INT_ID),
+    (str(MAX_INT_ID + 1), None),
+])
+def test_as_int_id(job_id, expected):
+    assert as_int_id(job_id) == expected
+
+def test_encode_drops_duplicates():
+    _, duplicates = encode_index(DATA)
+    assert duplicates == 1
+
+def test_lookup():
+    index = IdIndex.from_buffer(encode_index(DATA, 'v1')[0])
+    
+    assert index.tag == 'v1'
+    assert len(index) == 10
+    for company, job_ids in DATA.items():
+        for job_id in job_ids:
+            assert index.contains(company, str(job_id))
+    for job_id in ['42', '0012', '4', 'R-10', 'R-1000', '', str(MAX_INT_ID - 1), 'zurich-7']:
+        assert not index.contains('amazon', job_id)
+    assert not index.contains('google', '12')
+    assert not index.contains('microsoft', '12')
+    assert index.get('microsoft') is None
+
+def test_export_round_trips():
+    exported = IdIndex.from_buffer(encode_index(DATA)[0]).export()
+    
+    assert {company: sorted(job_ids) for company, job_ids in exported.items()} == {
+        company: sorted({str(job_id) for job_id in job_ids}) for company, job_ids in DATA.items()
+    }
+
+def test_write_and_open(tmp_path):
+    path = str(tmp_path / 'index' / 'known_jobs.idx')
+    written = write_index(path, DATA, 'v2')
+    opened = IdIndex.open(path)
+    
+    assert written.contains('amazon', '0042')
+    assert opened is not None
+    assert opened.tag == 'v2'
+    assert opened.export() == written.export()
+
+def test_write_without_path_stays_in_memory():
+    index = write_index('', DATA)
+    assert index.contains('apple', '200')
+
+def test_open_missing_or_invalid(tmp_path):
+    assert IdIndex.open(str(tmp_path / 'missing.idx')) is None
+    
+    invalid = tmp_path / 'invalid.idx'
+    invalid.write_bytes(b'not an index file')
+    assert IdIndex.open(str(invalid)) is None
+    
+    truncated = tmp_path / 'truncated.idx'
+    truncated.write_bytes(b'BT')
+    assert IdIndex.open(str(truncated)) is None
@@ -0,0 +1,93 @@
+"""
+Tests for incremental JSON extraction.
+"""
+import json
+from typing import Any, Iterator, List
+
+import pytest
+
+from utils.json_stream import select
+
+DOCUMENT = {
+    'facets': {
+        'locations': [{'name': 'Seattle, "WA"', 'count': 12}, {'name': 'Zürich', 'count': 3}],
+        'deep': [[[[{'a': [1, 2, {'b': '}]'}]}]]]],
+        'escaped': 'quote \" backslash \\ brace } bracket ] unicode é \U0001f600',
+    },
+    'meta': {'total': 1234567, 'ratio': -1.5e-3, 'empty': {}, 'none': None, 'flags': [True, False]},
+    'data': {
+        'positions': [
+            {'id': 123456789, 'title': 'Software Engineer Intern', 'tags': ['a', 'b'], 'salary': 4.25},
+            {'id': '0042', 'title': 'Research Intern – ML', 'location': None, 'remote': False},
+            [],
+            'plain',
+            -17,
+        ],
+        'empty': [],
+    },
+    'trailer': ['x' * 100] * 5,
+}
+
+def chunked(document: Any, size: int) -> Iterator[bytes]:
+    encoded = json.dumps(document, ensure_ascii=False, indent=1).encode()
+    for at in range(0, len(encoded), size):
+        yield encoded[at:at + size]
+
+def lookup(document: Any, path) -> Any:
+    for key in path:
+        if not isinstance(document, dict) or key not in document:
+            return None
+        document = document[key]
+    return document
+
+PATHS = [
+    ('data', 'positions'),
+    ('meta', 'total'),
+    ('meta', 'ratio'),
+    ('meta', 'empty'),
+    ('meta', 'flags'),
+    ('data', 'empty'),
+    ('facets', 'escaped'),
+    ('missing',),
+    ('data', 'missing'),
+    ('data', 'positions', 'id'),
+]
+
+# Sizes of 1 and 3 bytes split multi-byte characters, escapes and numbers across chunks
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 1 << 20])
+def test_select_matches_json_loads(size):
+    assert select(chunked(DOCUMENT, size), PATHS) == [lookup(DOCUMENT, path) for path in PATHS]
+
+@pytest.mark.parametrize('size', [1, 5, 1 << 20])
+def test_select_whole_document(size):
+    assert select(chunked(DOCUMENT, size), [()]) == [DOCUMENT]
+
+def test_select_stops_reading_once_all_paths_were_found():
+    read: List[bytes] = []
+    
+    def chunks() -> Iterator[bytes]:
+        for chunk in chunked({'total': 3, 'hits': [1, 2, 3], 'facets': ['f'] * 1000}, 16):
+            read.append(chunk)
+            yield chunk
+    
+    assert select(chunks(), [('total',), ('hits',)]) == [3, [1, 2, 3]]
+    assert sum(map(len, read)) < 100
+
+def test_select_empty_object():
+    assert select([b'{}'], [('data',)]) == [None]
+
+def test_select_in_non_object_root():
+    assert select([b'[1, 2]'], [('data',)]) == [None]
+
+@pytest.mark.parametrize('document', [
+    b'',
+    b'{"data": ',
+    b'{"data": [1, 2',
+    b'{"data": [1 2]}',
+    b'{"data" [1]}',
+    b'{"other": {"a": 1}, "data": "unterminated',
+    b'{"other": {"a": [1}',
+])
+def test_select_rejects_invalid_documents(document):
+    with pytest.raises(ValueError):
+        select([document], [('data',)])
@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite storage backend and its job ID index.
+"""
+import shutil
+import sqlite3
+
+import pytest
+
+from utils import storage_backends
+from utils.storage_backends import SQLiteBackend
+
+@pytest.fixture
+def backend(tmp_path) -> SQLiteBackend:
+    return SQLiteBackend(str(tmp_path / 'known_jobs.db'), seed_path=None)
+
+@pytest.fixture
+def index_path(tmp_path) -> str:
+    return str(tmp_path / 'known_jobs.idx')
+
+def save(backend: SQLiteBackend, added=None, removed=None) -> None:
+    assert backend.save(lambda: {}, added or {}, removed)
+
+def known(loaded) -> dict:
+    """All IDs per company of a loaded index plus its delta."""
+    index, delta = loaded
+    ids = {company: set(job_ids) for company, job_ids in index.export().items()}
+    for company, job_ids in delta.items():
+        ids.setdefault(company, set()).update(job_ids)
+    return ids
+
+def test_seeds_from_json(tmp_path, index_path):
+    seed = tmp_path / 'known_jobs.json'
+    seed.write_text('{"amazon": ["1", "2"]}')
+    backend = SQLiteBackend(str(tmp_path / 'known_jobs.db'), seed_path=str(seed))
+    
+    assert backend.load() == {'amazon': ['1', '2']}
+    assert known(backend.load_index(index_path)) == {'amazon': {'1', '2'}}
+
+def test_index_catches_up_from_delta(backend, index_path):
+    save(backend, {'amazon': ['1', '2']})
+    index, delta = backend.load_index(index_path)
+    assert delta == {}
+    tag = index.tag
+    
+    save(backend, {'amazon': ['3'], 'apple': ['a']})
+    index, delta = backend.load_index(index_path)
+    
+    # Few new IDs are served from the delta table without a rebuild
+    assert index.tag == tag
+    assert delta == {'amazon': ['3'], 'apple': ['a']}
+    assert known((index, delta)) == {'amazon': {'1', '2', '3'}, 'apple': {'a'}}
+
+def test_large_delta_rebuilds_index(backend, index_path, monkeypatch):
+    monkeypatch.setattr(storage_backends, 'SQLITE_INDEX_SLACK', 0)
+    save(backend, {'amazon': ['1']})
+    backend.load_index(index_path)
+    
+    save(backend, {'amazon': ['2', '3']})
+    index, delta = backend.load_index(index_path)
+    
+    assert delta == {}
+    assert known((index, delta)) == {'amazon': {'1', '2', '3'}}
+
+def test_eviction_rebuilds_index(backend, index_path):
+    save(backend, {'amazon': ['1', '2', '3']})
+    backend.load_index(index_path)
+    
+    save(backend, removed={'amazon': ['2']})
+    index, delta = backend.load_index(index_path)
+    
+    assert delta == {}
+    assert not index.contains('amazon', '2')
+    assert known((index, delta)) == {'amazon': {'1', '3'}}
+
+def test_stale_index_is_rebuilt_after_deltas_were_pruned(backend, index_path, tmp_path, monkeypatch):
+    save(backend, {'amazon': ['1']})
+    backend.load_index(index_path)
+    stale = str(tmp_path / 'stale.idx')
+    shutil.copy(index_path, stale)
+    
+    # A rebuild deletes the delta rows the stale copy would need to catch up
+    monkeypatch.setattr(storage_backends, 'SQLITE_INDEX_SLACK', 0)
+    save(backend, {'amazon': ['2', '3']})
+    backend.load_index(index_path)
+    monkeypatch.undo()
+    save(backend, {'amazon': ['4']})
+    
+    shutil.copy(stale, index_path)
+    index, delta = backend.load_index(index_path)
+    
+    assert delta == {}
+    assert known((index, delta)) == {'amazon': {'1', '2', '3', '4'}}
+
+def test_database_without_pruned_version_is_treated_as_pruned(backend, index_path, tmp_path):
+    save(backend, {'amazon': ['1']})
+    backend.load_index(index_path)
+    stale = str(tmp_path / 'stale.idx')
+    shutil.copy(index_path, stale)
+    save(backend, {'amazon': ['2']})
+    save(backend, {'amazon': ['3']})
+    
+    # Like a database written before the pruned version was recorded,
+    # whose delta rows of version 2 were deleted by a rebuild
+    with sqlite3.connect(backend.path) as conn:
+        conn.execute('DELETE FROM known_jobs_meta')
+        conn.execute('DELETE FROM known_jobs_delta WHERE version <= 2')
+    conn.close()
+    
+    shutil.copy(stale, index_path)
+    index, delta = backend.load_index(index_path)
+    
+    assert delta == {}
+    assert known((index, delta)) == {'amazon': {'1', '2', '3'}}
+
+def test_index_of_other_database_is_rebuilt(backend, index_path, tmp_path):
+    other = SQLiteBackend(str(tmp_path / 'other.db'), seed_path=None)
+    save(other, {'amazon': ['9']})
+    other.load_index(index_path)
+    
+    save(backend, {'amazon': ['1']})
+    assert known(backend.load_index(index_path)) == {'amazon': {'1'}}
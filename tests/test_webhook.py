@@ -0,0 +1,110 @@
+"""
+Tests for batched webhook delivery.
+"""
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import requests
+
+from utils import webhook
+
+URL = 'https://discord.test/webhooks/amazon'
+
+def make_response(status: int, headers: Dict[str, str] = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r.headers.update(headers or {})
+    r._content = b'{}'
+    r.url = URL
+    return r
+
+class FakeDiscord:
+    """Answers webhook posts from a list of statuses and records the messages."""
+    
+    def __init__(self, respond):
+        self.respond = respond
+        self.messages: List[Dict[str, Any]] = []
+    
+    def post(self, url: str, json: Dict[str, Any], timeout: float) -> requests.Response:
+        self.messages.append(json)
+        return self.respond(json)
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    """Fresh rate limit state and recorded instead of real sleeps."""
+    recorded: List[float] = []
+    monkeypatch.setattr(webhook, '_rate_limiter', webhook.RateLimiter())
+    monkeypatch.setattr(webhook.time, 'sleep', recorded.append)
+    monkeypatch.setitem(webhook.WEBHOOK_URLS, 'amazon', URL)
+    return recorded
+
+def install(monkeypatch, respond) -> FakeDiscord:
+    discord = FakeDiscord(respond)
+    monkeypatch.setattr(webhook.http_client, 'post', discord.post)
+    return discord
+
+def send_batch(count: int) -> List[Tuple[List[str], bool]]:
+    """Batch count embeds with one key each, flush them and return the results."""
+    results: List[Tuple[List[str], bool]] = []
+    batcher = webhook.WebhookBatcher(lambda keys, delivered: results.append((keys, delivered)))
+    for i in range(count):
+        batcher.add('amazon', {'username': 'Bot', 'embeds': [{'title': f'Job {i}'}]}, key=f'key-{i}')
+    batcher.flush()
+    return results
+
+def test_batch_is_sent_as_one_message(monkeypatch, sleeps):
+    discord = install(monkeypatch, lambda message: make_response(204))
+    
+    assert send_batch(3) == [(['key-0', 'key-1', 'key-2'], True)]
+    assert len(discord.messages) == 1
+    assert [embed['title'] for embed in discord.messages[0]['embeds']] == ['Job 0', 'Job 1', 'Job 2']
+    assert discord.messages[0]['username'] == 'Bot'
+
+def test_rejected_batch_is_split_and_only_invalid_embeds_fail(monkeypatch, sleeps):
+    def respond(message):
+        titles = [embed['title'] for embed in message['embeds']]
+        return make_response(400 if 'Job 1' in titles else 204)
+    discord = install(monkeypatch, respond)
+    
+    assert send_batch(3) == [(['key-0', 'key-2'], True), (['key-1'], False)]
+    # The batch, then each embed on its own
+    assert [len(message['embeds']) for message in discord.messages] == [3, 1, 1, 1]
+
+@pytest.mark.parametrize('status', [401, 403, 404])
+def test_other_client_errors_fail_the_whole_batch(monkeypatch, sleeps, status):
+    discord = install(monkeypatch, lambda message: make_response(status))
+    
+    assert send_batch(3) == [(['key-0', 'key-1', 'key-2'], False)]
+    assert len(discord.messages) == 1
+    assert sleeps == []
+
+def test_full_batch_is_sent_before_the_next_embed(monkeypatch, sleeps):
+    discord = install(monkeypatch, lambda message: make_response(204))
+    
+    send_batch(webhook.MAX_EMBEDS_PER_MESSAGE + 1)
+    assert [len(message['embeds']) for message in discord.messages] == [webhook.MAX_EMBEDS_PER_MESSAGE, 1]
+
+def test_rate_limited_batch_waits_and_is_retried(monkeypatch, sleeps):
+    responses = iter([make_response(429, {'Retry-After': '2'}), make_response(204)])
+    discord = install(monkeypatch, lambda message: next(responses))
+    
+    assert send_batch(2) == [(['key-0', 'key-1'], True)]
+    assert len(discord.messages) == 2
+    # The retry waits for Retry-After instead of backing off
+    assert len(sleeps) == 1 and 1.5 < sleeps[0] <= 2
+
+def test_exhausted_bucket_waits_for_reset(monkeypatch, sleeps):
+    headers = {'X-RateLimit-Bucket': 'abc', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '3'}
+    install(monkeypatch, lambda message: make_response(204, headers))
+    
+    assert webhook.send_webhook('amazon', {'embeds': [{'title': 'Job'}]})
+    assert sleeps == []
+    assert webhook.send_webhook('amazon', {'embeds': [{'title': 'Job'}]})
+    assert len(sleeps) == 1 and 2.5 < sleeps[0] <= 3
+
+def test_server_errors_are_retried_with_backoff(monkeypatch, sleeps):
+    responses = iter([make_response(502), make_response(503), make_response(204)])
+    install(monkeypatch, lambda message: next(responses))
+    
+    assert send_batch(1) == [(['key-0'], True)]
+    assert sleeps == [1, 2]
@@ -0,0 +1,114 @@
+"""
+Memory-mapped binary index files.
+An index file starts with an 8-byte magic and the length of a JSON header,
+followed by the header and 8-byte aligned data sections whose offsets the
+header lists relative to its end. The sections are read in place as
+typed memoryviews, so opening a file does not decode its contents.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Magic followed by the length of the JSON header
+PREAMBLE = struct.Struct('<8sI')
+
+T = TypeVar('T')
+
+class SectionWriter:
+    """Collects the data sections of an index file."""
+    
+    def __init__(self):
+        self.sections: List[bytes] = []
+        self.position = 0
+    
+    def add(self, section: bytes) -> Tuple[int, int]:
+        """Append a section.
+        
+        Returns:
+            Tuple of (offset, size) of the section.
+        """
+        at = self.position
+        size = len(section)
+        # Keep sections 8-byte aligned for the integer arrays
+        section += b'\0' * (-size % 8)
+        self.sections.append(section)
+        self.position += len(section)
+        return at, size
+    
+    def encode(self, magic: bytes, header: Dict[str, Any]) -> bytes:
+        """Encode the file with the given header, which gets the byte order added."""
+        encoded = json.dumps({**header, 'byteorder': sys.byteorder}).encode()
+        # Pad the header so the sections after it stay aligned
+        encoded += b' ' * (-(PREAMBLE.size + len(encoded)) % 8)
+        return PREAMBLE.pack(magic, len(encoded)) + encoded + b''.join(self.sections)
+
+def read_header(buffer: Any, magic: bytes, kind: str) -> Tuple[memoryview, Dict[str, Any], int]:
+    """Check the preamble of an encoded file and decode its header.
+    
+    Args:
+        buffer: mmap or bytes of the file
+        magic: Expected magic
+        kind: Name of the file type, for errors
+    
+    Returns:
+        Tuple of (view of the buffer, header, offset the section offsets are relative to).
+    
+    Raises:
+        ValueError: If the buffer is not a valid file of this kind for this platform.
+    """
+    view = memoryview(buffer)
+    if len(view) < PREAMBLE.size:
+        raise ValueError("Index file is truncated")
+    found, header_size = PREAMBLE.unpack_from(view)
+    if found != magic:
+        raise ValueError(f"Not a {kind} file")
+    header = json.loads(bytes(view[PREAMBLE.size:PREAMBLE.size + header_size]))
+    if header.get('byteorder') != sys.byteorder:
+        raise ValueError("Index file was written on a platform with a different byte order")
+    return view, header, PREAMBLE.size + header_size
+
+def open_mapped(path: str, from_buffer: Callable[[Any], T], kind: str) -> Optional[T]:
+    """Memory-map a file and read it with from_buffer.
+    
+    Returns:
+        Result of from_buffer, or None if the file is missing or invalid.
+    """
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return from_buffer(buffer)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring {kind} {path}: {e}")
+        return None
+
+def write_mapped(path: str, content: bytes, from_buffer: Callable[[Any], T], kind: str) -> T:
+    """Write a file and memory-map it.
+    
+    The file is written next to its path and moved into place, so readers
+    never see it half-written. Without a path, or if the file cannot be
+    written, the content is read from memory instead.
+    """
+    if path:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            result = open_mapped(path, from_buffer, kind)
+            if result is not None:
+                return result
+        except OSError as e:
+            logger.warning(f"Failed to write {kind} {path}: {e}")
+    return from_buffer(content)
@@ -0,0 +1,298 @@
+"""
+HTTP response cache for conditional requests.
+Remembers ETag/Last-Modified validators and a hash of the body for each
+request fingerprint (method, URL, params and body). Callers can tell when
+an upstream response is unchanged since the last run and skip processing.
+Responses that cannot be unchanged, because the cache has no hash for the
+request yet, can be parsed while they stream in. Any other response is
+read and hashed first, so with a persisted cache streaming only applies to
+pages seen for the first time.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from config import HTTP_CACHE_PATH
+from utils import http_client, json_stream, metrics
+from utils.json_stream import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the socket at a time for streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def fingerprint(method: str, url: str, **kwargs: Any) -> str:
+    """Build a stable key for a request from its method, URL, params and body."""
+    key = json.dumps(
+        [method.upper(), url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data')],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class CachedResponse:
+    """Response of a cached request.
+    
+    unchanged is True if the server answered 304 Not Modified or the body
+    hash matches the last committed response. The new validators and hash
+    are only remembered once commit() is called, so a response whose
+    processing failed is not treated as unchanged next time.
+    
+    A streamed response has not read its body yet; it is hashed while
+    select() or content reads it from the socket.
+    """
+    
+    def __init__(
+        self,
+        cache: 'HTTPCache',
+        key: str,
+        response: requests.Response,
+        entry: Dict[str, Any],
+        streamed: bool = False
+    ):
+        self.cache = cache
+        self.key = key
+        self.response = response
+        self.entry = entry
+        self.unchanged = False
+        # True while the body is still waiting on the socket
+        self.streamed = streamed
+        self._body: Optional[bytes] = None
+    
+    @property
+    def host(self) -> str:
+        return urlsplit(self.response.url).netloc
+    
+    def _read_stream(self) -> Iterator[bytes]:
+        """Read a streamed body from the socket, hashing and counting it."""
+        self.streamed = False
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            for chunk in self.response.iter_content(STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.response.close()
+        metrics.incr('http_body_bytes', size, host=self.host)
+        self.entry['body_hash'] = digest.hexdigest()
+    
+    @property
+    def content(self) -> Optional[bytes]:
+        """Response body; for a 304 the stored body, if it was kept."""
+        if self.response.status_code == 304:
+            body = self.entry.get('body')
+            return body.encode() if body is not None else None
+        if self.streamed:
+            self._body = b''.join(self._read_stream())
+        return self._body if self._body is not None else self.response.content
+    
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """Small values derived from the body, stored with the cache entry."""
+        return self.entry.setdefault('meta', {})
+    
+    def json(self) -> Any:
+        content = self.content
+        if content is None:
+            raise ValueError("Response body is not cached")
+        with metrics.timer('json_parse', host=self.host):
+            return json_stream.loads(content)
+    
+    def select(self, *paths: Path) -> List[Any]:
+        """Decode only the values at some paths of the JSON body.
+        
+        A streamed body is parsed as it arrives and never held in memory as
+        a whole; the json_parse time then includes receiving it.
+        
+        Returns:
+            Value at each path, or None where the body has none.
+        
+        Raises:
+            ValueError: If the body is not valid JSON or not available.
+            requests.RequestException: If reading a streamed body failed.
+        """
+        with metrics.timer('json_parse', host=self.host):
+            if not self.streamed:
+                content = self.content
+                if content is None:
+                    raise ValueError("Response body is not cached")
+                return json_stream.select([content], paths)
+            
+            chunks = self._read_stream()
+            values = json_stream.select(chunks, paths)
+            # The rest of the body still counts towards its hash
+            for _ in chunks:
+                pass
+            return values
+    
+    def commit(self) -> None:
+        """Remember this response's validators and body hash."""
+        self.cache.set(self.key, self.entry)
+
+class HTTPCache:
+    """Validator and body hash store keyed by request fingerprint."""
+    
+    def __init__(self, path: Optional[str] = HTTP_CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self) -> None:
+        """Load cache entries from disk, starting empty on any error."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+            logger.debug(f"Loaded {len(self.entries)} HTTP cache entries")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load HTTP cache, starting empty: {e}")
+            self.entries = {}
+    
+    def save(self) -> bool:
+        """Write committed cache entries to disk.
+        
+        Returns:
+            True if successful or persistence is disabled, False otherwise.
+        """
+        if not self.path:
+            return True
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                data = json.dumps(self.entries, separators=(',', ':'))
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to save HTTP cache: {e}")
+            return False
+    
+    def get(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.entries.get(key, {}))
+    
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[key] = entry
+    
+    def forget(self, host: str) -> int:
+        """Drop the entries of a host, so its next responses are processed in full.
+        
+        Returns:
+            Number of dropped entries.
+        """
+        with self._lock:
+            keys = [key for key, entry in self.entries.items() if entry.get('host') == host]
+            for key in keys:
+                del self.entries[key]
+        return len(keys)
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        store_body: bool = False,
+        stream: bool = False,
+        **kwargs: Any
+    ) -> CachedResponse:
+        """Send a conditional request through the shared HTTP session.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            store_body: Keep the body in the cache so a 304 can be served
+                from it (use for small responses only)
+            stream: Leave the body on the socket until it is read, if the
+                response cannot be unchanged because the cache has no hash
+                for the request yet. Otherwise the body is read and hashed
+                right away, so an unchanged body is never parsed.
+            **kwargs: Arguments passed on to http_client.request()
+            
+        Returns:
+            Cached response; check .unchanged before processing the body.
+            
+        Raises:
+            requests.RequestException: On connection errors and error statuses.
+        """
+        key = fingerprint(method, url, **kwargs)
+        cached = self.get(key)
+        stream = stream and not store_body and not cached.get('body_hash')
+        
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        r = http_client.request(method, url, headers=headers, stream=stream, **kwargs)
+        host = urlsplit(url).netloc
+        
+        if r.status_code == 304:
+            metrics.incr('http_unchanged', host=host)
+            result = CachedResponse(self, key, r, cached)
+            result.unchanged = True
+            return result
+        
+        if not r.ok:
+            r.close()
+        r.raise_for_status()
+        if stream:
+            entry = {
+                'etag': r.headers.get('ETag'),
+                'last_modified': r.headers.get('Last-Modified'),
+                'host': host,
+                'meta': {}
+            }
+            return CachedResponse(self, key, r, entry, streamed=True)
+        
+        metrics.incr('http_body_bytes', len(r.content), host=host)
+        body_hash = hashlib.sha256(r.content).hexdigest()
+        entry = {
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'body_hash': body_hash,
+            'host': host,
+            'meta': dict(cached.get('meta', {})) if cached.get('body_hash') == body_hash else {}
+        }
+        if store_body:
+            entry['body'] = r.text
+        
+        result = CachedResponse(self, key, r, entry)
+        result.unchanged = cached.get('body_hash') == body_hash
+        if result.unchanged:
+            metrics.incr('http_unchanged', host=host)
+        return result
+
+# Global cache instance
+_cache = HTTPCache()
+
+def cached_request(
+    method: str,
+    url: str,
+    store_body: bool = False,
+    stream: bool = False,
+    **kwargs: Any
+) -> CachedResponse:
+    """Send a conditional request using the shared cache."""
+    return _cache.request(method, url, store_body=store_body, stream=stream, **kwargs)
+
+def forget_host(host: str) -> int:
+    """Drop the shared cache entries of a host."""
+    return _cache.forget(host)
+
+def save_http_cache() -> bool:
+    """Persist the shared cache. Call only after job storage was saved."""
+    return _cache.save()
@@ -0,0 +1,128 @@
+"""
+Shared HTTP client for scrapers, storage and webhooks.
+All requests go through one pooled session, so connections to the same
+host are kept alive and reused instead of paying a new TCP+TLS handshake
+for every call.
+"""
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import REQUEST_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_POOL_SIZE
+from utils import metrics
+from utils.resilience import get_guard
+
+logger = logging.getLogger(__name__)
+
+# Brotli is decoded by urllib3 only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# Called with (method, url, status code, elapsed seconds, body size in bytes)
+TimingHook = Callable[[str, str, int, float, int], None]
+
+_timing_hooks: List[TimingHook] = []
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def add_timing_hook(hook: TimingHook) -> None:
+    """Register a function that is called after every response."""
+    _timing_hooks.append(hook)
+
+def remove_timing_hook(hook: TimingHook) -> None:
+    """Unregister a timing hook."""
+    if hook in _timing_hooks:
+        _timing_hooks.remove(hook)
+
+def _on_response(r: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """Response hook that reports request timings."""
+    elapsed = r.elapsed.total_seconds()
+    size = int(r.headers.get('Content-Length') or 0)
+    method = r.request.method or ''
+    host = urlsplit(r.url).netloc
+    logger.debug(f"{method} {host} -> {r.status_code} in {elapsed:.3f}s")
+    
+    # Attempts urllib3 retried before this response
+    retries = getattr(r.raw, 'retries', None)
+    if retries is not None and retries.history:
+        metrics.incr('retries', len(retries.history), kind='http', host=host)
+    
+    for hook in list(_timing_hooks):
+        try:
+            hook(method, r.url, r.status_code, elapsed, size)
+        except Exception as e:
+            logger.warning(f"Timing hook failed: {e}")
+
+def create_session() -> requests.Session:
+    """Create a session with connection pooling, retries and compression."""
+    session = requests.Session()
+    
+    # Only idempotent methods are retried here; webhooks handle their own retries
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    session.hooks['response'].append(_on_response)
+    return session
+
+def get_session() -> requests.Session:
+    """Get the shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Send a request through the shared session.
+    
+    Accepts the same arguments as requests.request(). The timeout defaults
+    to REQUEST_TIMEOUT. Requests to source hosts go through their circuit
+    breaker and may be hedged (see utils.resilience).
+    """
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    guard = get_guard(urlsplit(url).netloc)
+    if guard is None:
+        return get_session().request(method, url, **kwargs)
+    return guard.call(lambda: get_session().request(method, url, **kwargs))
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    """Send a GET request through the shared session."""
+    return request('GET', url, **kwargs)
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    """Send a POST request through the shared session."""
+    return request('POST', url, **kwargs)
+
+def put(url: str, **kwargs: Any) -> requests.Response:
+    """Send a PUT request through the shared session."""
+    return request('PUT', url, **kwargs)
+
+def delete(url: str, **kwargs: Any) -> requests.Response:
+    """Send a DELETE request through the shared session."""
+    return request('DELETE', url, **kwargs)
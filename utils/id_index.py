@@ -0,0 +1,206 @@
+"""
+Compact binary index of known job IDs.
+Numeric IDs are kept per company as a sorted array of packed 64-bit
+integers, all other IDs in a sorted string table. The file is memory-mapped
+and searched by bisection, so opening it and looking up an ID take the same
+time no matter how many IDs it holds, and the IDs never become Python
+objects. known_jobs.json stays the import/export format:
+
+    python -m utils.id_index build data/known_jobs.json .cache/known_jobs.idx
+    python -m utils.id_index export .cache/known_jobs.idx > known_jobs.json
+"""
+import array
+import bisect
+import json
+import logging
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.binary_file import SectionWriter, open_mapped, read_header, write_mapped
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BTJIDX1\0'
+
+# Largest ID stored as an integer
+MAX_INT_ID = 2 ** 64 - 1
+
+def as_int_id(job_id: str) -> Optional[int]:
+    """Integer value of a numeric job ID, or None if it must be kept as a string.
+    
+    IDs with leading zeros stay strings, since the integer would not turn
+    back into the same ID.
+    """
+    if not job_id.isdigit() or not job_id.isascii() or (job_id[0] == '0' and len(job_id) > 1):
+        return None
+    value = int(job_id)
+    return value if value <= MAX_INT_ID else None
+
+class _StringTable:
+    """Sorted UTF-8 strings, addressed through an offset array."""
+    
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]])
+
+class CompanyIds:
+    """Known job IDs of one company."""
+    
+    def __init__(self, ints: memoryview, strings: _StringTable):
+        self.ints = ints
+        self.strings = strings
+    
+    def __len__(self) -> int:
+        return len(self.ints) + len(self.strings)
+    
+    def __contains__(self, job_id: str) -> bool:
+        value = as_int_id(job_id)
+        if value is not None:
+            ints = self.ints
+            i = bisect.bisect_left(ints, value)
+            return i < len(ints) and ints[i] == value
+        key = job_id.encode()
+        strings = self.strings
+        i = bisect.bisect_left(strings, key)
+        return i < len(strings) and strings[i] == key
+    
+    def __iter__(self) -> Iterator[str]:
+        for value in self.ints:
+            yield str(value)
+        for i in range(len(self.strings)):
+            yield self.strings[i].decode()
+
+class IdIndex:
+    """Read-only index of known job IDs per company."""
+    
+    def __init__(self, buffer: Any = None, tag: str = '', companies: Optional[Dict[str, CompanyIds]] = None):
+        # mmap or bytes the company views point into
+        self.buffer = buffer
+        # Version of the stored data the index was built from, e.g. a file SHA
+        self.tag = tag
+        self.companies = companies or {}
+    
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> 'IdIndex':
+        """Read an index from an encoded buffer.
+        
+        Raises:
+            ValueError: If the buffer is not a valid index for this platform.
+        """
+        view, header, base = read_header(buffer, MAGIC, 'job ID index')
+        companies = {}
+        for company, entry in header['companies'].items():
+            ints_at, ints_count, offsets_at, strings_count, data_at, data_size = entry
+            ints_at, offsets_at, data_at = ints_at + base, offsets_at + base, data_at + base
+            ints = view[ints_at:ints_at + ints_count * 8].cast('Q')
+            offsets = view[offsets_at:offsets_at + (strings_count + 1) * 8].cast('Q')
+            data = view[data_at:data_at + data_size]
+            companies[company] = CompanyIds(ints, _StringTable(offsets, data))
+        return cls(buffer, header.get('tag', ''), companies)
+    
+    @classmethod
+    def open(cls, path: str) -> Optional['IdIndex']:
+        """Memory-map an index file.
+        
+        Returns:
+            Index, or None if the file is missing or invalid.
+        """
+        return open_mapped(path, cls.from_buffer, 'job ID index')
+    
+    def get(self, company: str) -> Optional[CompanyIds]:
+        return self.companies.get(company)
+    
+    def contains(self, company: str, job_id: str) -> bool:
+        ids = self.companies.get(company)
+        return ids is not None and job_id in ids
+    
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.companies.values())
+    
+    def export(self) -> Dict[str, List[str]]:
+        """All IDs per company in the known_jobs.json format."""
+        return {company: list(ids) for company, ids in self.companies.items()}
+
+def encode_index(data: Dict[str, Iterable[Any]], tag: str = '') -> Tuple[bytes, int]:
+    """Encode job IDs per company into the binary index format.
+    
+    Args:
+        data: Mapping of company to job IDs, as in known_jobs.json
+        tag: Version of the data, stored in the header
+    
+    Returns:
+        Tuple of (encoded index, number of duplicate IDs dropped).
+    """
+    writer = SectionWriter()
+    layout: Dict[str, List[int]] = {}
+    duplicates = 0
+    
+    for company, job_ids in data.items():
+        ints = set()
+        strings = set()
+        total = 0
+        for job_id in job_ids:
+            job_id = str(job_id)
+            total += 1
+            value = as_int_id(job_id)
+            if value is not None:
+                ints.add(value)
+            else:
+                strings.add(job_id.encode())
+        duplicates += total - len(ints) - len(strings)
+        
+        sorted_strings = sorted(strings)
+        offsets = array.array('Q', [0])
+        for value in sorted_strings:
+            offsets.append(offsets[-1] + len(value))
+        
+        ints_at, _ = writer.add(array.array('Q', sorted(ints)).tobytes())
+        offsets_at, _ = writer.add(offsets.tobytes())
+        data_at, _ = writer.add(b''.join(sorted_strings))
+        layout[company] = [ints_at, len(ints), offsets_at, len(sorted_strings), data_at, offsets[-1]]
+    
+    return writer.encode(MAGIC, {'tag': tag, 'companies': layout}), duplicates
+
+def write_index(path: str, data: Dict[str, Iterable[Any]], tag: str = '') -> IdIndex:
+    """Build an index file and open it.
+    
+    Without a path, or if the file cannot be written, the index is kept in
+    memory instead.
+    
+    Args:
+        path: Index file path (empty = memory only)
+        data: Mapping of company to job IDs
+        tag: Version of the data, compared on the next load
+    
+    Returns:
+        Opened index.
+    """
+    content, duplicates = encode_index(data, tag)
+    if duplicates:
+        logger.info(f"Dropped {duplicates} duplicate job IDs from storage")
+    return write_mapped(path, content, IdIndex.from_buffer, 'job ID index')
+
+def _main(argv: List[str]) -> int:
+    if len(argv) == 3 and argv[0] == 'build':
+        with open(argv[1], encoding='utf-8') as f:
+            index = write_index(argv[2], json.load(f))
+        print(f"Wrote {len(index)} job IDs to {argv[2]}")
+        return 0
+    if len(argv) == 2 and argv[0] == 'export':
+        index = IdIndex.open(argv[1])
+        if index is None:
+            print(f"Cannot read job ID index {argv[1]}", file=sys.stderr)
+            return 1
+        json.dump(index.export(), sys.stdout, separators=(',', ':'))
+        return 0
+    print("Usage: python -m utils.id_index build <known_jobs.json> <index> | export <index>", file=sys.stderr)
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
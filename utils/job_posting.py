@@ -0,0 +1,43 @@
+"""
+Normalized job posting record shared by all scrapers.
+"""
+from typing import Any, List, Optional, Tuple
+
+class JobPosting:
+    """A single job posting as produced by a scraper.
+    
+    Uses __slots__ since scrapers create one per search hit, while only
+    the new ones are ever rendered into Discord embeds.
+    """
+    
+    __slots__ = ('company', 'job_id', 'title', 'url', 'location', 'team', 'posted_at', 'fields')
+    
+    def __init__(
+        self,
+        company: str,
+        job_id: str,
+        title: str,
+        url: str,
+        location: Optional[str] = None,
+        team: Optional[str] = None,
+        posted_at: Optional[int] = None,
+        fields: Optional[List[Tuple[str, str]]] = None
+    ):
+        self.company = company
+        # IDs are stored as strings, some APIs return them as integers
+        self.job_id = str(job_id)
+        self.title = title
+        self.url = url
+        self.location = location
+        self.team = team
+        # Unix timestamp of posting or last update, if known
+        self.posted_at = posted_at
+        # Company specific (name, value) embed fields, in display order
+        self.fields = fields or []
+    
+    def __repr__(self) -> str:
+        return f'JobPosting({self.company!r}, {self.job_id!r}, {self.title!r})'
+
+def discord_timestamp(timestamp: Any) -> str:
+    """Format a Unix timestamp as absolute and relative Discord time."""
+    return f'<t:{timestamp}:f> | <t:{timestamp}:R>'
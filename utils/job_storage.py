@@ -1,69 +1,176 @@
 """
-Job storage module for tracking known jobs using GitHub API.
+Job storage module for tracking known jobs.
 Manages job IDs across multiple companies to detect new postings.
+Persistence is delegated to a pluggable backend (GitHub or SQLite). Known
+IDs are looked up in a memory-mapped binary index (see utils.id_index).
+New IDs whose posting duplicates a recently notified one are recognized as
+reposts by their title, team and location (see utils.similarity).
+After each complete fetch the job IDs of a company are compared with its
+open postings, which records when each posting was first and last seen;
+IDs whose posting closed more than JOB_RETENTION_DAYS ago are evicted.
 """
-import requests
-import json
-import base64
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from config import GITHUB_STORAGE_URL, GITHUB_TOKEN, REQUEST_TIMEOUT
+from config import (
+    CHANGE_HISTORY_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_AGE_HOURS, ID_INDEX_PATH, JOB_RETENTION_DAYS,
+    SIMILARITY_THRESHOLD, SIMILARITY_WINDOW_DAYS, SIMILARITY_SCAN_LIMIT, SIMILARITY_INDEX_PATH
+)
+from utils.id_index import IdIndex
+from utils.job_posting import JobPosting
+from utils.similarity import Record, RepostIndex, load_repost_index
+from utils.storage_backends import StorageBackend, create_backend
 
 logger = logging.getLogger(__name__)
 
 class JobStorage:
-    """Manages job storage using GitHub API."""
+    """Manages job storage on top of a storage backend."""
     
-    def __init__(self):
-        self.content: Dict[str, List[str]] = {}
-        self.old_content: Dict[str, List[str]] = {}
-        self.sha: Optional[str] = None
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        index_path: str = ID_INDEX_PATH,
+        similarity_path: str = SIMILARITY_INDEX_PATH
+    ):
+        self.backend = backend if backend is not None else create_backend()
+        self.index_path = index_path
+        self.similarity_path = similarity_path
+        # Memory-mapped index of the stored job IDs
+        self.known = IdIndex()
+        # Known job IDs that are not in the index: stored deltas and IDs added since loading
+        self.index: Dict[str, Set[str]] = {}
+        # Job IDs added during this run, per company
+        self.added: Dict[str, List[str]] = {}
+        # Jobs detected as new but not delivered yet, keyed by outbox_key()
+        self.outbox: Dict[str, Dict[str, Any]] = {}
+        self.outbox_changed = False
+        # Unix timestamps of checks that found new job IDs, per company
+        self.history: Dict[str, List[float]] = {}
+        self.history_changed = False
+        self.history_loaded = False
+        # Recently notified postings, searched for the originals of reposts
+        self.reposts = RepostIndex(threshold=SIMILARITY_THRESHOLD, scan_limit=SIMILARITY_SCAN_LIMIT)
+        # Postings notified during this run, per company
+        self.postings_added: Dict[str, List[Record]] = {}
+        # Company and record of indexed postings whose notification is not delivered yet, by outbox key
+        self.postings_pending: Dict[str, Tuple[str, Record]] = {}
+        self.postings_loaded = False
+        # Lifecycle data per company, see utils.storage_backends
+        self.lifecycle: Dict[str, Dict[str, Any]] = {}
+        # Job IDs whose lifecycle data changed since the last save, per company
+        self.lifecycle_changed: Dict[str, Set[str]] = {}
+        self.lifecycle_loaded = False
+        # Evicted job IDs that are still in the index, per company
+        self.evicted: Dict[str, Set[str]] = {}
+        # Job IDs evicted since the last save, per company
+        self.removed: Dict[str, Set[str]] = {}
         self.loaded = False
+        self._lock = threading.Lock()
     
     def load(self) -> bool:
-        """Load job data from GitHub repository.
+        """Load job data from the storage backend.
         
         Returns:
             True if successful, False otherwise.
         """
-        try:
-            r = requests.get(
-                GITHUB_STORAGE_URL,
-                headers={
-                    'Authorization': f'Bearer {GITHUB_TOKEN}',
-                    'Accept': 'application/vnd.github.v3+json'
-                },
-                timeout=REQUEST_TIMEOUT
-            )
-            r.raise_for_status()
-            
-            response_data = r.json()
-            content_str = base64.b64decode(response_data['content'].encode()).decode()
-            self.content = json.loads(content_str)
-            self.old_content = json.loads(content_str)
-            self.sha = response_data['sha']
-            self.loaded = True
-            
-            logger.info(f"Loaded job storage from GitHub (SHA: {self.sha[:7]})")
-            return True
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to load job storage from GitHub: {e}")
+        loaded = self.backend.load_index(self.index_path)
+        if loaded is None:
             return False
-        except (ValueError, KeyError) as e:
-            logger.error(f"Failed to parse job storage data: {e}")
+        
+        outbox = self.backend.load_outbox()
+        if outbox is None:
             return False
+        
+        # The change history only tunes polling, so running without it is fine
+        history = self.backend.load_history()
+        self.history = history or {}
+        self.history_changed = False
+        self.history_loaded = history is not None
+        
+        # Repost detection only saves duplicate notifications, so running without it is fine
+        if SIMILARITY_THRESHOLD > 0:
+            postings = self.backend.load_postings()
+            self.postings_loaded = postings is not None
+            self.reposts = load_repost_index(
+                self.similarity_path, postings or {}, self._similarity_since(), SIMILARITY_THRESHOLD,
+                SIMILARITY_SCAN_LIMIT
+            )
+        self.postings_added = {}
+        self.postings_pending = {}
+        
+        # Without lifecycle data IDs are just never evicted
+        lifecycle = self.backend.load_lifecycle()
+        self.lifecycle = lifecycle or {}
+        self.lifecycle_changed = {}
+        self.lifecycle_loaded = lifecycle is not None
+        
+        self._build_index(*loaded)
+        self.outbox = outbox
+        self.outbox_changed = False
+        self.loaded = True
+        
+        if outbox:
+            logger.info(f"Loaded {len(outbox)} undelivered jobs from outbox")
+        return True
+    
+    def _build_index(self, known: IdIndex, extra: Dict[str, List[Any]]) -> None:
+        """Set the loaded index and the stored IDs missing from it.
+        
+        Args:
+            known: Index of the stored job IDs
+            extra: Further stored job IDs per company, e.g. delta segments
+        """
+        self.known = known
+        self.index = {}
+        self.added = {}
+        self.evicted = {}
+        self.removed = {}
+        
+        for company, job_ids in extra.items():
+            ids = {str(job_id) for job_id in job_ids}
+            self.index[company] = {job_id for job_id in ids if not known.contains(company, job_id)}
+        
+        extra_count = sum(len(ids) for ids in self.index.values())
+        logger.info(f"Job ID index holds {len(known)} IDs, {extra_count} more in deltas")
+    
+    def _is_known(self, company: str, job_id: str) -> bool:
+        """Check the index and the IDs outside it. Caller must hold the lock."""
+        if job_id in self.index.get(company, ()):
+            return True
+        return self.known.contains(company, job_id) and job_id not in self.evicted.get(company, ())
+    
+    def _known_ids(self, company: str) -> Set[str]:
+        """All known job IDs of a company. Caller must hold the lock."""
+        ids = set(self.known.get(company) or ())
+        ids -= self.evicted.get(company, set())
+        ids |= self.index.get(company, set())
+        return ids
+    
+    def export(self) -> Dict[str, List[str]]:
+        """Get all known job IDs per company in the known_jobs.json format."""
+        with self._lock:
+            content = self.known.export()
+            for company, job_ids in self.evicted.items():
+                if job_ids and company in content:
+                    content[company] = [job_id for job_id in content[company] if job_id not in job_ids]
+            for company, job_ids in self.index.items():
+                content.setdefault(company, []).extend(sorted(job_ids))
+        return content
     
     def is_new_job(self, company: str, job_id: str) -> bool:
-        """Check if a job is new and add it to storage.
+        """Check if a job is new and reserve it in the outbox.
+        
+        The job is only added to the known jobs once its notification was
+        delivered or given up on, see mark_delivered() and mark_failed().
         
         Args:
             company: Company identifier (e.g., 'amazon', 'microsoft')
             job_id: Unique job identifier
             
         Returns:
-            True if job is new, False if already exists.
+            True if job is new, False if already known or pending delivery.
         """
         if not self.loaded:
             logger.warning("Job storage not loaded, attempting to load now")
@@ -71,16 +178,317 @@ class JobStorage:
                 logger.error("Cannot check if job is new - storage not loaded")
                 return False
         
-        if company not in self.content:
-            self.content[company] = []
+        # IDs are stored as strings, some APIs return them as integers
+        job_id = str(job_id)
         
-        if job_id in self.content[company]:
-            return False
+        # Scrapers run concurrently, so check-and-mark must be atomic
+        with self._lock:
+            if not self._reserve(company, job_id):
+                return False
+            self._record_change(company)
         
-        self.content[company].append(job_id)
         logger.debug(f"Marked {company} job {job_id} as new")
         return True
     
+    def new_job_ids(self, company: str, job_ids: Iterable[Any]) -> List[str]:
+        """Check a whole batch of job IDs and reserve the new ones.
+        
+        Args:
+            company: Company identifier (e.g., 'amazon', 'microsoft')
+            job_ids: Job identifiers seen in this fetch
+            
+        Returns:
+            New job IDs, as strings, in the order they were given.
+        """
+        if not self.loaded:
+            logger.warning("Job storage not loaded, attempting to load now")
+            if not self.load():
+                logger.error("Cannot check for new jobs - storage not loaded")
+                return []
+        
+        ids = list(dict.fromkeys(str(job_id) for job_id in job_ids))
+        with self._lock:
+            new_ids = [job_id for job_id in ids if self._reserve(company, job_id)]
+            if new_ids:
+                self._record_change(company)
+        
+        logger.debug(f"{company}: {len(new_ids)} of {len(ids)} job IDs are new")
+        return new_ids
+    
+    def _reserve(self, company: str, job_id: str) -> bool:
+        """Reserve a job in the outbox if it is new. Caller must hold the lock."""
+        key = outbox_key(company, job_id)
+        if key in self.outbox or self._is_known(company, job_id):
+            return False
+        
+        self.outbox[key] = {
+            'company': company,
+            'job_id': job_id,
+            'payload': None,
+            'attempts': 0
+        }
+        self.outbox_changed = True
+        return True
+    
+    def update_lifecycle(self, company: str, job_ids: Optional[Iterable[Any]]) -> Tuple[Set[str], Set[str]]:
+        """Compare all job IDs of a complete fetch with the open postings of a company.
+        
+        IDs missing from the fetch close with the time of the previous check
+        as their last_seen; closed IDs that show up again reopen with their
+        original first_seen. Known IDs closed before JOB_RETENTION_DAYS are
+        evicted, in daily steps so that a backend that has to rewrite its
+        data to drop IDs does so at most once a day. On the first check of a
+        company, known IDs missing from it are closed now, with an unknown
+        first_seen, and are not reported.
+        
+        Args:
+            company: Company identifier (e.g., 'amazon', 'microsoft')
+            job_ids: Every job ID the fetch returned, or None if the fetch
+                found the listing unchanged since the last run
+        
+        Returns:
+            Tuple of (opened job IDs, closed job IDs).
+        """
+        if not self.lifecycle_loaded:
+            return set(), set()
+        
+        now = int(time.time())
+        seen = {str(job_id) for job_id in job_ids} if job_ids is not None else None
+        with self._lock:
+            state = self.lifecycle.get(company)
+            if seen is None:
+                if state is None:
+                    return set(), set()
+                seen = set(state['open'])
+            changed = self.lifecycle_changed.setdefault(company, set())
+            first_check = state is None
+            if first_check:
+                state = self.lifecycle[company] = {'checked_at': now, 'open': {}, 'closed': {}}
+                for job_id in self._known_ids(company) - seen:
+                    state['closed'][job_id] = [None, now]
+                changed.update(state['closed'])
+            
+            open_ids: Dict[str, Any] = state['open']
+            closed_ids: Dict[str, List[Any]] = state['closed']
+            opened = seen - open_ids.keys()
+            closed = open_ids.keys() - seen
+            added = set(self.added.get(company, ())) if first_check else set()
+            for job_id in opened:
+                if job_id in closed_ids:
+                    open_ids[job_id] = closed_ids.pop(job_id)[0]
+                elif first_check and job_id not in added and self._is_known(company, job_id):
+                    # IDs known before tracking started have an unknown first_seen
+                    open_ids[job_id] = None
+                else:
+                    open_ids[job_id] = now
+            for job_id in closed:
+                closed_ids[job_id] = [open_ids.pop(job_id), state['checked_at']]
+            state['checked_at'] = now
+            changed |= opened
+            changed |= closed
+            
+            if JOB_RETENTION_DAYS > 0:
+                cutoff = int(now - JOB_RETENTION_DAYS * 86400) // 86400 * 86400
+                expired = [job_id for job_id, (_, last_seen) in closed_ids.items() if last_seen < cutoff]
+                for job_id in expired:
+                    del closed_ids[job_id]
+                    self._evict(company, job_id)
+                changed.update(expired)
+                if expired:
+                    logger.info(f"{company}: evicted {len(expired)} job IDs closed for over {JOB_RETENTION_DAYS:g} days")
+            
+            if first_check:
+                opened = {job_id for job_id in opened if open_ids[job_id] is not None}
+        return opened, closed
+    
+    def _evict(self, company: str, job_id: str) -> None:
+        """Drop a known job ID. Caller must hold the lock."""
+        ids = self.index.get(company)
+        if ids is not None:
+            ids.discard(job_id)
+        if self.known.contains(company, job_id):
+            self.evicted.setdefault(company, set()).add(job_id)
+        self.removed.setdefault(company, set()).add(job_id)
+    
+    def _similarity_since(self) -> float:
+        """Unix timestamp of the oldest notified posting a new one is compared with."""
+        return time.time() - SIMILARITY_WINDOW_DAYS * 86400
+    
+    def collapse_duplicates(
+        self,
+        company: str,
+        postings: List[JobPosting]
+    ) -> List[Tuple[JobPosting, List[JobPosting]]]:
+        """Group new postings that are near-duplicates and drop reposts.
+        
+        A posting similar to one notified within SIMILARITY_WINDOW_DAYS in an
+        earlier batch is a repost. A posting similar to an earlier one of the
+        same batch, e.g. the same role in another location, is collapsed into
+        its notification. Both are committed as known right away instead of
+        being notified.
+        
+        Args:
+            company: Company identifier (e.g., 'amazon', 'microsoft')
+            postings: Postings reported new by new_job_ids()
+        
+        Returns:
+            List of (posting to notify, its collapsed near-duplicates).
+        """
+        if SIMILARITY_THRESHOLD <= 0:
+            return [(posting, []) for posting in postings]
+        
+        now = int(time.time())
+        since = self._similarity_since()
+        groups: Dict[str, Tuple[JobPosting, List[JobPosting]]] = {}
+        with self._lock:
+            for posting in postings:
+                original = self.reposts.find(company, posting, since)
+                if original is None:
+                    groups[posting.job_id] = (posting, [])
+                    record = [posting.job_id, posting.title, posting.team, posting.location, now]
+                    # Indexed right away so later postings of this run collapse into it,
+                    # but only stored once its notification is delivered
+                    self.reposts.add(company, record)
+                    self.postings_pending[outbox_key(company, posting.job_id)] = (company, record)
+                    continue
+                
+                if original in groups:
+                    groups[original][1].append(posting)
+                else:
+                    logger.info(f"{company} job {posting.job_id} is a repost of {original}, not notifying")
+                self._release(company, posting.job_id)
+        return list(groups.values())
+    
+    def _release(self, company: str, job_id: str) -> None:
+        """Commit a reserved job without notifying it. Caller must hold the lock."""
+        if self.outbox.pop(outbox_key(company, job_id), None) is not None:
+            self.outbox_changed = True
+        self._commit(company, job_id)
+    
+    def _record_change(self, company: str) -> None:
+        """Record that new job IDs appeared now. Caller must hold the lock."""
+        now = int(time.time())
+        times = self.history.setdefault(company, [])
+        if times and times[-1] >= now:
+            return
+        times.append(now)
+        del times[:-CHANGE_HISTORY_SIZE]
+        self.history_changed = True
+    
+    def change_history(self, company: str) -> List[float]:
+        """Get the Unix timestamps at which new job IDs of a company appeared.
+        
+        Returns:
+            Ascending timestamps, at most CHANGE_HISTORY_SIZE of them.
+        """
+        with self._lock:
+            return list(self.history.get(company, ()))
+    
+    def enqueue(self, company: str, job_id: str, payload: Dict[str, Any]) -> str:
+        """Attach the webhook payload to a job reserved by is_new_job().
+        
+        Args:
+            company: Company identifier (e.g., 'amazon', 'microsoft')
+            job_id: Unique job identifier
+            payload: Discord webhook payload with embed data
+            
+        Returns:
+            Outbox key of the job.
+        """
+        job_id = str(job_id)
+        key = outbox_key(company, job_id)
+        with self._lock:
+            entry = self.outbox.setdefault(key, {'company': company, 'job_id': job_id, 'attempts': 0})
+            entry['payload'] = payload
+            self.outbox_changed = True
+        return key
+    
+    def pending(self) -> List[Dict[str, Any]]:
+        """Get outbox entries that have a payload waiting for delivery."""
+        with self._lock:
+            return [entry for entry in self.outbox.values() if entry.get('payload')]
+    
+    def _forget_posting(self, key: str) -> None:
+        """Remove an undelivered posting from repost detection. Caller must hold the lock."""
+        pending = self.postings_pending.pop(key, None)
+        if pending is not None:
+            self.reposts.remove(*pending)
+    
+    def drop_unqueued(self) -> Set[str]:
+        """Drop reserved jobs that never got a payload.
+        
+        A job reported new stays reserved until its notification is queued.
+        If its source ran out of time or rendering failed, that never
+        happens; dropping the reservation lets the next fetch detect the
+        job again instead of blocking it until a restart.
+        
+        Returns:
+            Companies whose jobs were dropped.
+        """
+        companies = set()
+        with self._lock:
+            keys = [key for key, entry in self.outbox.items() if not entry.get('payload')]
+            for key in keys:
+                entry = self.outbox.pop(key)
+                company = entry['company']
+                companies.add(company)
+                # The posting was never notified, so later ones are no reposts of it
+                self._forget_posting(key)
+        if keys:
+            logger.warning(f"Dropped {len(keys)} new jobs that were never queued, they are detected again next run")
+        return companies
+    
+    def _commit(self, company: str, job_id: str) -> None:
+        """Add a job to the known jobs. Caller must hold the lock."""
+        if self._is_known(company, job_id):
+            return
+        self.removed.get(company, set()).discard(job_id)
+        self.index.setdefault(company, set()).add(job_id)
+        self.added.setdefault(company, []).append(job_id)
+    
+    def mark_delivered(self, keys: Iterable[str]) -> None:
+        """Remove delivered jobs from the outbox and add them to known jobs.
+        
+        Their postings are stored for repost detection. Postings of jobs
+        delivered after a restart were not indexed in this process and are
+        not stored.
+        """
+        with self._lock:
+            for key in keys:
+                entry = self.outbox.pop(key, None)
+                if entry is not None:
+                    self._commit(entry['company'], entry['job_id'])
+                    self.outbox_changed = True
+                pending = self.postings_pending.pop(key, None)
+                if pending is not None:
+                    self.postings_added.setdefault(pending[0], []).append(pending[1])
+    
+    def mark_failed(self, keys: Iterable[str]) -> None:
+        """Record a failed delivery.
+        
+        A job is given up on after OUTBOX_MAX_ATTEMPTS failed runs, but not
+        before OUTBOX_MAX_AGE_HOURS have passed since its first failure.
+        """
+        now = int(time.time())
+        with self._lock:
+            for key in keys:
+                entry = self.outbox.get(key)
+                if entry is None:
+                    continue
+                entry['attempts'] = entry.get('attempts', 0) + 1
+                # Entries stored before failures were timed count from now
+                first_failed_at = entry.setdefault('first_failed_at', now)
+                self.outbox_changed = True
+                
+                if entry['attempts'] >= OUTBOX_MAX_ATTEMPTS and now - first_failed_at >= OUTBOX_MAX_AGE_HOURS * 3600:
+                    logger.error(
+                        f"Giving up on {entry['company']} job {entry['job_id']} after {entry['attempts']} "
+                        f"failed deliveries over {(now - first_failed_at) / 3600:.1f} hours"
+                    )
+                    del self.outbox[key]
+                    self._commit(entry['company'], entry['job_id'])
+                    self._forget_posting(key)
+    
     def has_changes(self) -> bool:
         """Check if there are any changes compared to original content.
         
@@ -90,16 +498,10 @@ class JobStorage:
         if not self.loaded:
             return False
         
-        for company in self.content:
-            if company not in self.old_content:
-                return True
-            for job_id in self.content[company]:
-                if job_id not in self.old_content[company]:
-                    return True
-        return False
+        return any(self.added.values())
     
     def save(self) -> bool:
-        """Save updated job data to GitHub repository.
+        """Save updated job data and the outbox to the storage backend.
         
         Returns:
             True if successful or no changes, False if error occurred.
@@ -108,52 +510,123 @@ class JobStorage:
             logger.error("Cannot save - storage not loaded")
             return False
         
-        if not self.has_changes():
+        if (not self.has_changes() and not self.outbox_changed and not self.history_changed
+                and not any(self.postings_added.values()) and not any(self.removed.values())
+                and not any(self.lifecycle_changed.values())):
             logger.info("No changes to save")
             return True
         
-        try:
-            content_json = json.dumps(self.content, indent=2)
-            content_b64 = base64.b64encode(content_json.encode()).decode()
-            
-            r = requests.put(
-                GITHUB_STORAGE_URL,
-                headers={
-                    'Authorization': f'Bearer {GITHUB_TOKEN}',
-                    'Accept': 'application/vnd.github+json',
-                    'X-GitHub-Api-Version': '2022-11-28',
-                },
-                json={
-                    'message': 'Daily data update',
-                    'committer': {
-                        'name': 'Auto Data Updater | by wiestju',
-                        'email': 'b267a@protonmail.com'
-                    },
-                    'content': content_b64,
-                    'sha': self.sha
-                },
-                timeout=REQUEST_TIMEOUT
-            )
-            r.raise_for_status()
-            
-            logger.info("Successfully saved job storage to GitHub")
-            return True
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to save job storage to GitHub: {e}")
-            return False
+        with self._lock:
+            added = self.added
+            self.added = {}
+            # Jobs without a payload were never queued, see drop_unqueued()
+            outbox = {key: dict(entry) for key, entry in self.outbox.items() if entry.get('payload')}
+            self.outbox_changed = False
+            history = {company: list(times) for company, times in self.history.items()}
+            save_history = self.history_changed and self.history_loaded
+            self.history_changed = False
+            postings = self.postings_added
+            self.postings_added = {}
+            removed = {company: sorted(job_ids) for company, job_ids in self.removed.items() if job_ids}
+            self.removed = {}
+            lifecycle_changed = {company: job_ids for company, job_ids in self.lifecycle_changed.items() if job_ids}
+            self.lifecycle_changed = {}
+            lifecycle = {
+                company: {'checked_at': state['checked_at'], 'open': dict(state['open']), 'closed': dict(state['closed'])}
+                for company, state in self.lifecycle.items()
+            } if lifecycle_changed else {}
+        
+        success = True
+        ids_saved = True
+        if (any(added.values()) or removed) and not self.backend.save(self.export, added, removed):
+            # Keep the delta so a later save can retry it
+            with self._lock:
+                for company, job_ids in added.items():
+                    self.added.setdefault(company, [])[:0] = job_ids
+                for company, job_ids in removed.items():
+                    self.removed.setdefault(company, set()).update(
+                        job_id for job_id in job_ids if not self._is_known(company, job_id)
+                    )
+            ids_saved = False
+            success = False
+        
+        # Evicted IDs must not lose their lifecycle data while they are still stored
+        if lifecycle_changed and (not ids_saved or not self.backend.save_lifecycle(lifecycle, lifecycle_changed)):
+            with self._lock:
+                for company, job_ids in lifecycle_changed.items():
+                    self.lifecycle_changed.setdefault(company, set()).update(job_ids)
+            success = False
+        
+        if not self.backend.save_outbox(outbox):
+            self.outbox_changed = True
+            success = False
+        
+        # Without the stored history loaded, saving would overwrite it
+        if save_history and not self.backend.save_history(history):
+            self.history_changed = True
+            success = False
+        
+        # Likewise for the notified postings; they stay in the repost index of this run
+        if self.postings_loaded and any(postings.values()):
+            if not self.backend.save_postings(postings, self._similarity_since()):
+                with self._lock:
+                    for company, records in postings.items():
+                        self.postings_added.setdefault(company, [])[:0] = records
+                success = False
+        
+        return success
+
+def outbox_key(company: str, job_id: str) -> str:
+    """Build the idempotency key of a job notification."""
+    return f'{company}:{job_id}'
 
 # Global storage instance
 _storage = JobStorage()
 
 def load_job_storage() -> bool:
-    """Load job storage from GitHub. Must be called before other functions."""
+    """Load job storage. Must be called before other functions."""
     return _storage.load()
 
 def is_new_job(company: str, job_id: str) -> bool:
     """Check if a job is new."""
     return _storage.is_new_job(company, job_id)
 
+def new_job_ids(company: str, job_ids: Iterable[Any]) -> List[str]:
+    """Get the new job IDs of a batch."""
+    return _storage.new_job_ids(company, job_ids)
+
+def collapse_duplicates(company: str, postings: List[JobPosting]) -> List[Tuple[JobPosting, List[JobPosting]]]:
+    """Group new postings with their near-duplicates and drop reposts."""
+    return _storage.collapse_duplicates(company, postings)
+
+def update_lifecycle(company: str, job_ids: Optional[Iterable[Any]]) -> Tuple[Set[str], Set[str]]:
+    """Record the job IDs of a complete fetch and get the opened and closed ones."""
+    return _storage.update_lifecycle(company, job_ids)
+
+def change_history(company: str) -> List[float]:
+    """Get the times at which new job IDs of a company appeared."""
+    return _storage.change_history(company)
+
+def enqueue_job(company: str, job_id: str, payload: Dict[str, Any]) -> str:
+    """Attach the webhook payload to a new job in the outbox."""
+    return _storage.enqueue(company, job_id, payload)
+
+def pending_jobs() -> List[Dict[str, Any]]:
+    """Get outbox entries waiting for delivery."""
+    return _storage.pending()
+
+def drop_unqueued_jobs() -> Set[str]:
+    """Drop reserved jobs whose notification was never queued."""
+    return _storage.drop_unqueued()
+
+def mark_delivered(keys: Iterable[str]) -> None:
+    """Commit jobs whose notification was delivered."""
+    _storage.mark_delivered(keys)
+
+def mark_failed(keys: Iterable[str]) -> None:
+    """Record jobs whose notification could not be delivered."""
+    _storage.mark_failed(keys)
+
 def update_job_storage() -> bool:
-    """Save updated job storage to GitHub."""
+    """Save updated job storage."""
     return _storage.save()
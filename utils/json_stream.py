@@ -0,0 +1,227 @@
+"""
+Incremental extraction of values from large JSON documents.
+Search APIs send their hits together with facet counts and other metadata
+that can be much larger than the hits themselves. select() reads a document
+chunk by chunk as it arrives and only decodes the values at the requested
+paths: lists there are decoded one element at a time, everything else is
+skipped by scanning for the end of the value, without building it. Reading
+stops once all paths were found. Whole documents are parsed with orjson
+when it is installed.
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, List, Sequence, Set, Tuple
+
+# Keys leading from the document root to a value, e.g. ('data', 'positions')
+Path = Tuple[str, ...]
+
+# Whole documents are parsed by orjson when it is installed
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Siblings inside a container that are scalars, strings or containers
+# nested at most two levels deep, like facet lists and most job entries.
+# Matching a run of them in one go keeps skipping out of the Python loop.
+_PLAIN = r'[^"\[\]{}]*'
+_FLAT = rf'{_PLAIN}(?:{_STRING.pattern}{_PLAIN})*'
+_NESTED = rf'{_PLAIN}(?:(?:{_STRING.pattern}|\[{_FLAT}\]|\{{{_FLAT}\}}){_PLAIN})*'
+_SIBLINGS = re.compile(rf'{_PLAIN}(?:(?:{_STRING.pattern}|\[{_NESTED}\]|\{{{_NESTED}\}}){_PLAIN})*', re.DOTALL)
+# Separator after a list element
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])')
+# End of a number or literal
+_DELIMITER = re.compile(r'[,\]}\s]')
+
+class _Scanner:
+    """Pull parser over a JSON document that arrives in byte chunks."""
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+    
+    def more(self) -> bool:
+        """Append the next chunk and drop the consumed part of the buffer.
+        
+        Returns:
+            False at the end of the document.
+        """
+        while True:
+            chunk = next(self.chunks, None)
+            text = self.decoder.decode(chunk or b'', final=chunk is None)
+            if text:
+                break
+            if chunk is None:
+                return False
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.more():
+                raise ValueError("JSON document ends unexpectedly")
+    
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in JSON document, found '{found}'")
+        self.pos += 1
+    
+    def string(self) -> str:
+        if self.peek() != '"':
+            raise ValueError(f"Expected a string in JSON document, found '{self.buffer[self.pos]}'")
+        while True:
+            match = _STRING.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                text = match.group()
+                return text[1:-1] if '\\' not in text else json.loads(text)
+            if not self.more():
+                raise ValueError("Unterminated string in JSON document")
+    
+    def value(self) -> Any:
+        """Decode the next value."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # A number cut off by the end of the buffer continues in the next chunk
+            if type(value) in (int, float) and not _DELIMITER.match(self.buffer, end) and self.more():
+                continue
+            self.pos = end
+            return value
+    
+    def elements(self) -> List[Any]:
+        """Decode the next list, one element at a time unless it is already complete in the buffer."""
+        self.expect('[')
+        try:
+            items, self.pos = _decoder.raw_decode(self.buffer, self.pos - 1)
+            return items
+        except json.JSONDecodeError:
+            items = []
+        
+        if self.peek() == ']':
+            self.pos += 1
+            return items
+        while True:
+            items.append(self.value())
+            match = _SEPARATOR.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                char = match.group(1)
+            else:
+                char = self.peek()
+                self.pos += 1
+            if char == ']':
+                return items
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON document, found '{char}'")
+    
+    def skip(self) -> None:
+        """Consume the next value without decoding it.
+        
+        Only strings and the nesting of brackets are checked.
+        """
+        char = self.peek()
+        if char == '"':
+            self.string()
+            return
+        if char not in '[{':
+            while True:
+                match = _DELIMITER.search(self.buffer, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                if not self.more():
+                    self.pos = len(self.buffer)
+                    return
+        
+        depth = 1
+        self.pos += 1
+        while True:
+            self.pos = _SIBLINGS.match(self.buffer, self.pos).end()
+            if self.pos == len(self.buffer) or self.buffer[self.pos] == '"':
+                # Keep an unterminated string in the buffer until it is complete
+                if not self.more():
+                    raise ValueError("JSON document ends unexpectedly")
+                continue
+            char = self.buffer[self.pos]
+            self.pos += 1
+            if char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+def select(chunks: Iterable[bytes], paths: Sequence[Path]) -> List[Any]:
+    """Decode the values at some paths of a JSON document.
+    
+    Paths lead through object keys only. The chunks are read only until all
+    values were found, so a caller that needs the rest of the document (e.g.
+    to hash it) has to drain them.
+    
+    Args:
+        chunks: The document in pieces, e.g. from Response.iter_content()
+        paths: Keys leading to each wanted value
+    
+    Returns:
+        Value at each path, or None where the document has none.
+    
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    scanner = _Scanner(chunks)
+    index = {path: i for i, path in enumerate(paths)}
+    # Paths of the objects that contain a wanted value
+    parents: Set[Path] = {path[:n] for path in paths for n in range(len(path))}
+    results: List[Any] = [None] * len(paths)
+    remaining = len(index)
+    
+    def walk(path: Path) -> None:
+        nonlocal remaining
+        char = scanner.peek()
+        if path in index:
+            results[index[path]] = scanner.elements() if char == '[' else scanner.value()
+            remaining -= 1
+            return
+        if char != '{' or path not in parents:
+            scanner.skip()
+            return
+        
+        scanner.pos += 1
+        if scanner.peek() == '}':
+            scanner.pos += 1
+            return
+        while remaining:
+            key = scanner.string()
+            scanner.expect(':')
+            walk(path + (key,))
+            if not remaining:
+                return
+            char = scanner.peek()
+            scanner.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON document, found '{char}'")
+    
+    if remaining:
+        walk(())
+    return results
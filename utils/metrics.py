@@ -0,0 +1,225 @@
+"""
+Lightweight run metrics.
+Collects counters and stage timers, labeled by source, host or status,
+and exports them as a JSON run report or in the Prometheus text format.
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Metric name plus sorted (label, value) pairs
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Prefix of all exported Prometheus metric names
+PROMETHEUS_PREFIX = 'bigtech'
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items() if value is not None))
+
+def _labels_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Format labels as {name="value",...}, escaping the values."""
+    if not labels:
+        return ''
+    pairs = (
+        '{}="{}"'.format(label, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in labels
+    )
+    return '{' + ','.join(pairs) + '}'
+
+class Metrics:
+    """Thread-safe store of counters and stage timers."""
+    
+    def __init__(self):
+        self.started = time.time()
+        # Counter key -> value
+        self.counters: Dict[MetricKey, float] = {}
+        # Stage key -> [number of runs, total seconds]
+        self.timers: Dict[MetricKey, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def reset(self) -> None:
+        """Drop all recorded metrics and restart the clock."""
+        with self._lock:
+            self.started = time.time()
+            self.counters = {}
+            self.timers = {}
+    
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter.
+        
+        Args:
+            name: Counter name (e.g., 'http_requests')
+            value: Amount to add
+            **labels: Label values, None values are left out
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def observe(self, stage: str, seconds: float, **labels: Any) -> None:
+        """Record one run of a stage that took the given time."""
+        key = _key(stage, labels)
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+    
+    @contextmanager
+    def timer(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Time the enclosed block as one run of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+    
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        """Build a JSON-serializable report of all metrics.
+        
+        Args:
+            **extra: Additional top-level fields, e.g. run results
+        """
+        now = time.time()
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timers = sorted(self.timers.items())
+        
+        return {
+            'started_at': datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            'generated_at': datetime.datetime.fromtimestamp(now, datetime.timezone.utc).isoformat(),
+            'duration_seconds': round(now - self.started, 3),
+            **extra,
+            'stages': [
+                {'stage': name, 'labels': dict(labels), 'count': int(count), 'seconds': round(seconds, 6)}
+                for (name, labels), (count, seconds) in timers
+            ],
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters
+            ],
+        }
+    
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timers = sorted(self.timers.items())
+        
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f'{PROMETHEUS_PREFIX}_{name}_total'
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} counter')
+                typed.add(metric)
+            lines.append(f'{metric}{_labels_text(labels)} {value:g}')
+        
+        if timers:
+            metric = f'{PROMETHEUS_PREFIX}_stage_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            for (name, labels), (count, seconds) in timers:
+                text = _labels_text((('stage', name),) + labels)
+                lines.append(f'{metric}_sum{text} {seconds:.6f}')
+                lines.append(f'{metric}_count{text} {int(count)}')
+        
+        lines.append(f'{PROMETHEUS_PREFIX}_uptime_seconds {time.time() - self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+# Global metrics instance
+_metrics = Metrics()
+
+def reset() -> None:
+    """Drop all recorded metrics."""
+    _metrics.reset()
+
+def report(**extra: Any) -> Dict[str, Any]:
+    """Build a report of all metrics."""
+    return _metrics.report(**extra)
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    """Add to a counter."""
+    _metrics.incr(name, value, **labels)
+
+def observe(stage: str, seconds: float, **labels: Any) -> None:
+    """Record one run of a stage."""
+    _metrics.observe(stage, seconds, **labels)
+
+def timer(stage: str, **labels: Any):
+    """Time the enclosed block as one run of a stage."""
+    return _metrics.timer(stage, **labels)
+
+def record_http(method: str, url: str, status: int, elapsed: float, size: int) -> None:
+    """HTTP timing hook counting requests, statuses, bytes and time per host."""
+    host = urlsplit(url).netloc
+    _metrics.incr('http_requests', host=host, status=status)
+    _metrics.incr('http_bytes', size, host=host)
+    _metrics.observe('http', elapsed, host=host)
+
+def write_report(path: str, **extra: Any) -> bool:
+    """Write the JSON run report.
+    
+    Args:
+        path: Report file path
+        **extra: Additional top-level fields, e.g. run results
+    
+    Returns:
+        True if successful, False otherwise.
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_metrics.report(**extra), f, indent=2)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote run report to {path}")
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Failed to write run report: {e}")
+        return False
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = _metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"Metrics request: {format % args}")
+
+def start_metrics_server(port: int, host: str = '') -> Optional[ThreadingHTTPServer]:
+    """Serve the metrics at /metrics in Prometheus text format.
+    
+    Args:
+        port: TCP port to listen on
+        host: Interface to bind, all interfaces by default
+    
+    Returns:
+        Running server, or None if it could not be started.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"Failed to start metrics server on port {port}: {e}")
+        return None
+    
+    thread = threading.Thread(target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    logger.info(f"Serving Prometheus metrics on port {port} at /metrics")
+    return server
@@ -0,0 +1,62 @@
+"""
+Outbox module for reliable delivery of new job notifications.
+New jobs wait in the outbox until their webhook was delivered. Jobs that
+could not be delivered are retried on the next run, and only delivered
+(or given up) jobs are committed to the job storage.
+"""
+import logging
+from typing import List
+
+from utils.job_storage import enqueue_job, pending_jobs, mark_delivered, mark_failed, outbox_key
+from utils.job_posting import JobPosting
+from utils.webhook import WebhookBatcher, build_payload
+
+logger = logging.getLogger(__name__)
+
+def _record_delivery(keys: List[str], delivered: bool) -> None:
+    """Commit or reschedule the jobs of a sent webhook batch."""
+    if delivered:
+        mark_delivered(keys)
+    else:
+        mark_failed(keys)
+
+# Global batcher instance
+_batcher = WebhookBatcher(on_result=_record_delivery)
+
+def notify_new_job(posting: JobPosting) -> bool:
+    """Render and queue the notification of a job reported new by storage.
+    
+    Args:
+        posting: New job posting
+        
+    Returns:
+        True if queued, False if no webhook is configured for the company.
+    """
+    payload = build_payload(posting)
+    key = enqueue_job(posting.company, posting.job_id, payload)
+    if not _batcher.add(posting.company, payload, key):
+        mark_failed([key])
+        return False
+    return True
+
+def retry_outbox() -> int:
+    """Queue notifications left undelivered by earlier runs.
+    
+    Returns:
+        Number of notifications queued.
+    """
+    count = 0
+    for entry in pending_jobs():
+        key = outbox_key(entry['company'], entry['job_id'])
+        if _batcher.add(entry['company'], entry['payload'], key):
+            count += 1
+        else:
+            mark_failed([key])
+    
+    if count:
+        logger.info(f"Retrying {count} undelivered notifications from outbox")
+    return count
+
+def flush_outbox() -> bool:
+    """Send all queued notifications. Call once at the end of a run."""
+    return _batcher.flush()
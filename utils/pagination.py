@@ -0,0 +1,174 @@
+"""
+Pagination helper for paged JSON search APIs.
+Fetches the first page, works out the number of pages from the reported
+total, and fetches the remaining pages concurrently while items are
+already being processed. Pages whose body is unchanged since the last
+successful run are skipped without parsing; the returned iterator tells
+afterwards whether it listed every item, or every page was unchanged.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from config import PAGINATION_MAX_PAGES, PAGINATION_HOST_CONCURRENCY
+from utils.http_cache import CachedResponse
+
+logger = logging.getLogger(__name__)
+
+# Called with (page index, offset of the first item) and returns the cached response
+FetchPage = Callable[[int, int], CachedResponse]
+
+# Called with a page and returns its items and the total number of items, if known
+ReadPage = Callable[[CachedResponse], Tuple[List[Any], Optional[int]]]
+
+_host_limits: Dict[str, threading.BoundedSemaphore] = {}
+_host_limits_lock = threading.Lock()
+
+def host_limit(host: str) -> threading.BoundedSemaphore:
+    """Get the semaphore capping concurrent page requests to a host."""
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PAGINATION_HOST_CONCURRENCY)
+        return _host_limits[host]
+
+def _read_first_page(response: CachedResponse, read_page: ReadPage) -> Tuple[List[Any], Optional[int], int]:
+    """Read items, total and page size of the first page.
+    
+    For an unchanged page the total and page size come from the cache entry
+    and the body is not parsed.
+    """
+    meta = response.meta
+    if response.unchanged and 'total' in meta and 'page_size' in meta:
+        return [], meta['total'], meta['page_size']
+    
+    items, meta['total'] = read_page(response)
+    meta['page_size'] = len(items)
+    return ([] if response.unchanged else items), meta['total'], meta['page_size']
+
+def paginate(
+    fetch_page: FetchPage,
+    read_page: ReadPage,
+    host: str,
+    page_size: Optional[int] = None,
+    max_pages: int = PAGINATION_MAX_PAGES
+) -> 'PageItems':
+    """Fetch all pages of a search API and stream their items.
+    
+    The first page is fetched right away so request and parse errors reach
+    the caller before iteration starts. Remaining pages are fetched in
+    parallel and their items are yielded in the order the pages arrive.
+    A failed later page is logged and skipped.
+    
+    Items of pages that are unchanged since the last run are not yielded.
+    Once the iterator is exhausted the fetched pages are committed to the
+    HTTP cache, so a page only counts as seen after its items were processed.
+    
+    Args:
+        fetch_page: Function fetching one page given its index and offset
+        read_page: Function extracting the items and the total number of
+            items, if known, from a page
+        host: Host name used for the per-host concurrency cap
+        page_size: Items per page, defaults to the size of the first page
+        max_pages: Safety limit on the number of pages
+        
+    Returns:
+        PageItems over the items of all changed pages.
+        
+    Raises:
+        requests.RequestException: If the first page could not be fetched.
+        ValueError, KeyError: If the first page could not be parsed.
+    """
+    limit = host_limit(host)
+    # Streamed bodies are read while holding the host slot
+    with limit:
+        first = fetch_page(0, 0)
+        items, total, first_size = _read_first_page(first, read_page)
+    
+    size = page_size or first_size
+    pages = 1
+    truncated = False
+    if total and size:
+        pages = min(math.ceil(int(total) / size), max_pages)
+        if math.ceil(int(total) / size) > max_pages:
+            logger.warning(f"{host}: {total} results exceed the limit of {max_pages} pages")
+            truncated = True
+    
+    result = PageItems()
+    result.items = _iter_pages(result, fetch_page, read_page, host, limit, first, items, size, pages, truncated)
+    return result
+
+class PageItems:
+    """Iterator over the items of a paged search.
+    
+    Once it is exhausted, complete tells whether the items of every page
+    were yielded, and unchanged whether every page was skipped as unchanged.
+    Either way the search listed the same items as the last run plus the
+    yielded ones; otherwise some items may be missing.
+    """
+    
+    def __init__(self):
+        self.items: Iterator[Any] = iter(())
+        self.complete = False
+        self.unchanged = False
+    
+    def __iter__(self) -> 'PageItems':
+        return self
+    
+    def __next__(self) -> Any:
+        return next(self.items)
+    
+    def close(self) -> None:
+        close = getattr(self.items, 'close', None)
+        if close is not None:
+            close()
+
+def _iter_pages(
+    result: PageItems,
+    fetch_page: FetchPage,
+    read_page: ReadPage,
+    host: str,
+    limit: threading.BoundedSemaphore,
+    first: CachedResponse,
+    first_items: List[Any],
+    size: int,
+    pages: int,
+    truncated: bool
+) -> Iterator[Any]:
+    responses = [first]
+    unchanged = int(first.unchanged)
+    failed = 0
+    yield from first_items
+    
+    def fetch(page: int) -> Tuple[CachedResponse, List[Any]]:
+        with limit:
+            response = fetch_page(page, page * size)
+            return response, ([] if response.unchanged else read_page(response)[0])
+    
+    if pages > 1:
+        logger.info(f"{host}: fetching {pages - 1} more page(s)")
+        with ThreadPoolExecutor(max_workers=PAGINATION_HOST_CONCURRENCY, thread_name_prefix='page') as executor:
+            futures = {executor.submit(fetch, page): page for page in range(1, pages)}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        response, items = future.result()
+                    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                        logger.error(f"{host}: failed to fetch page {futures[future] + 1}: {e}")
+                        failed += 1
+                        continue
+                    responses.append(response)
+                    unchanged += int(response.unchanged)
+                    yield from items
+            finally:
+                for future in futures:
+                    future.cancel()
+    
+    if unchanged:
+        logger.info(f"{host}: skipped {unchanged} unchanged page(s)")
+    for response in responses:
+        response.commit()
+    result.complete = not (unchanged or failed or truncated)
+    result.unchanged = unchanged == len(responses) and not (failed or truncated)
@@ -0,0 +1,389 @@
+"""
+Streaming engine running the job sources.
+Each source is fetched and normalized in a worker thread that hands its
+postings on in batches as pages arrive. A single dedup stage owns all job
+storage lookups, collapses near-duplicate postings and, once a source was
+fetched completely, records which of its postings opened and closed; a pool of
+notifiers renders and queues the webhooks of new jobs. Each company is served
+by one notifier, so its webhook messages go out in order while different
+webhooks are sent in parallel. The stages are connected by asyncio queues with
+backpressure: a source whose notifications pile up stops fetching until its
+notifier catches up, without holding back the other sources, and fetching
+overlaps with delivering.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from config import (
+    HTTP_BACKOFF_FACTOR, SCRAPER_MAX_RETRIES, SCRAPER_MAX_WORKERS, SCRAPER_TIMEOUT,
+    PIPELINE_BATCH_SIZE, PIPELINE_QUEUE_SIZE, PIPELINE_NOTIFIERS
+)
+from utils import metrics
+from utils.http_cache import forget_host
+from utils.job_posting import JobPosting
+from utils.job_storage import collapse_duplicates, drop_unqueued_jobs, new_job_ids, update_lifecycle
+from utils.outbox import notify_new_job
+from utils.resilience import CircuitOpenError, guard_host
+from utils.similarity import also_posted
+from utils.sources import Source
+
+logger = logging.getLogger(__name__)
+
+# Called with each source and its number of new jobs, or None if it failed
+OnResult = Callable[[Source, Optional[int]], None]
+
+class _Cancelled(Exception):
+    """Raised in a fetch thread whose source was given up on."""
+
+class SourceRun:
+    """Progress of one source through the pipeline."""
+    
+    def __init__(self, source: Source):
+        self.source = source
+        # Monotonic time the fetch started, None while waiting for a worker
+        self.started: Optional[float] = None
+        self.cancelled = threading.Event()
+        self.fetched = False
+        self.failed = False
+        self.finished = False
+        # New postings handed to the notifiers and not processed yet
+        self.pending = 0
+        # Set while pending is below PIPELINE_QUEUE_SIZE, created in the event loop
+        self.room: Optional[asyncio.Event] = None
+        self.seen = 0
+        # All job IDs fetched, compared with the open postings once the fetch is complete
+        self.job_ids: Set[str] = set()
+        # Whether the fetch listed every posting, or found all of them unchanged since the last run
+        self.listed_all = False
+        self.unchanged = False
+        self.new_jobs = 0
+        self.dedup_seconds = 0.0
+        self.notify_seconds = 0.0
+
+class Pipeline:
+    """One run of the fetch -> dedup -> notify stages over a list of sources."""
+    
+    def __init__(
+        self,
+        sources: List[Source],
+        max_workers: int = SCRAPER_MAX_WORKERS,
+        timeout: float = SCRAPER_TIMEOUT,
+        notifiers: int = PIPELINE_NOTIFIERS,
+        on_result: Optional[OnResult] = None
+    ):
+        self.runs = [SourceRun(source) for source in sources]
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.notifiers = max(1, notifiers)
+        self.on_result = on_result
+        self.total_new_jobs = 0
+        self.failed_sources: List[str] = []
+    
+    async def run(self) -> Tuple[int, List[str]]:
+        """Run all sources through the pipeline until each finished or ran out of time.
+        
+        A source that exceeds its time budget is reported as failed; its
+        fetch thread stops at the next batch it hands on.
+        
+        Returns:
+            Tuple of (total new jobs, list of failed source names).
+        """
+        self.loop = asyncio.get_running_loop()
+        self.fetched: asyncio.Queue = asyncio.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+        # One queue per notifier, bounded per source by SourceRun.room;
+        # companies are assigned to notifiers round-robin
+        self.new: List[asyncio.Queue] = [asyncio.Queue() for _ in range(self.notifiers)]
+        self.assigned: Dict[str, asyncio.Queue] = {}
+        for run in self.runs:
+            run.room = asyncio.Event()
+            run.room.set()
+        self.done = asyncio.Event()
+        if not self.runs:
+            return 0, []
+        
+        fetch_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scraper')
+        notify_pool = ThreadPoolExecutor(max_workers=self.notifiers, thread_name_prefix='notifier')
+        tasks = [asyncio.create_task(self._produce(run, fetch_pool)) for run in self.runs]
+        tasks.append(asyncio.create_task(self._dedup()))
+        tasks.extend(asyncio.create_task(self._notify(queue, notify_pool)) for queue in self.new)
+        
+        try:
+            while not self.done.is_set():
+                try:
+                    await asyncio.wait_for(self.done.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    self._check_budgets()
+        finally:
+            for run in self.runs:
+                run.cancelled.set()
+            for task in tasks:
+                task.cancel()
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error("Pipeline task failed", exc_info=result)
+            # Jobs of cancelled or failed notifications would stay reserved, and
+            # their pages would be skipped as unchanged by the next fetch
+            dropped = drop_unqueued_jobs()
+            for run in self.runs:
+                if run.source.name in dropped and run.source.host:
+                    forget_host(run.source.host)
+            fetch_pool.shutdown(wait=False)
+            notify_pool.shutdown(wait=False)
+        
+        return self.total_new_jobs, self.failed_sources
+    
+    def _check_budgets(self) -> None:
+        now = time.monotonic()
+        for run in self.runs:
+            if not run.finished and run.started is not None and now - run.started > self.timeout:
+                logger.error(f"{run.source.label} exceeded time budget of {self.timeout}s, skipping")
+                run.cancelled.set()
+                self._finish(run, None)
+    
+    async def _hand_over(self, run: SourceRun, batch: List[JobPosting]) -> None:
+        await run.room.wait()
+        await self.fetched.put((run, batch))
+    
+    def _emit(self, run: SourceRun, batch: List[JobPosting]) -> None:
+        """Hand a batch to the dedup stage from a fetch thread.
+        
+        Waits while the dedup queue is full or too many new postings of the
+        source are still waiting for their notifier.
+        """
+        if run.cancelled.is_set():
+            raise _Cancelled()
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._hand_over(run, batch), self.loop)
+        except RuntimeError:
+            # The event loop is already closed
+            raise _Cancelled()
+        while True:
+            try:
+                future.result(timeout=1)
+                return
+            except concurrent.futures.TimeoutError:
+                if run.cancelled.is_set():
+                    future.cancel()
+                    raise _Cancelled()
+    
+    def _fetch(self, run: SourceRun) -> bool:
+        """Fetch and normalize all postings of a source, retrying network errors.
+        
+        Runs in a worker thread and hands the postings on in batches of
+        PIPELINE_BATCH_SIZE. Batches handed on before a retry are sent
+        again; dedup has reserved their IDs by then, so they are not new twice.
+        
+        Returns:
+            True if the source was fetched completely, False otherwise.
+        """
+        source = run.source
+        for attempt in range(SCRAPER_MAX_RETRIES + 1):
+            batch: List[JobPosting] = []
+            try:
+                items = iter(source.fetch())
+                try:
+                    for item in items:
+                        try:
+                            posting = source.normalize(item)
+                        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+                            metrics.incr('malformed_entries', source=source.name)
+                            logger.warning(f"Skipping malformed {source.label} job entry: {e}")
+                            continue
+                        batch.append(posting)
+                        if len(batch) >= PIPELINE_BATCH_SIZE:
+                            self._emit(run, batch)
+                            batch = []
+                finally:
+                    # Stops the page requests of a fetch that is given up early
+                    close = getattr(items, 'close', None)
+                    if close is not None:
+                        close()
+                if batch:
+                    self._emit(run, batch)
+                run.listed_all = getattr(items, 'complete', False)
+                run.unchanged = getattr(items, 'unchanged', False)
+                return True
+            except _Cancelled:
+                return False
+            except CircuitOpenError as e:
+                # Retrying would be rejected as well until the cooldown is over
+                logger.error(f"Skipping {source.label}: {e}")
+                return False
+            except requests.RequestException as e:
+                if attempt >= SCRAPER_MAX_RETRIES:
+                    logger.error(f"Failed to fetch {source.label} jobs: {e}")
+                    return False
+                delay = HTTP_BACKOFF_FACTOR * (2 ** attempt)
+                metrics.incr('retries', kind='source', source=source.name)
+                logger.warning(f"Failed to fetch {source.label} jobs, retrying in {delay:.1f}s: {e}")
+                if run.cancelled.wait(delay):
+                    return False
+            except (ValueError, KeyError) as e:
+                logger.error(f"Failed to parse {source.label} API response: {e}")
+                return False
+        return False
+    
+    def _fetch_timed(self, run: SourceRun) -> bool:
+        source = run.source
+        run.started = time.monotonic()
+        if source.host:
+            guard_host(source.host, source.name)
+        logger.info(f"Fetching jobs from {source.label}...")
+        with metrics.timer('fetch', source=source.name):
+            return self._fetch(run)
+    
+    async def _produce(self, run: SourceRun, pool: ThreadPoolExecutor) -> None:
+        """Fetch stage of one source, followed by an end marker for dedup."""
+        try:
+            fetched = await self.loop.run_in_executor(pool, self._fetch_timed, run)
+        except Exception as e:
+            logger.error(f"Source {run.source.label} raised an error: {e}")
+            fetched = False
+        run.failed = not fetched
+        await self.fetched.put((run, None))
+    
+    async def _dedup(self) -> None:
+        """Dedup stage: the only place that looks up job IDs in storage.
+        
+        A batch that fails to process fails its source, so the fetch thread
+        is released right away instead of waiting for the time budget.
+        """
+        while True:
+            run, batch = await self.fetched.get()
+            if run.finished:
+                continue
+            try:
+                self._dedup_batch(run, batch)
+            except Exception:
+                logger.exception(f"Failed to process {run.source.label} jobs")
+                run.cancelled.set()
+                self._finish(run, None)
+    
+    def _dedup_batch(self, run: SourceRun, batch: Optional[List[JobPosting]]) -> None:
+        """Look up a batch of fetched postings and hand the new ones to their notifier.
+        
+        Args:
+            run: Source the batch belongs to
+            batch: Fetched postings, or None once the fetch ended
+        """
+        if batch is None:
+            run.fetched = True
+            if not run.failed and (run.listed_all or run.unchanged):
+                self._update_lifecycle(run)
+            if run.pending == 0:
+                self._finish(run, None if run.failed else run.new_jobs)
+            return
+        
+        name = run.source.name
+        start = time.perf_counter()
+        postings: Dict[str, JobPosting] = {posting.job_id: posting for posting in batch}
+        new_ids = new_job_ids(name, postings)
+        groups = collapse_duplicates(name, [postings[job_id] for job_id in new_ids]) if new_ids else []
+        run.seen += len(postings)
+        run.job_ids.update(postings)
+        run.dedup_seconds += time.perf_counter() - start
+        
+        collapsed = sum(len(duplicates) for _, duplicates in groups)
+        if collapsed:
+            metrics.incr('duplicate_postings', collapsed, source=name, kind='collapsed')
+        if len(new_ids) > len(groups) + collapsed:
+            metrics.incr('duplicate_postings', len(new_ids) - len(groups) - collapsed, source=name, kind='repost')
+        
+        if groups and name not in self.assigned:
+            self.assigned[name] = self.new[len(self.assigned) % len(self.new)]
+        for posting, duplicates in groups:
+            if duplicates:
+                posting.fields.append(also_posted(duplicates))
+            self.assigned[name].put_nowait((run, posting))
+        run.pending += len(groups)
+        if run.pending >= PIPELINE_QUEUE_SIZE:
+            run.room.clear()
+    
+    def _update_lifecycle(self, run: SourceRun) -> None:
+        name = run.source.name
+        start = time.perf_counter()
+        opened, closed = update_lifecycle(name, run.job_ids if run.listed_all else None)
+        run.dedup_seconds += time.perf_counter() - start
+        if opened:
+            metrics.incr('postings_opened', len(opened), source=name)
+        if closed:
+            metrics.incr('postings_closed', len(closed), source=name)
+            logger.info(f"{run.source.label}: {len(closed)} postings closed")
+    
+    async def _notify(self, queue: asyncio.Queue, pool: ThreadPoolExecutor) -> None:
+        """Notifier: renders and queues the webhook of each new posting of its companies."""
+        while True:
+            run, posting = await queue.get()
+            label = run.source.label
+            start = time.perf_counter()
+            try:
+                queued = await self.loop.run_in_executor(pool, notify_new_job, posting)
+            except Exception as e:
+                logger.error(f"Error processing {label} job {posting.job_id}: {e}")
+                queued = False
+            run.notify_seconds += time.perf_counter() - start
+            
+            if queued:
+                run.new_jobs += 1
+                logger.info(f"New {label} job queued: {posting.title} ({posting.job_id})")
+            run.pending -= 1
+            if run.pending < PIPELINE_QUEUE_SIZE:
+                run.room.set()
+            if run.fetched and run.pending == 0:
+                self._finish(run, None if run.failed else run.new_jobs)
+    
+    def _finish(self, run: SourceRun, result: Optional[int]) -> None:
+        """Report a source as done, with its number of new jobs or None if it failed."""
+        if run.finished:
+            return
+        run.finished = True
+        source = run.source
+        
+        if run.started is not None:
+            metrics.observe('source', time.monotonic() - run.started, source=source.name)
+        metrics.observe('dedup', run.dedup_seconds, source=source.name)
+        metrics.observe('notify', run.notify_seconds, source=source.name)
+        
+        if result is None:
+            logger.warning(f"Failed to fetch jobs from {source.label}")
+            metrics.incr('source_failures', source=source.name)
+            self.failed_sources.append(source.label)
+        else:
+            metrics.incr('jobs_seen', run.seen, source=source.name)
+            metrics.incr('new_jobs', result, source=source.name)
+            logger.info(f"{source.label}: Found {result} new jobs")
+            self.total_new_jobs += result
+        
+        if self.on_result:
+            try:
+                self.on_result(source, result)
+            except Exception:
+                logger.exception(f"Result callback for {source.label} failed")
+        if all(other.finished for other in self.runs):
+            self.done.set()
+
+async def run_pipeline(
+    sources: List[Source],
+    max_workers: int = SCRAPER_MAX_WORKERS,
+    timeout: float = SCRAPER_TIMEOUT,
+    on_result: Optional[OnResult] = None
+) -> Tuple[int, List[str]]:
+    """Run sources through the fetch, dedup and notify stages.
+    
+    Args:
+        sources: Sources to run
+        max_workers: Maximum number of sources fetched at the same time
+        timeout: Time budget per source in seconds, counted from the start of its fetch
+        on_result: Called with each source and its number of new jobs,
+            or None if it failed or ran out of time
+    
+    Returns:
+        Tuple of (total new jobs, list of failed source names).
+    """
+    return await Pipeline(sources, max_workers, timeout, on_result=on_result).run()
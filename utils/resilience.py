@@ -0,0 +1,287 @@
+"""
+Circuit breakers and hedged requests for job source hosts.
+A source whose endpoint keeps failing is cut off for a cooldown period, so
+its requests fail immediately instead of each waiting for the full request
+timeout. Afterwards a few trial requests decide whether it is healthy again.
+Requests that take longer than the usual latency of their host get a
+duplicate request, and whichever answers first is used.
+"""
+import collections
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import requests
+from config import (
+    CIRCUIT_FAILURE_RATE, CIRCUIT_WINDOW, CIRCUIT_MIN_REQUESTS, CIRCUIT_COOLDOWN, CIRCUIT_HALF_OPEN_PROBES,
+    HEDGE_QUANTILE, HEDGE_MIN_SAMPLES, HEDGE_MAX_RATIO
+)
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per host for the hedging deadline
+LATENCY_SAMPLES = 100
+
+# Threads running hedged requests and their duplicates
+HEDGE_WORKERS = 32
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while the circuit of its host is open."""
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker.
+    
+    Closed: requests pass and their outcomes are recorded in a sliding time
+    window. Once the window holds at least min_requests outcomes and the
+    failure rate reaches failure_rate, the circuit opens.
+    Open: requests are rejected until the cooldown has passed.
+    Half-open: up to probes concurrent trial requests pass. The first
+    success closes the circuit, a failure opens it again.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        window: float = CIRCUIT_WINDOW,
+        min_requests: int = CIRCUIT_MIN_REQUESTS,
+        cooldown: float = CIRCUIT_COOLDOWN,
+        probes: int = CIRCUIT_HALF_OPEN_PROBES
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = max(1, min_requests)
+        self.cooldown = cooldown
+        self.probes = max(1, probes)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # (monotonic time, succeeded) of recent requests
+        self.outcomes: Deque[Tuple[float, bool]] = collections.deque()
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        metrics.incr('circuit_transitions', source=self.name, state=state)
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            logger.warning(f"Circuit of {self.name} opened, failing requests fast for {self.cooldown:.0f}s")
+        else:
+            logger.info(f"Circuit of {self.name} is {state.replace('_', '-')}")
+    
+    def allow(self) -> bool:
+        """Check whether a request may be sent now, counting it as a probe if half-open."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self._set_state(HALF_OPEN)
+                self._probes_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.probes:
+                    return False
+                self._probes_in_flight += 1
+            return True
+    
+    def record(self, success: bool) -> None:
+        """Record the outcome of a request that allow() let through."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if success:
+                    self.outcomes.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._set_state(OPEN)
+                return
+            if self.state == OPEN:
+                # Late result of a request sent before the circuit opened
+                return
+            
+            self.outcomes.append((now, success))
+            while self.outcomes and now - self.outcomes[0][0] > self.window:
+                self.outcomes.popleft()
+            
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) >= self.failure_rate:
+                self._set_state(OPEN)
+    
+    def is_open(self) -> bool:
+        """True while requests are being rejected."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+class LatencyTracker:
+    """Recent response times of a host and the hedging budget."""
+    
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples: Deque[float] = collections.deque(maxlen=samples)
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency below which a fraction q of the samples lie, or None with too few samples."""
+        with self._lock:
+            if len(self.samples) < max(1, HEDGE_MIN_SAMPLES):
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to send a duplicate of a new request, or None to not hedge it."""
+        with self._lock:
+            self.requests += 1
+        if HEDGE_MAX_RATIO <= 0:
+            return None
+        return self.quantile(HEDGE_QUANTILE)
+    
+    def take_hedge(self) -> bool:
+        """Use up one hedge if the share of hedged requests stays within the budget."""
+        with self._lock:
+            if self.hedges >= max(1.0, HEDGE_MAX_RATIO * self.requests):
+                return False
+            self.hedges += 1
+            return True
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+    return _executor
+
+def _discard(future: 'Future[requests.Response]') -> None:
+    """Release the connection of a response that lost the race."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class HostGuard:
+    """Circuit breaker and hedging for all requests to one source host."""
+    
+    def __init__(self, host: str, name: str):
+        self.host = host
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+    
+    def _timed(self, send: Callable[[], requests.Response]) -> requests.Response:
+        start = time.monotonic()
+        response = send()
+        if response.ok:
+            self.latency.add(time.monotonic() - start)
+        return response
+    
+    def _hedged(self, send: Callable[[], requests.Response], delay: float) -> requests.Response:
+        executor = _get_executor()
+        primary = executor.submit(self._timed, send)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.latency.take_hedge():
+            return primary.result()
+        
+        metrics.incr('hedged_requests', source=self.name)
+        logger.debug(f"{self.host}: no response after {delay:.2f}s, sending a hedged request")
+        hedge = executor.submit(self._timed, send)
+        
+        result: Optional[requests.Response] = None
+        winner: Optional[Future] = None
+        error: Optional[BaseException] = None
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        response = future.result()
+                    except requests.RequestException as e:
+                        error = e
+                        continue
+                    # Prefer a successful response over an error status
+                    if result is None or (response.ok and not result.ok):
+                        if result is not None:
+                            result.close()
+                        result, winner = response, future
+                    else:
+                        response.close()
+                if result is not None and result.ok:
+                    break
+        finally:
+            for future in pending:
+                future.add_done_callback(_discard)
+        
+        if result is None:
+            raise error
+        if winner is hedge:
+            metrics.incr('hedge_wins', source=self.name)
+        return result
+    
+    def call(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request through the circuit breaker, hedging it if it is slow.
+        
+        Args:
+            send: Function sending the request; it may be called twice, so it
+                must be safe to repeat (true for the read-only search requests
+                of the sources, including their POST searches)
+        
+        Returns:
+            First successful response, or the error status if none succeeded.
+        
+        Raises:
+            CircuitOpenError: If the circuit of the host is open.
+            requests.RequestException: If the request failed.
+        """
+        if not self.breaker.allow():
+            metrics.incr('circuit_rejections', source=self.name)
+            raise CircuitOpenError(f"Circuit of {self.name} is open, not requesting {self.host}")
+        
+        delay = self.latency.hedge_delay()
+        try:
+            response = self._timed(send) if delay is None else self._hedged(send, delay)
+        except requests.RequestException:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(response.ok)
+        return response
+
+# Guards by host name
+_guards: Dict[str, HostGuard] = {}
+_guards_lock = threading.Lock()
+
+def guard_host(host: str, name: str) -> HostGuard:
+    """Put all requests to a host behind a circuit breaker with hedging.
+    
+    Args:
+        host: Host name (e.g., 'www.amazon.jobs')
+        name: Source name used in logs and metrics
+    
+    Returns:
+        Guard of the host, existing or new.
+    """
+    with _guards_lock:
+        if host not in _guards:
+            _guards[host] = HostGuard(host, name)
+        return _guards[host]
+
+def get_guard(host: str) -> Optional[HostGuard]:
+    """Get the guard of a host, or None if its requests are not guarded."""
+    return _guards.get(host)
@@ -0,0 +1,119 @@
+"""
+In-process scheduler for daemon mode.
+Polls each source on its own interval instead of all sources once a day.
+Storage, HTTP sessions and caches stay loaded between polls. Intervals
+adapt to each source's change history: they grow while a source produces
+no new jobs and drop back right after it does, and are shortened during
+the recruiting season.
+"""
+import datetime
+import heapq
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import (
+    DAEMON_POLL_INTERVAL, DAEMON_POLL_INTERVALS, DAEMON_POLL_JITTER, DAEMON_SEASON_MONTHS, DAEMON_SEASON_FACTOR,
+    DAEMON_MIN_POLL_INTERVAL, DAEMON_MAX_POLL_INTERVAL, DAEMON_BACKOFF_FACTOR
+)
+from utils.job_storage import change_history
+from utils.sources import Source
+
+logger = logging.getLogger(__name__)
+
+# Runs one cycle over the given sources, reporting each source's result to the callback
+RunCycle = Callable[[List[Source], Callable[[Source, Optional[int]], None]], object]
+
+class Scheduler:
+    """Runs polling cycles over the sources that are due until stopped."""
+    
+    def __init__(self, sources: List[Source], run_cycle: RunCycle):
+        self.sources = {source.name: source for source in sources}
+        self.run_cycle = run_cycle
+        # Heap of (due time, source name) on the monotonic clock
+        self.queue: List[Tuple[float, str]] = []
+        self._stop = threading.Event()
+    
+    def base_interval(self, source: Source) -> float:
+        """Configured seconds between polls of a source without change history."""
+        return float(
+            DAEMON_POLL_INTERVALS.get(source.name)
+            or source.poll_interval
+            or DAEMON_POLL_INTERVAL
+        )
+    
+    def next_interval(self, source: Source, result: Optional[int]) -> float:
+        """Seconds until the next poll of a source after a poll with the given result.
+        
+        The interval is a multiple of the time since the source last
+        produced new jobs, so it doubles with every empty poll (exponential
+        backoff) and falls to the minimum once new jobs appear. Sources
+        without change history, and failed polls, use the configured
+        interval since they say nothing about the change rate.
+        
+        Args:
+            source: Polled source
+            result: Number of new jobs found, or None if the poll failed
+            
+        Returns:
+            Interval within the configured bounds, with the season factor
+            and jitter applied.
+        """
+        history = change_history(source.name)
+        if history and result is not None:
+            interval = (time.time() - history[-1]) * DAEMON_BACKOFF_FACTOR
+        else:
+            interval = self.base_interval(source)
+        if datetime.date.today().month in DAEMON_SEASON_MONTHS:
+            interval *= DAEMON_SEASON_FACTOR
+        interval = min(max(interval, DAEMON_MIN_POLL_INTERVAL), DAEMON_MAX_POLL_INTERVAL)
+        interval *= 1 + random.uniform(-DAEMON_POLL_JITTER, DAEMON_POLL_JITTER)
+        return max(interval, 1.0)
+    
+    def schedule(self, name: str, delay: float) -> None:
+        heapq.heappush(self.queue, (time.monotonic() + delay, name))
+    
+    def stop(self) -> None:
+        """Stop the scheduler after the running cycle."""
+        self._stop.set()
+    
+    def _take_due(self) -> List[Source]:
+        now = time.monotonic()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            _, name = heapq.heappop(self.queue)
+            due.append(self.sources[name])
+        return due
+    
+    def run(self) -> None:
+        """Poll all sources once, then each again whenever it is due."""
+        if not self.sources:
+            logger.error("No sources to poll")
+            return
+        
+        for name in self.sources:
+            self.schedule(name, 0)
+        
+        results: Dict[str, Optional[int]] = {}
+        
+        def record(source: Source, result: Optional[int]) -> None:
+            results[source.name] = result
+        
+        while not self._stop.is_set():
+            due = self._take_due()
+            if not due:
+                self._stop.wait(max(0.0, self.queue[0][0] - time.monotonic()))
+                continue
+            
+            results.clear()
+            logger.info(f"Polling {', '.join(source.label for source in due)}")
+            self.run_cycle(due, record)
+            
+            for source in due:
+                interval = self.next_interval(source, results.get(source.name))
+                self.schedule(source.name, interval)
+                logger.info(f"Next poll of {source.label} in {interval / 60:.1f} min")
+        
+        logger.info("Scheduler stopped")
@@ -0,0 +1,410 @@
+"""
+Near-duplicate detection for job postings.
+Postings are compared by the Jaccard similarity of their features: the
+words and word pairs of the title, the team and the location. Notified
+postings are kept in an inverted index from feature to postings. A posting
+with n features can only reach a similarity of t with postings that share
+at least one of any n - ceil(t * n) + 1 of its features, so a lookup only
+scans the posting lists of its rarest features and compares the few
+postings found there, no matter how many are stored. With a scan limit,
+only the most recent postings of each list are scanned: a posting made of
+common features only is then compared with recent postings only, and an
+older duplicate of it can be missed. Like the job ID
+index, the index of the stored postings is a memory-mapped file searched by
+bisection; postings notified since it was built are kept in memory.
+"""
+import array
+import bisect
+import functools
+import hashlib
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from utils.binary_file import SectionWriter, open_mapped, read_header, write_mapped
+from utils.job_posting import JobPosting
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BTJSIM1\0'
+
+# Copies of the team feature, so postings of different teams stay apart
+# even when their titles are the same
+TEAM_WEIGHT = 3
+
+# Postings scanned by a lookup beyond the lists it has to probe, as a
+# multiple of those; each further list sorts out more candidates cheaply
+PROBE_BUDGET = 4
+
+# Postings added since the index file was built that are always tolerated before a rebuild
+REBUILD_SLACK = 1000
+
+# Discord limit of an embed field value
+FIELD_LIMIT = 1024
+
+# Stored posting: [job_id, title, team, location, notified_at]
+Record = List[Any]
+
+_WORD = re.compile(r'[a-z0-9]+')
+_STOP_WORDS = frozenset({'a', 'an', 'and', 'at', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'})
+
+def _words(text: Optional[str]) -> List[str]:
+    """Lowercase ASCII words of a text, without accents, punctuation and stop words."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return [word for word in _WORD.findall(text) if word not in _STOP_WORDS]
+
+def features(title: Optional[str], team: Optional[str] = None, location: Optional[str] = None) -> Dict[str, int]:
+    """Features of a posting with their weights: title words and word pairs, its team and its location."""
+    words = _words(title)
+    result = {f't:{word}': 1 for word in words}
+    result.update((f't:{first} {second}', 1) for first, second in zip(words, words[1:]))
+    team_key = ' '.join(_words(team))
+    if team_key:
+        result[f'g:{team_key}'] = TEAM_WEIGHT
+    location_key = ' '.join(_words(location))
+    if location_key:
+        result[f'l:{location_key}'] = 1
+    return result
+
+@functools.lru_cache(maxsize=65536)
+def _feature_key(company: str, feature: str) -> int:
+    digest = hashlib.blake2b(f'{company}\0{feature}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def feature_keys(
+    company: str,
+    title: Optional[str],
+    team: Optional[str] = None,
+    location: Optional[str] = None
+) -> Tuple[FrozenSet[int], List[Tuple[int, int]]]:
+    """Features of a posting as 64-bit keys.
+    
+    Keys include the company, so postings of different companies never
+    share one. A feature of weight w has w keys, which makes the plain
+    Jaccard similarity of the key sets a weighted one; postings are only
+    listed under the first of them.
+    
+    Returns:
+        Tuple of (all keys, (listed key, weight) pairs).
+    """
+    keys = []
+    listed = []
+    for feature, weight in features(title, team, location).items():
+        key = _feature_key(company, feature)
+        keys.append(key)
+        keys.extend(_feature_key(company, f'{feature}#{copy}') for copy in range(1, weight))
+        listed.append((key, weight))
+    return frozenset(keys), listed
+
+class SimilarityIndex:
+    """Read-only inverted index of stored postings by feature key."""
+    
+    def __init__(self, buffer: Any = None, latest: Optional[List[Any]] = None, views: Optional[List[memoryview]] = None):
+        # mmap or bytes the views point into
+        self.buffer = buffer
+        # [company, job_id, notified_at] of the most recent posting in the index
+        self.latest = latest
+        if views is None:
+            views = [
+                memoryview(array.array('Q')), memoryview(array.array('I')), memoryview(array.array('Q')),
+                memoryview(array.array('Q', [0])), memoryview(array.array('q')),
+                memoryview(array.array('Q', [0])), memoryview(b'')
+            ]
+        # Sorted feature keys and the slot of the posting listed under each
+        self.keys, self.slots = views[0], views[1]
+        # Sorted feature keys of each slot, at feature_offsets[slot]:feature_offsets[slot + 1]
+        self.features, self.feature_offsets = views[2], views[3]
+        # Notification time of each slot
+        self.times = views[4]
+        # UTF-8 job ID of each slot, at id_offsets[slot]:id_offsets[slot + 1]
+        self.id_offsets, self.ids = views[5], views[6]
+    
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> 'SimilarityIndex':
+        """Read an index from an encoded buffer.
+        
+        Raises:
+            ValueError: If the buffer is not a valid index for this platform.
+        """
+        view, header, base = read_header(buffer, MAGIC, 'posting similarity index')
+        if header.get('team_weight') != TEAM_WEIGHT:
+            raise ValueError("Index file was written with different feature settings")
+        
+        views = []
+        for (at, size), item in zip(header['sections'], ('Q', 'I', 'Q', 'Q', 'q', 'Q', 'B')):
+            views.append(view[base + at:base + at + size].cast(item))
+        return cls(buffer, header.get('latest'), views)
+    
+    @classmethod
+    def open(cls, path: str) -> Optional['SimilarityIndex']:
+        """Memory-map an index file.
+        
+        Returns:
+            Index, or None if the file is missing or invalid.
+        """
+        return open_mapped(path, cls.from_buffer, 'posting similarity index')
+    
+    def __len__(self) -> int:
+        return len(self.times)
+    
+    def postings(self, key: int) -> range:
+        """Positions in keys/slots of the postings listed under a feature key."""
+        return range(bisect.bisect_left(self.keys, key), bisect.bisect_right(self.keys, key))
+    
+    def feature_set(self, slot: int) -> FrozenSet[int]:
+        return frozenset(self.features[self.feature_offsets[slot]:self.feature_offsets[slot + 1]])
+    
+    def job_id(self, slot: int) -> str:
+        return bytes(self.ids[self.id_offsets[slot]:self.id_offsets[slot + 1]]).decode()
+
+def encode_similarity_index(postings: Dict[str, List[Record]]) -> bytes:
+    """Encode stored postings into the binary index format.
+    
+    Args:
+        postings: Mapping of company to stored postings
+    
+    Returns:
+        Encoded index.
+    """
+    entries: List[Tuple[int, int]] = []
+    posting_features = array.array('Q')
+    feature_offsets = array.array('Q', [0])
+    times = array.array('q')
+    id_offsets = array.array('Q', [0])
+    ids: List[bytes] = []
+    latest: Optional[List[Any]] = None
+    
+    for company, records in postings.items():
+        for job_id, title, team, location, notified_at in records:
+            slot = len(times)
+            keys, listed = feature_keys(company, title, team, location)
+            entries.extend((key, slot) for key, _ in listed)
+            posting_features.extend(sorted(keys))
+            feature_offsets.append(len(posting_features))
+            times.append(int(notified_at))
+            encoded = str(job_id).encode()
+            id_offsets.append(id_offsets[-1] + len(encoded))
+            ids.append(encoded)
+            if latest is None or notified_at >= latest[2]:
+                latest = [company, str(job_id), notified_at]
+    entries.sort()
+    
+    writer = SectionWriter()
+    layout = [
+        writer.add(array.array('Q', (key for key, _ in entries)).tobytes()),
+        writer.add(array.array('I', (slot for _, slot in entries)).tobytes()),
+        writer.add(posting_features.tobytes()),
+        writer.add(feature_offsets.tobytes()),
+        writer.add(times.tobytes()),
+        writer.add(id_offsets.tobytes()),
+        writer.add(b''.join(ids)),
+    ]
+    return writer.encode(MAGIC, {'team_weight': TEAM_WEIGHT, 'latest': latest, 'sections': layout})
+
+def write_similarity_index(path: str, postings: Dict[str, List[Record]]) -> SimilarityIndex:
+    """Build an index file and open it.
+    
+    Without a path, or if the file cannot be written, the index is kept in
+    memory instead.
+    
+    Args:
+        path: Index file path (empty = memory only)
+        postings: Mapping of company to stored postings
+    
+    Returns:
+        Opened index.
+    """
+    content = encode_similarity_index(postings)
+    return write_mapped(path, content, SimilarityIndex.from_buffer, 'posting similarity index')
+
+class RepostIndex:
+    """Notified postings searchable by similarity: an index file plus the postings added since it was built."""
+    
+    def __init__(self, index: Optional[SimilarityIndex] = None, threshold: float = 1.0, scan_limit: int = 0):
+        self.index = index if index is not None else SimilarityIndex()
+        # Minimum similarity of a duplicate, above 0
+        self.threshold = threshold
+        # Most recent postings scanned per feature by a lookup (0 = all)
+        self.scan_limit = scan_limit
+        # Postings not in the index file as (job_id, notified_at, feature keys)
+        self.extra: List[Tuple[str, float, FrozenSet[int]]] = []
+        # Feature key -> positions in extra
+        self.lists: Dict[int, List[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.index) + len(self.extra)
+    
+    def add(self, company: str, record: Record) -> None:
+        """Add a notified posting."""
+        job_id, title, team, location, notified_at = record
+        keys, listed = feature_keys(company, title, team, location)
+        position = len(self.extra)
+        self.extra.append((str(job_id), notified_at, keys))
+        for key, _ in listed:
+            self.lists.setdefault(key, []).append(position)
+    
+    def remove(self, company: str, record: Record) -> None:
+        """Remove a posting added since the index file was built."""
+        job_id, title, team, location, _ = record
+        _, listed = feature_keys(company, title, team, location)
+        job_id = str(job_id)
+        for key, _ in listed:
+            positions = self.lists.get(key)
+            if positions:
+                # Lookups only reach extra postings through the lists
+                positions[:] = [position for position in positions if self.extra[position][0] != job_id]
+    
+    def find(self, company: str, posting: JobPosting, since: float) -> Optional[str]:
+        """Find a posting of the same company, notified at or after since, that the given one duplicates.
+        
+        The answer is exact without a scan limit. With one, the weight of the
+        features whose lists were cut is no longer counted towards the
+        candidates, so only postings among the scanned ones can be found.
+        
+        Returns:
+            Job ID of the similar posting, or None.
+        """
+        keys, listed = feature_keys(company, posting.title, posting.team, posting.location)
+        if not keys:
+            return None
+        
+        # A duplicate shares features of weight >= needed, so it shares one of
+        # any features that leave less than that weight out. The lists of the
+        # rarest features are probed; probing a few more lists that are cheap
+        # in comparison raises the weight a candidate must share with them.
+        needed = math.ceil(self.threshold * len(keys) - 1e-9)
+        lists = []
+        for key, weight in listed:
+            positions = self.index.postings(key)
+            extra_positions = self.lists.get(key, ())
+            # Only the most recent postings of a common feature are scanned
+            limit = self.scan_limit or len(positions) + len(extra_positions)
+            recent = extra_positions[-limit:]
+            start = max(positions.start, positions.stop - (limit - len(recent)))
+            lists.append((len(positions) + len(extra_positions), self.index.slots[start:positions.stop], recent, weight))
+        lists.sort(key=lambda entry: entry[0])
+        
+        probes = []
+        # Weight of the features not probed, and of the probed ones not scanned completely
+        left = len(keys)
+        capped = 0
+        probed = 0
+        budget = None
+        for entry in lists:
+            size = len(entry[1]) + len(entry[2])
+            if left < needed:
+                budget = budget or PROBE_BUDGET * probed
+                if size < entry[0] or probed + size > budget:
+                    break
+            probes.append(entry)
+            probed += size
+            left -= entry[3]
+            if size < entry[0]:
+                capped += entry[3]
+        # Weight a duplicate must share with the completely scanned lists
+        required = max(1, needed - left - capped)
+        
+        counts: Counter = Counter()
+        extra_counts: Counter = Counter()
+        for _, slots, extra_positions, weight in probes:
+            for _ in range(weight):
+                counts.update(slots)
+                extra_counts.update(extra_positions)
+        
+        # Recent postings first, they are the likeliest to be reposted.
+        # A similarity of common / (size + other - common) >= threshold is
+        # checked without the division.
+        threshold = self.threshold - 1e-9
+        size = len(keys)
+        for position, count in extra_counts.items():
+            if count >= required:
+                job_id, notified_at, other = self.extra[position]
+                common = len(keys & other)
+                if common >= threshold * (size + len(other) - common) and notified_at >= since:
+                    return job_id
+        
+        index = self.index
+        offsets = index.feature_offsets
+        # Sizes of feature sets that can reach the threshold at all
+        largest = size / self.threshold
+        for slot, count in counts.items():
+            if count < required or index.times[slot] < since:
+                continue
+            other_size = offsets[slot + 1] - offsets[slot]
+            if not needed <= other_size <= largest:
+                continue
+            common = len(keys & index.feature_set(slot))
+            if common >= threshold * (size + other_size - common):
+                return index.job_id(slot)
+        return None
+
+def load_repost_index(
+    path: str,
+    postings: Dict[str, List[Record]],
+    since: float,
+    threshold: float,
+    scan_limit: int = 0
+) -> RepostIndex:
+    """Open the index file of the stored postings, rebuilding it when needed.
+    
+    The file is valid while the most recent posting in it is still stored.
+    Postings stored after it are added in memory until they outgrow a tenth
+    of the file; the rebuild also drops postings notified before since.
+    
+    Args:
+        path: Index file path (empty = memory only)
+        postings: Mapping of company to stored postings
+        since: Unix timestamp of the oldest posting worth indexing
+        threshold: Minimum similarity of a duplicate
+        scan_limit: Most recent postings scanned per feature by a lookup (0 = all)
+    
+    Returns:
+        Index of the stored postings.
+    """
+    index = SimilarityIndex.open(path) if path else None
+    extra: Optional[List[Tuple[str, Record]]] = None
+    if index is not None:
+        company, job_id, notified_at = index.latest or ('', '', since)
+        if index.latest is None or any(str(record[0]) == job_id for record in postings.get(company, ())):
+            extra = [
+                (other, record)
+                for other, records in postings.items() for record in records
+                if record[4] >= max(notified_at, since) and not (other == company and str(record[0]) == job_id)
+            ]
+    
+    if index is None or extra is None or len(extra) > len(index) // 10 + REBUILD_SLACK:
+        recent = {company: [record for record in records if record[4] >= since] for company, records in postings.items()}
+        index = write_similarity_index(path, recent)
+        extra = []
+        logger.info(f"Rebuilt posting similarity index with {len(index)} postings")
+    
+    result = RepostIndex(index, threshold, scan_limit)
+    for company, record in extra:
+        result.add(company, record)
+    return result
+
+def also_posted(postings: List[JobPosting]) -> Tuple[str, str]:
+    """Embed field linking the near-duplicates collapsed into a notification.
+    
+    Returns:
+        Tuple of (field name, field value).
+    """
+    links: List[str] = []
+    size = 0
+    for i, posting in enumerate(postings):
+        label = (posting.location or posting.title or posting.job_id).replace('[', '(').replace(']', ')')
+        link = f'[{label}]({posting.url})'
+        # Leave room to mention the postings that do not fit
+        rest = len(postings) - i - 1
+        reserve = len(f', and {rest} more') if rest else 0
+        if size + len(link) + reserve > FIELD_LIMIT:
+            links.append(f'and {rest + 1} more')
+            break
+        links.append(link)
+        size += len(link) + 2
+    return 'Also posted', ', '.join(links)
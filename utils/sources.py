@@ -0,0 +1,162 @@
+"""
+Job source plugins and their registry.
+Each job board is described by a Source subclass in the jobs package that
+only knows how to fetch, parse and normalize its results. The engine in
+utils.pipeline runs the discovered sources and owns everything else:
+concurrency, retries, deduplication against the job storage and notification.
+"""
+import importlib
+import inspect
+import logging
+import pkgutil
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from utils.http_cache import CachedResponse
+from utils.job_posting import JobPosting
+from utils.pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+class Source(ABC):
+    """A job board to monitor.
+    
+    Paged JSON APIs subclass PagedSource. Sources with a different access
+    pattern subclass Source and implement fetch() and normalize().
+    """
+    
+    # Company identifier used for job storage and webhooks
+    name: str = ''
+    # Name shown in logs and the run summary
+    display_name: str = ''
+    # Host name for the per-host concurrency cap of the paginator and the circuit breaker
+    host: str = ''
+    # Seconds between polls in daemon mode, defaults to DAEMON_POLL_INTERVAL
+    poll_interval: Optional[int] = None
+    
+    @property
+    def label(self) -> str:
+        return self.display_name or self.name
+    
+    @abstractmethod
+    def fetch(self) -> Iterator[Any]:
+        """Fetch all raw job entries of the source.
+        
+        Postings of the source are only tracked as open or closed if the
+        returned iterator reports its complete and unchanged attributes like
+        utils.pagination.PageItems does.
+        
+        Raises:
+            requests.RequestException: If the results could not be fetched.
+            ValueError, KeyError: If the results could not be parsed.
+        """
+    
+    @abstractmethod
+    def normalize(self, item: Any) -> JobPosting:
+        """Turn a raw job entry into a job posting.
+        
+        Raises:
+            KeyError, IndexError, TypeError, ValueError, AttributeError:
+                If the entry is malformed.
+        """
+
+class PagedSource(Source):
+    """A job board with a paged JSON search API.
+    
+    Subclasses only set the class attributes and implement fetch_page() and
+    normalize(), plus get_items() and get_total() unless they set
+    items_path; a single request is treated as one page without a total.
+    """
+    
+    # Items per page, defaults to the size of the first page
+    page_size: Optional[int] = None
+    # Keys leading to the list of job entries in a page, e.g. ('data', 'positions').
+    # Only that list and the total are decoded; the rest of the page is skipped.
+    items_path: Tuple[str, ...] = ()
+    # Keys leading to the total number of results in a page, if reported
+    total_path: Tuple[str, ...] = ()
+    
+    @abstractmethod
+    def fetch_page(self, page: int, offset: int) -> CachedResponse:
+        """Fetch one page of results given its index and item offset."""
+    
+    def get_items(self, data: Any) -> List[Any]:
+        """Extract the list of raw job entries from a parsed page.
+        
+        Must be overridden by sources without items_path, which
+        register_source() checks.
+        """
+        raise NotImplementedError
+    
+    def get_total(self, data: Any) -> Optional[int]:
+        """Extract the total number of results from a parsed page, if known."""
+        return None
+    
+    def read_page(self, response: CachedResponse) -> Tuple[List[Any], Optional[int]]:
+        """Extract the raw job entries and the total number of results from a page.
+        
+        Raises:
+            ValueError, KeyError: If the page could not be parsed.
+        """
+        if not self.items_path:
+            data = response.json()
+            return self.get_items(data), self.get_total(data)
+        
+        paths = [self.items_path] + ([self.total_path] if self.total_path else [])
+        values = response.select(*paths)
+        if not isinstance(values[0], list):
+            raise KeyError(f"no job list at {'.'.join(self.items_path)}")
+        return values[0], (values[1] if self.total_path else None)
+    
+    def fetch(self) -> Iterator[Any]:
+        """Fetch the items of all result pages through the paginator."""
+        return paginate(
+            self.fetch_page,
+            read_page=self.read_page,
+            host=self.host,
+            page_size=self.page_size
+        )
+
+# Registered source classes by company identifier
+SOURCES: Dict[str, Type[Source]] = {}
+
+def register_source(cls: Type[Source]) -> Type[Source]:
+    """Class decorator adding a source to the registry.
+    
+    Raises:
+        ValueError: If the source has no name or the name is taken.
+        TypeError: If the source does not implement all required methods.
+    """
+    if not cls.name:
+        raise ValueError(f"Source {cls.__name__} has no name")
+    if inspect.isabstract(cls):
+        missing = ', '.join(sorted(cls.__abstractmethods__))
+        raise TypeError(f"Source {cls.__name__} does not implement {missing}")
+    if issubclass(cls, PagedSource) and not cls.items_path and cls.get_items is PagedSource.get_items:
+        raise TypeError(f"Source {cls.__name__} sets no items_path and does not implement get_items")
+    if cls.name in SOURCES and SOURCES[cls.name] is not cls:
+        raise ValueError(f"Duplicate source name: {cls.name}")
+    SOURCES[cls.name] = cls
+    return cls
+
+def discover_sources(package: str = 'jobs') -> List[Source]:
+    """Import all modules of a package and instantiate the registered sources.
+    
+    A module that fails to import is logged and skipped so one broken
+    source does not stop the others.
+    
+    Args:
+        package: Name of the package holding the source modules
+        
+    Returns:
+        List of source instances, ordered by name.
+    """
+    module = importlib.import_module(package)
+    for info in pkgutil.iter_modules(module.__path__):
+        if info.name.startswith('_'):
+            continue
+        try:
+            importlib.import_module(f'{package}.{info.name}')
+        except Exception as e:
+            logger.error(f"Failed to load source module {package}.{info.name}: {e}")
+    return [SOURCES[name]() for name in sorted(SOURCES)]
@@ -0,0 +1,1112 @@
+"""
+Storage backends for the job storage module.
+Each backend loads and persists the known job IDs per company, and provides
+them as a binary ID index that is only rebuilt when the stored data changed.
+Lifecycle data of a company has the form {'checked_at': timestamp,
+'open': {job_id: first_seen}, 'closed': {job_id: [first_seen, last_seen]}}.
+"""
+import base64
+import datetime
+import json
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from config import (
+    GITHUB_STORAGE_URL, GITHUB_SEGMENTS_URL, GITHUB_OUTBOX_URL, GITHUB_HISTORY_URL, GITHUB_POSTINGS_URL,
+    GITHUB_POSTINGS_SEGMENTS_URL, GITHUB_LIFECYCLE_URL, GITHUB_LIFECYCLE_SEGMENTS_URL, GITHUB_COMPACT_SEGMENTS,
+    GITHUB_TOKEN, REQUEST_TIMEOUT, ID_INDEX_PATH,
+    STORAGE_BACKEND, SQLITE_STORAGE_PATH, JSON_STORAGE_PATH
+)
+from utils import http_client
+from utils.http_cache import cached_request
+from utils.id_index import IdIndex, write_index
+from utils.similarity import Record
+
+logger = logging.getLogger(__name__)
+
+COMMITTER = {
+    'name': 'Auto Data Updater | by wiestju',
+    'email': 'b267a@protonmail.com'
+}
+
+class StorageBackend(ABC):
+    """Interface for job storage backends."""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def load(self) -> Optional[Dict[str, List[str]]]:
+        """Load known job IDs.
+        
+        Returns:
+            Mapping of company to list of job IDs, or None if error occurred.
+        """
+    
+    def load_index(self, path: str = ID_INDEX_PATH) -> Optional[Tuple[IdIndex, Dict[str, List[str]]]]:
+        """Load known job IDs as a binary index plus the IDs not in it.
+        
+        The default loads all IDs and builds a new index from them. Backends
+        that can tell whether their data changed reuse the index file instead.
+        
+        Args:
+            path: Index file path (empty = memory only)
+        
+        Returns:
+            Tuple of (index, further job IDs per company), or None if error
+            occurred.
+        """
+        data = self.load()
+        if data is None:
+            return None
+        return write_index(path, data), {}
+    
+    @abstractmethod
+    def save(
+        self,
+        export: Callable[[], Dict[str, List[str]]],
+        added: Dict[str, List[str]],
+        removed: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """Persist known job IDs.
+        
+        Args:
+            export: Function returning all known job IDs per company,
+                including added ones; only called to rewrite the full data
+            added: Job IDs added since the last load or save, per company
+            removed: Job IDs evicted since the last load or save, per company
+        
+        Returns:
+            True if successful, False otherwise.
+        """
+    
+    @abstractmethod
+    def load_outbox(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load notifications that were not delivered in earlier runs.
+        
+        Returns:
+            Mapping of outbox key to entry, or None if error occurred.
+        """
+    
+    @abstractmethod
+    def save_outbox(self, outbox: Dict[str, Dict[str, Any]]) -> bool:
+        """Replace the stored outbox.
+        
+        Args:
+            outbox: Mapping of outbox key to entry with company, job_id,
+                payload, attempts and, once it failed, first_failed_at
+        
+        Returns:
+            True if successful, False otherwise.
+        """
+    
+    @abstractmethod
+    def load_history(self) -> Optional[Dict[str, List[float]]]:
+        """Load the times at which new job IDs appeared.
+        
+        Returns:
+            Mapping of company to ascending Unix timestamps, or None if
+            error occurred.
+        """
+    
+    @abstractmethod
+    def save_history(self, history: Dict[str, List[float]]) -> bool:
+        """Replace the stored change history.
+        
+        Args:
+            history: Mapping of company to ascending Unix timestamps
+        
+        Returns:
+            True if successful, False otherwise.
+        """
+    
+    @abstractmethod
+    def load_postings(self) -> Optional[Dict[str, List[Record]]]:
+        """Load the notified postings kept for repost detection.
+        
+        Returns:
+            Mapping of company to [job_id, title, team, location, notified_at]
+            records, oldest first, or None if error occurred.
+        """
+    
+    @abstractmethod
+    def save_postings(self, added: Dict[str, List[Record]], since: float) -> bool:
+        """Store newly notified postings and drop old ones.
+        
+        Args:
+            added: Records notified since the last load or save, per company
+            since: Unix timestamp before which notified postings are dropped
+        
+        Returns:
+            True if successful, False otherwise.
+        """
+    
+    @abstractmethod
+    def load_lifecycle(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load when the stored job IDs were first and last seen.
+        
+        Returns:
+            Mapping of company to lifecycle data, or None if error occurred.
+        """
+    
+    @abstractmethod
+    def save_lifecycle(self, lifecycle: Dict[str, Dict[str, Any]], changed: Dict[str, Set[str]]) -> bool:
+        """Store the lifecycle data of job IDs that opened, closed or were evicted.
+        
+        Args:
+            lifecycle: Mapping of company to lifecycle data
+            changed: Job IDs whose lifecycle data changed, per company; an
+                ID missing from the lifecycle data was evicted
+        
+        Returns:
+            True if successful, False otherwise.
+        """
+
+class GitHubBackend(StorageBackend):
+    """Stores known job IDs in a GitHub repository via the contents API.
+    
+    The data is kept as a base snapshot (known_jobs.json) plus small delta
+    segments holding only the IDs added by one save. Segments are folded
+    back into the snapshot once there are too many of them, so a regular
+    save only uploads the new IDs instead of the whole history.
+    """
+    
+    name = 'github'
+    
+    def __init__(
+        self,
+        url: str = GITHUB_STORAGE_URL,
+        segments_url: str = GITHUB_SEGMENTS_URL,
+        outbox_url: str = GITHUB_OUTBOX_URL,
+        history_url: str = GITHUB_HISTORY_URL,
+        postings_url: str = GITHUB_POSTINGS_URL,
+        postings_segments_url: str = GITHUB_POSTINGS_SEGMENTS_URL,
+        lifecycle_url: str = GITHUB_LIFECYCLE_URL,
+        lifecycle_segments_url: str = GITHUB_LIFECYCLE_SEGMENTS_URL,
+        token: Optional[str] = GITHUB_TOKEN,
+        compact_segments: int = GITHUB_COMPACT_SEGMENTS
+    ):
+        self.url = url
+        self.segments_url = segments_url
+        self.outbox_url = outbox_url
+        self.history_url = history_url
+        self.postings_url = postings_url
+        self.postings_segments_url = postings_segments_url
+        self.lifecycle_url = lifecycle_url
+        self.lifecycle_segments_url = lifecycle_segments_url
+        self.token = token
+        self.compact_segments = compact_segments
+        self.sha: Optional[str] = None
+        # Segment file name -> SHA, needed to delete segments on compaction
+        self.segments: Dict[str, str] = {}
+        self.outbox_sha: Optional[str] = None
+        # Last outbox read from or written to GitHub, to skip no-op commits
+        self.outbox_saved: Dict[str, Dict[str, Any]] = {}
+        self.history_sha: Optional[str] = None
+        self.history_saved: Dict[str, List[float]] = {}
+        self.postings_sha: Optional[str] = None
+        self.postings_saved: Dict[str, List[Record]] = {}
+        self.postings_segments: Dict[str, str] = {}
+        self.lifecycle_sha: Optional[str] = None
+        self.lifecycle_segments: Dict[str, str] = {}
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {self.token}',
+            'Accept': 'application/vnd.github+json',
+            'X-GitHub-Api-Version': '2022-11-28',
+        }
+    
+    def _get_file(self, url: str) -> Tuple[Any, str]:
+        """Download and decode a JSON file from the contents API.
+        
+        Returns:
+            Tuple of (parsed JSON content, file SHA).
+        """
+        # A 304 Not Modified is answered from the cached body and SHA
+        r = cached_request('GET', url, store_body=True, headers=self._headers(), timeout=REQUEST_TIMEOUT)
+        response_data = r.json()
+        r.commit()
+        
+        content_str = base64.b64decode(response_data['content'].encode()).decode()
+        return json.loads(content_str), response_data['sha']
+    
+    def _get_optional_file(self, url: str) -> Tuple[Any, Optional[str]]:
+        """Like _get_file(), but a missing file reads as empty with no SHA."""
+        try:
+            return self._get_file(url)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return {}, None
+            raise
+    
+    def _put_file(self, url: str, data: Any, message: str, sha: Optional[str] = None) -> Optional[str]:
+        """Create or replace a JSON file through the contents API.
+        
+        Returns:
+            SHA of the written file, if the API reported it.
+        """
+        content_json = json.dumps(data, separators=(',', ':'))
+        body = {
+            'message': message,
+            'committer': COMMITTER,
+            'content': base64.b64encode(content_json.encode()).decode(),
+        }
+        if sha:
+            body['sha'] = sha
+        
+        r = http_client.put(url, headers=self._headers(), json=body, timeout=REQUEST_TIMEOUT)
+        r.raise_for_status()
+        
+        try:
+            return r.json()['content']['sha']
+        except (ValueError, KeyError, TypeError):
+            return None
+    
+    def _list_segments(self, url: str) -> Dict[str, Dict[str, str]]:
+        """List the delta segment files in a directory, keyed by file name."""
+        try:
+            r = cached_request('GET', url, store_body=True, headers=self._headers(), timeout=REQUEST_TIMEOUT)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return {}
+            raise
+        
+        entries = {
+            entry['name']: entry
+            for entry in r.json()
+            if entry.get('type') == 'file' and entry['name'].endswith('.json')
+        }
+        r.commit()
+        return entries
+    
+    def _read_segments(self, url: str) -> Tuple[List[Any], Dict[str, str]]:
+        """Download the delta segments in a directory.
+        
+        Returns:
+            Tuple of (segment contents, oldest first; file name -> SHA).
+        """
+        contents = []
+        segments = {}
+        entries = self._list_segments(url)
+        for name in sorted(entries):
+            segment, sha = self._get_file(entries[name]['url'])
+            contents.append(segment)
+            segments[name] = sha
+        return contents, segments
+    
+    def _load_segments(self) -> Dict[str, List[str]]:
+        """Load all delta segments of the known job IDs, merged per company."""
+        data: Dict[str, List[str]] = {}
+        contents, self.segments = self._read_segments(self.segments_url)
+        for segment in contents:
+            for company, job_ids in segment.items():
+                data.setdefault(company, []).extend(job_ids)
+        return data
+    
+    def _put_segment(self, url: str, segments: Dict[str, str], data: Any, message: str) -> str:
+        """Upload a new delta segment into a directory and record it in segments.
+        
+        Returns:
+            File name of the segment.
+        """
+        name = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%fZ') + '.json'
+        sha = self._put_file(f'{url}/{name}', data, message)
+        segments[name] = sha or ''
+        return name
+    
+    def _delete_segments(self, url: str, segments: Dict[str, str]) -> None:
+        """Delete folded delta segments, removing the deleted ones from segments.
+        
+        Segments that fail to delete are kept and only logged.
+        """
+        if any(not sha for sha in segments.values()):
+            try:
+                segments.update({name: entry['sha'] for name, entry in self._list_segments(url).items()})
+            except (requests.RequestException, ValueError, KeyError) as e:
+                logger.warning(f"Failed to list delta segments for compaction: {e}")
+        
+        for name, sha in list(segments.items()):
+            try:
+                r = http_client.delete(
+                    f'{url}/{name}',
+                    headers=self._headers(),
+                    json={'message': f'Compact {name}', 'committer': COMMITTER, 'sha': sha},
+                    timeout=REQUEST_TIMEOUT
+                )
+                r.raise_for_status()
+                del segments[name]
+            except requests.RequestException as e:
+                logger.warning(f"Failed to delete delta segment {name}: {e}")
+    
+    def load(self) -> Optional[Dict[str, List[str]]]:
+        """Load the base snapshot and all delta segments from GitHub."""
+        try:
+            data, self.sha = self._get_file(self.url)
+            for company, job_ids in self._load_segments().items():
+                data.setdefault(company, []).extend(job_ids)
+            
+            logger.info(
+                f"Loaded job storage from GitHub (SHA: {self.sha[:7]}, "
+                f"{len(self.segments)} delta segment(s))"
+            )
+            return data
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load job storage from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse job storage data: {e}")
+            return None
+    
+    def load_index(self, path: str = ID_INDEX_PATH) -> Optional[Tuple[IdIndex, Dict[str, List[str]]]]:
+        """Load the base snapshot as an index and the delta segments as further IDs.
+        
+        The index is tagged with the snapshot SHA. While the snapshot is
+        unchanged on GitHub, the index file is reused without decoding the
+        snapshot at all.
+        """
+        try:
+            r = cached_request('GET', self.url, store_body=True, headers=self._headers(), timeout=REQUEST_TIMEOUT)
+            sha = r.meta.get('sha') if r.unchanged else None
+            index = IdIndex.open(path) if path else None
+            
+            if index is None or sha is None or index.tag != f'github:{sha}':
+                response_data = r.json()
+                sha = response_data['sha']
+                data = json.loads(base64.b64decode(response_data['content'].encode()).decode())
+                index = write_index(path, data, f'github:{sha}')
+                logger.info(f"Rebuilt job ID index from snapshot {sha[:7]}")
+            r.meta['sha'] = sha
+            r.commit()
+            self.sha = sha
+            
+            segments = self._load_segments()
+            logger.info(
+                f"Loaded job storage from GitHub (SHA: {self.sha[:7]}, "
+                f"{len(self.segments)} delta segment(s))"
+            )
+            return index, segments
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load job storage from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse job storage data: {e}")
+            return None
+    
+    def save(
+        self,
+        export: Callable[[], Dict[str, List[str]]],
+        added: Dict[str, List[str]],
+        removed: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """Append new job IDs as a delta segment, compacting when needed.
+        
+        Segments can only add IDs, so evicting IDs rewrites the snapshot.
+        """
+        if len(self.segments) + 1 >= self.compact_segments:
+            return self.compact(export())
+        if removed and any(removed.values()):
+            logger.info(f"Compacting job storage to drop {sum(len(ids) for ids in removed.values())} evicted job IDs")
+            return self.compact(export())
+        
+        added = {company: job_ids for company, job_ids in added.items() if job_ids}
+        
+        try:
+            name = self._put_segment(
+                self.segments_url,
+                self.segments,
+                added,
+                f'Add {sum(len(job_ids) for job_ids in added.values())} new job IDs'
+            )
+            
+            logger.info(f"Saved delta segment {name} to GitHub")
+            return True
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to save job storage to GitHub: {e}")
+            return False
+    
+    def compact(self, content: Dict[str, List[str]]) -> bool:
+        """Rewrite the base snapshot with all IDs and delete merged segments.
+        
+        Segments that fail to delete are harmless: their IDs are already in
+        the snapshot and are deduplicated on the next load. Evicted IDs in
+        them are known again, as they were before the eviction.
+        """
+        try:
+            self.sha = self._put_file(self.url, content, 'Daily data update', self.sha) or self.sha
+        except requests.RequestException as e:
+            logger.error(f"Failed to save job storage to GitHub: {e}")
+            return False
+        
+        self._delete_segments(self.segments_url, self.segments)
+        logger.info("Compacted job storage on GitHub")
+        return True
+    
+    def load_outbox(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the outbox file from GitHub, which may not exist yet."""
+        try:
+            outbox, self.outbox_sha = self._get_optional_file(self.outbox_url)
+            self.outbox_saved = {key: dict(entry) for key, entry in outbox.items()}
+            return outbox
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load outbox from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse outbox data: {e}")
+            return None
+    
+    def save_outbox(self, outbox: Dict[str, Dict[str, Any]]) -> bool:
+        """Write the outbox file to GitHub."""
+        if outbox == self.outbox_saved:
+            return True
+        
+        try:
+            self.outbox_sha = self._put_file(
+                self.outbox_url,
+                outbox,
+                f'Update outbox ({len(outbox)} pending)',
+                self.outbox_sha
+            ) or self.outbox_sha
+            self.outbox_saved = {key: dict(entry) for key, entry in outbox.items()}
+            return True
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to save outbox to GitHub: {e}")
+            return False
+    
+    def load_history(self) -> Optional[Dict[str, List[float]]]:
+        """Load the change history file from GitHub, which may not exist yet."""
+        try:
+            history, self.history_sha = self._get_optional_file(self.history_url)
+            self.history_saved = {company: list(times) for company, times in history.items()}
+            return history
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load change history from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse change history data: {e}")
+            return None
+    
+    def save_history(self, history: Dict[str, List[float]]) -> bool:
+        """Write the change history file to GitHub."""
+        if history == self.history_saved:
+            return True
+        
+        try:
+            self.history_sha = self._put_file(
+                self.history_url,
+                history,
+                'Update change history',
+                self.history_sha
+            ) or self.history_sha
+            self.history_saved = {company: list(times) for company, times in history.items()}
+            return True
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to save change history to GitHub: {e}")
+            return False
+    
+    def load_postings(self) -> Optional[Dict[str, List[Record]]]:
+        """Load the notified postings file and its delta segments from GitHub.
+        
+        Neither may exist yet. Records of a segment that was already folded
+        into the file are skipped.
+        """
+        try:
+            postings, self.postings_sha = self._get_optional_file(self.postings_url)
+            contents, self.postings_segments = self._read_segments(self.postings_segments_url)
+            for segment in contents:
+                for company, records in segment.items():
+                    stored = postings.setdefault(company, [])
+                    seen = {tuple(record) for record in stored}
+                    stored.extend(record for record in records if tuple(record) not in seen)
+            self.postings_saved = {company: list(records) for company, records in postings.items()}
+            return postings
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load notified postings from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse notified postings data: {e}")
+            return None
+    
+    def save_postings(self, added: Dict[str, List[Record]], since: float) -> bool:
+        """Append the added postings as a delta segment, compacting when needed.
+        
+        Postings older than since are only dropped on compaction, which
+        rewrites the postings file with all remaining ones.
+        """
+        added = {company: records for company, records in added.items() if records}
+        if not added:
+            return True
+        message = f'Add {sum(len(records) for records in added.values())} notified postings'
+        
+        try:
+            if len(self.postings_segments) + 1 < self.compact_segments:
+                self._put_segment(self.postings_segments_url, self.postings_segments, added, message)
+                for company, records in added.items():
+                    self.postings_saved.setdefault(company, []).extend(records)
+                return True
+            
+            postings: Dict[str, List[Record]] = {}
+            for company in {**self.postings_saved, **added}:
+                records = self.postings_saved.get(company, []) + added.get(company, [])
+                records = [record for record in records if record[4] >= since]
+                if records:
+                    postings[company] = records
+            self.postings_sha = self._put_file(self.postings_url, postings, message, self.postings_sha) or self.postings_sha
+            self.postings_saved = postings
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to save notified postings to GitHub: {e}")
+            return False
+        
+        self._delete_segments(self.postings_segments_url, self.postings_segments)
+        logger.info("Compacted notified postings on GitHub")
+        return True
+    
+    def load_lifecycle(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the lifecycle file from GitHub and apply its delta segments.
+        
+        Neither may exist yet. A segment that was already folded into the
+        file replays older changes; the next complete check of the company
+        corrects them.
+        """
+        try:
+            lifecycle, self.lifecycle_sha = self._get_optional_file(self.lifecycle_url)
+            contents, self.lifecycle_segments = self._read_segments(self.lifecycle_segments_url)
+            for segment in contents:
+                for company, delta in segment.items():
+                    state = lifecycle.setdefault(company, {'checked_at': delta['checked_at'], 'open': {}, 'closed': {}})
+                    state['checked_at'] = delta['checked_at']
+                    for job_id in [*delta.get('open', ()), *delta.get('closed', ()), *delta.get('removed', ())]:
+                        state['open'].pop(job_id, None)
+                        state['closed'].pop(job_id, None)
+                    state['open'].update(delta.get('open', {}))
+                    state['closed'].update(delta.get('closed', {}))
+            return lifecycle
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to load job lifecycle from GitHub: {e}")
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse job lifecycle data: {e}")
+            return None
+    
+    def save_lifecycle(self, lifecycle: Dict[str, Dict[str, Any]], changed: Dict[str, Set[str]]) -> bool:
+        """Append the changed job IDs as a delta segment, compacting when needed.
+        
+        A segment holds the check time of every company and the current
+        state of its changed IDs; IDs in neither open nor closed were evicted.
+        """
+        if not any(changed.values()):
+            return True
+        message = f'Update lifecycle of {sum(len(job_ids) for job_ids in changed.values())} job IDs'
+        
+        try:
+            if len(self.lifecycle_segments) + 1 < self.compact_segments:
+                delta: Dict[str, Dict[str, Any]] = {}
+                for company, state in lifecycle.items():
+                    job_ids = changed.get(company, set())
+                    delta[company] = {'checked_at': state['checked_at']}
+                    if job_ids:
+                        delta[company]['open'] = {
+                            job_id: state['open'][job_id] for job_id in job_ids if job_id in state['open']
+                        }
+                        delta[company]['closed'] = {
+                            job_id: state['closed'][job_id] for job_id in job_ids if job_id in state['closed']
+                        }
+                        delta[company]['removed'] = sorted(
+                            job_id for job_id in job_ids if job_id not in state['open'] and job_id not in state['closed']
+                        )
+                self._put_segment(self.lifecycle_segments_url, self.lifecycle_segments, delta, message)
+                return True
+            
+            self.lifecycle_sha = self._put_file(
+                self.lifecycle_url,
+                lifecycle,
+                message,
+                self.lifecycle_sha
+            ) or self.lifecycle_sha
+        
+        except requests.RequestException as e:
+            logger.error(f"Failed to save job lifecycle to GitHub: {e}")
+            return False
+        
+        self._delete_segments(self.lifecycle_segments_url, self.lifecycle_segments)
+        logger.info("Compacted job lifecycle on GitHub")
+        return True
+
+# IDs added since the SQLite index was built that are always tolerated before a rebuild
+SQLITE_INDEX_SLACK = 1000
+
+class SQLiteBackend(StorageBackend):
+    """Stores known job IDs in a local SQLite database."""
+    
+    name = 'sqlite'
+    
+    def __init__(self, path: str = SQLITE_STORAGE_PATH, seed_path: Optional[str] = JSON_STORAGE_PATH):
+        self.path = path
+        self.seed_path = seed_path
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection and make sure the schema exists."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = sqlite3.connect(self.path, timeout=REQUEST_TIMEOUT)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS known_jobs ('
+            'company TEXT NOT NULL, '
+            'job_id TEXT NOT NULL, '
+            'PRIMARY KEY (company, job_id)'
+            ') WITHOUT ROWID'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS known_jobs_delta ('
+            'version INTEGER NOT NULL, '
+            'company TEXT NOT NULL, '
+            'job_id TEXT NOT NULL'
+            ')'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS known_jobs_delta_version ON known_jobs_delta (version)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS known_jobs_evictions ('
+            'version INTEGER PRIMARY KEY, '
+            'count INTEGER NOT NULL'
+            ')'
+        )
+        # Highest version whose delta rows were deleted after an index rebuild
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS known_jobs_meta ('
+            'key TEXT PRIMARY KEY, '
+            'value INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'company TEXT NOT NULL, '
+            'job_id TEXT NOT NULL, '
+            'payload TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'first_failed_at INTEGER, '
+            'PRIMARY KEY (company, job_id)'
+            ') WITHOUT ROWID'
+        )
+        # Databases created before failures were timed lack the column
+        if 'first_failed_at' not in {row[1] for row in conn.execute('PRAGMA table_info(outbox)')}:
+            conn.execute('ALTER TABLE outbox ADD COLUMN first_failed_at INTEGER')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS change_history ('
+            'company TEXT NOT NULL, '
+            'seen_at INTEGER NOT NULL, '
+            'PRIMARY KEY (company, seen_at)'
+            ') WITHOUT ROWID'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS notified_postings ('
+            'company TEXT NOT NULL, '
+            'job_id TEXT NOT NULL, '
+            'title TEXT, '
+            'team TEXT, '
+            'location TEXT, '
+            'notified_at INTEGER NOT NULL, '
+            'PRIMARY KEY (company, job_id)'
+            ') WITHOUT ROWID'
+        )
+        # last_seen is NULL while the posting is open
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_lifecycle ('
+            'company TEXT NOT NULL, '
+            'job_id TEXT NOT NULL, '
+            'first_seen INTEGER, '
+            'last_seen INTEGER, '
+            'PRIMARY KEY (company, job_id)'
+            ') WITHOUT ROWID'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS lifecycle_checks ('
+            'company TEXT PRIMARY KEY, '
+            'checked_at INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        return conn
+    
+    def _seed(self, conn: sqlite3.Connection) -> None:
+        """Import a known_jobs.json file into an empty database.
+        
+        This avoids re-announcing every known job when switching backends.
+        """
+        if not self.seed_path or not os.path.exists(self.seed_path):
+            return
+        
+        with open(self.seed_path, encoding='utf-8') as f:
+            data = json.load(f)
+        
+        with conn:
+            self._insert(conn, data)
+        logger.info(f"Seeded SQLite job storage from {self.seed_path}")
+    
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, data: Dict[str, List[str]]) -> None:
+        """Upsert job IDs, ignoring ones that are already stored."""
+        conn.executemany(
+            'INSERT INTO known_jobs (company, job_id) VALUES (?, ?) '
+            'ON CONFLICT (company, job_id) DO NOTHING',
+            ((company, str(job_id)) for company, job_ids in data.items() for job_id in job_ids)
+        )
+        # Each insert is a new data version; the delta table lets an ID index
+        # of an older version catch up without being rebuilt
+        version = conn.execute('PRAGMA user_version').fetchone()[0] + 1
+        conn.execute(f'PRAGMA user_version = {version}')
+        conn.executemany(
+            'INSERT INTO known_jobs_delta (version, company, job_id) VALUES (?, ?, ?)',
+            ((version, company, str(job_id)) for company, job_ids in data.items() for job_id in job_ids)
+        )
+    
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, data: Dict[str, List[str]]) -> None:
+        """Delete evicted job IDs."""
+        conn.executemany(
+            'DELETE FROM known_jobs WHERE company = ? AND job_id = ?',
+            ((company, str(job_id)) for company, job_ids in data.items() for job_id in job_ids)
+        )
+        # The delta table can only add IDs, so an ID index of an older
+        # version has to be rebuilt; the eviction records its version
+        version = conn.execute('PRAGMA user_version').fetchone()[0] + 1
+        conn.execute(f'PRAGMA user_version = {version}')
+        conn.execute(
+            'INSERT INTO known_jobs_evictions (version, count) VALUES (?, ?)',
+            (version, sum(len(job_ids) for job_ids in data.values()))
+        )
+    
+    def load(self) -> Optional[Dict[str, List[str]]]:
+        """Load job data from the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                if conn.execute('SELECT 1 FROM known_jobs LIMIT 1').fetchone() is None:
+                    self._seed(conn)
+                
+                data: Dict[str, List[str]] = {}
+                for company, job_id in conn.execute('SELECT company, job_id FROM known_jobs'):
+                    data.setdefault(company, []).append(job_id)
+            finally:
+                conn.close()
+            
+            logger.info(f"Loaded job storage from SQLite ({self.path})")
+            return data
+        
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"Failed to load job storage from SQLite: {e}")
+            return None
+    
+    @staticmethod
+    def _pruned_version(conn: sqlite3.Connection, version: int) -> int:
+        """Highest version whose delta rows may have been deleted."""
+        row = conn.execute("SELECT value FROM known_jobs_meta WHERE key = 'pruned'").fetchone()
+        if row is not None:
+            return row[0]
+        
+        # Databases from before pruning was recorded may lack any rows below the oldest kept one
+        oldest = conn.execute('SELECT MIN(version) FROM known_jobs_delta').fetchone()[0]
+        pruned = oldest - 1 if oldest is not None else version
+        with conn:
+            conn.execute("INSERT INTO known_jobs_meta (key, value) VALUES ('pruned', ?)", (pruned,))
+        return pruned
+    
+    def load_index(self, path: str = ID_INDEX_PATH) -> Optional[Tuple[IdIndex, Dict[str, List[str]]]]:
+        """Load the known job IDs as an index plus the IDs added since it was built.
+        
+        The index is tagged with the database version it was built from and
+        only rebuilt once the IDs added since then outgrow a tenth of it, or
+        IDs were evicted since then. An index older than the delta rows still
+        kept, e.g. a stale copy restored from a cache, is rebuilt as well.
+        """
+        try:
+            conn = self._connect()
+            try:
+                if conn.execute('SELECT 1 FROM known_jobs LIMIT 1').fetchone() is None:
+                    self._seed(conn)
+                
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                prefix = f'sqlite:{os.path.abspath(self.path)}:'
+                index = IdIndex.open(path) if path else None
+                built = int(index.tag[len(prefix):]) if index is not None and index.tag.startswith(prefix) else -1
+                evicted = conn.execute('SELECT MAX(version) FROM known_jobs_evictions').fetchone()[0] or 0
+                pruned = self._pruned_version(conn, version)
+                
+                delta: Dict[str, List[str]] = {}
+                count = 0
+                if 0 <= built <= version:
+                    rows = conn.execute(
+                        'SELECT company, job_id FROM known_jobs_delta WHERE version > ?', (built,)
+                    )
+                    for company, job_id in rows:
+                        delta.setdefault(company, []).append(job_id)
+                        count += 1
+                
+                if (built < max(evicted, pruned) or built > version
+                        or count > len(index) // 10 + SQLITE_INDEX_SLACK):
+                    data: Dict[str, List[str]] = {}
+                    for company, job_id in conn.execute('SELECT company, job_id FROM known_jobs'):
+                        data.setdefault(company, []).append(job_id)
+                    index = write_index(path, data, f'{prefix}{version}')
+                    delta = {}
+                    with conn:
+                        conn.execute('DELETE FROM known_jobs_delta WHERE version <= ?', (version,))
+                        conn.execute("UPDATE known_jobs_meta SET value = ? WHERE key = 'pruned'", (version,))
+                    logger.info(f"Rebuilt job ID index from SQLite (version {version})")
+            finally:
+                conn.close()
+            
+            logger.info(f"Loaded job storage from SQLite ({self.path})")
+            return index, delta
+        
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"Failed to load job storage from SQLite: {e}")
+            return None
+    
+    def save(
+        self,
+        export: Callable[[], Dict[str, List[str]]],
+        added: Dict[str, List[str]],
+        removed: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """Insert newly added job IDs into the SQLite database and delete evicted ones."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    if removed and any(removed.values()):
+                        self._delete(conn, removed)
+                    if any(added.values()):
+                        self._insert(conn, added)
+            finally:
+                conn.close()
+            
+            logger.info("Successfully saved job storage to SQLite")
+            return True
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save job storage to SQLite: {e}")
+            return False
+    
+    def load_outbox(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the outbox from the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute('SELECT company, job_id, payload, attempts, first_failed_at FROM outbox').fetchall()
+            finally:
+                conn.close()
+            
+            outbox = {}
+            for company, job_id, payload, attempts, first_failed_at in rows:
+                entry = {'company': company, 'job_id': job_id, 'payload': json.loads(payload), 'attempts': attempts}
+                if first_failed_at is not None:
+                    entry['first_failed_at'] = first_failed_at
+                outbox[f'{company}:{job_id}'] = entry
+            return outbox
+        
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Failed to load outbox from SQLite: {e}")
+            return None
+    
+    def save_outbox(self, outbox: Dict[str, Dict[str, Any]]) -> bool:
+        """Replace the outbox in the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('DELETE FROM outbox')
+                    conn.executemany(
+                        'INSERT INTO outbox (company, job_id, payload, attempts, first_failed_at) VALUES (?, ?, ?, ?, ?)',
+                        (
+                            (
+                                entry['company'], entry['job_id'], json.dumps(entry['payload']),
+                                entry.get('attempts', 0), entry.get('first_failed_at')
+                            )
+                            for entry in outbox.values()
+                        )
+                    )
+            finally:
+                conn.close()
+            return True
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save outbox to SQLite: {e}")
+            return False
+    
+    def load_history(self) -> Optional[Dict[str, List[float]]]:
+        """Load the change history from the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute('SELECT company, seen_at FROM change_history ORDER BY company, seen_at').fetchall()
+            finally:
+                conn.close()
+            
+            history: Dict[str, List[float]] = {}
+            for company, seen_at in rows:
+                history.setdefault(company, []).append(seen_at)
+            return history
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load change history from SQLite: {e}")
+            return None
+    
+    def save_history(self, history: Dict[str, List[float]]) -> bool:
+        """Replace the change history in the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('DELETE FROM change_history')
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO change_history (company, seen_at) VALUES (?, ?)',
+                        ((company, seen_at) for company, times in history.items() for seen_at in times)
+                    )
+            finally:
+                conn.close()
+            return True
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save change history to SQLite: {e}")
+            return False
+    
+    def load_postings(self) -> Optional[Dict[str, List[Record]]]:
+        """Load the notified postings from the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    'SELECT company, job_id, title, team, location, notified_at FROM notified_postings '
+                    'ORDER BY notified_at'
+                ).fetchall()
+            finally:
+                conn.close()
+            
+            postings: Dict[str, List[Record]] = {}
+            for company, *record in rows:
+                postings.setdefault(company, []).append(record)
+            return postings
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load notified postings from SQLite: {e}")
+            return None
+    
+    def save_postings(self, added: Dict[str, List[Record]], since: float) -> bool:
+        """Insert the added postings into the SQLite database and delete old ones."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO notified_postings '
+                        '(company, job_id, title, team, location, notified_at) VALUES (?, ?, ?, ?, ?, ?)',
+                        ((company, *record) for company, records in added.items() for record in records)
+                    )
+                    conn.execute('DELETE FROM notified_postings WHERE notified_at < ?', (since,))
+            finally:
+                conn.close()
+            return True
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save notified postings to SQLite: {e}")
+            return False
+    
+    def load_lifecycle(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the job lifecycle from the SQLite database."""
+        try:
+            conn = self._connect()
+            try:
+                checks = conn.execute('SELECT company, checked_at FROM lifecycle_checks').fetchall()
+                rows = conn.execute('SELECT company, job_id, first_seen, last_seen FROM job_lifecycle').fetchall()
+            finally:
+                conn.close()
+            
+            lifecycle: Dict[str, Dict[str, Any]] = {
+                company: {'checked_at': checked_at, 'open': {}, 'closed': {}} for company, checked_at in checks
+            }
+            for company, job_id, first_seen, last_seen in rows:
+                state = lifecycle.setdefault(company, {'checked_at': 0, 'open': {}, 'closed': {}})
+                if last_seen is None:
+                    state['open'][job_id] = first_seen
+                else:
+                    state['closed'][job_id] = [first_seen, last_seen]
+            return lifecycle
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load job lifecycle from SQLite: {e}")
+            return None
+    
+    def save_lifecycle(self, lifecycle: Dict[str, Dict[str, Any]], changed: Dict[str, Set[str]]) -> bool:
+        """Update the changed job IDs in the SQLite database."""
+        upserts = []
+        deletes = []
+        for company, job_ids in changed.items():
+            state = lifecycle.get(company, {})
+            opened = state.get('open', {})
+            closed = state.get('closed', {})
+            for job_id in job_ids:
+                if job_id in opened:
+                    upserts.append((company, job_id, opened[job_id], None))
+                elif job_id in closed:
+                    upserts.append((company, job_id, *closed[job_id]))
+                else:
+                    deletes.append((company, job_id))
+        
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO lifecycle_checks (company, checked_at) VALUES (?, ?)',
+                        ((company, lifecycle[company]['checked_at']) for company in changed if company in lifecycle)
+                    )
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO job_lifecycle (company, job_id, first_seen, last_seen) '
+                        'VALUES (?, ?, ?, ?)',
+                        upserts
+                    )
+                    conn.executemany('DELETE FROM job_lifecycle WHERE company = ? AND job_id = ?', deletes)
+            finally:
+                conn.close()
+            return True
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save job lifecycle to SQLite: {e}")
+            return False
+
+BACKENDS = {
+    GitHubBackend.name: GitHubBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+def create_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """Create a storage backend by name.
+    
+    Args:
+        name: Backend identifier (e.g., 'github', 'sqlite')
+    
+    Returns:
+        New storage backend instance.
+    
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}")
+    return BACKENDS[name]()
\ No newline at end of file
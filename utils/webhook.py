@@ -1,14 +1,126 @@
 """
 Webhook module for sending Discord notifications about new jobs.
 """
+import datetime
 import logging
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 import requests
-from config import WEBHOOK_URLS, REQUEST_TIMEOUT
+from config import WEBHOOK_URLS, REQUEST_TIMEOUT, WEBHOOK_MAX_RETRIES
+from utils import http_client, metrics
+from utils.job_posting import JobPosting
 
 logger = logging.getLogger(__name__)
 
+# Embed color and thumbnail per company
+COMPANY_STYLES: Dict[str, Dict[str, Any]] = {
+    'amazon': {
+        'color': int('FF9900', 16),
+        'thumbnail': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Fi.pinimg.com%2Foriginals%2F01%2Fca%2Fda%2F01cada77a0a7d326d85b7969fe26a728.jpg&f=1&nofb=1&ipt=a8ca1c611878925024fc134526698e3eb4cddf2dcf414253365c37e85112f708'
+    },
+    'microsoft': {
+        'color': int('F25022', 16),
+        'thumbnail': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Ftse1.mm.bing.net%2Fth%2Fid%2FOIP.6vG35pC3pcMANHZIPAT0twHaHa%3Fpid%3DApi&f=1&ipt=31c85567791d2c2042a71a829e48db38e241a4c4c1c98dee34a30219d266903a&ipo=images'
+    },
+    'facebook': {
+        'color': int('0668E1', 16),
+        'thumbnail': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Ftse1.mm.bing.net%2Fth%2Fid%2FOIP.mzp7qjNYxT5a1WBZG52e0AHaHI%3Fpid%3DApi&f=1&ipt=fda0ef3d260a3b9ae177d37c8589d107bf5dfd599d5077c87def5e76cf9b7e95&ipo=images'
+    },
+    'google': {
+        'color': int('4285F4', 16),  # Google Blue
+        'thumbnail': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Ftse1.mm.bing.net%2Fth%2Fid%2FOIP.KOKzZsAVKlqyZLa1L-ICYAHaHa%3Fpid%3DApi&f=1'
+    },
+    'apple': {
+        'color': int('A2AAAD', 16),  # Apple Gray
+        'thumbnail': 'https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Ftse1.mm.bing.net%2Fth%2Fid%2FOIP.u_w1ED64rKNAEt0D3CTZNAAAAA%3Fpid%3DApi&f=1&ipt=8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e8e&ipo=images'
+    },
+}
+
+# Discord limits per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# Discord limits per embed; longer texts and empty field values get the whole message rejected
+MAX_TITLE_CHARS = 256
+MAX_FIELDS = 25
+MAX_FIELD_NAME_CHARS = 256
+MAX_FIELD_VALUE_CHARS = 1024
+
+class RateLimiter:
+    """Paces webhook requests using Discord's rate limit headers.
+    
+    Discord reports the remaining requests of a bucket and when it resets.
+    Requests to an exhausted bucket wait for the reset instead of running
+    into a 429. Global rate limits pause all buckets.
+    """
+    
+    def __init__(self):
+        # Webhook URL -> Discord bucket ID, learned from responses
+        self.buckets: Dict[str, str] = {}
+        # Bucket ID (or URL until known) -> (remaining, reset time)
+        self.state: Dict[str, Tuple[int, float]] = {}
+        self.global_reset = 0.0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    def lock(self, url: str) -> threading.Lock:
+        """Get the lock that serializes requests to one webhook."""
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
+    
+    def wait(self, url: str) -> None:
+        """Sleep until a request to the webhook is allowed."""
+        with self._lock:
+            key = self.buckets.get(url, url)
+            remaining, reset_at = self.state.get(key, (1, 0.0))
+            until = self.global_reset
+            if remaining <= 0:
+                until = max(until, reset_at)
+        
+        delay = until - time.monotonic()
+        if delay > 0:
+            logger.debug(f"Waiting {delay:.2f}s for webhook rate limit")
+            time.sleep(delay)
+    
+    def update(self, url: str, r: requests.Response) -> None:
+        """Record the rate limit state reported by a response."""
+        headers = r.headers
+        now = time.monotonic()
+        with self._lock:
+            bucket = headers.get('X-RateLimit-Bucket')
+            if bucket:
+                self.buckets[url] = bucket
+            key = self.buckets.get(url, url)
+            
+            try:
+                remaining = int(headers['X-RateLimit-Remaining'])
+                reset_after = float(headers['X-RateLimit-Reset-After'])
+                self.state[key] = (remaining, now + reset_after)
+            except (KeyError, ValueError):
+                pass
+            
+            if r.status_code == 429:
+                retry_after = retry_after_seconds(r)
+                if headers.get('X-RateLimit-Global') or headers.get('X-RateLimit-Scope') == 'global':
+                    self.global_reset = max(self.global_reset, now + retry_after)
+                else:
+                    self.state[key] = (0, now + retry_after)
+
+def retry_after_seconds(r: requests.Response) -> float:
+    """Read the retry delay of a 429 response in seconds."""
+    try:
+        return float(r.headers['Retry-After'])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return float(r.json()['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
+
+_rate_limiter = RateLimiter()
+
 def send_webhook(company: str, payload: Dict[str, Any]) -> bool:
     """Send webhook notification for a new job posting.
     
@@ -19,22 +131,222 @@ def send_webhook(company: str, payload: Dict[str, Any]) -> bool:
     Returns:
         True if webhook sent successfully, False otherwise.
     """
+    return _deliver(company, payload)[0]
+
+def _deliver(company: str, payload: Dict[str, Any]) -> Tuple[bool, bool]:
+    """Send a webhook message, retrying rate limits and server errors.
+    
+    Returns:
+        Tuple of (delivered, rejected by Discord as an invalid payload).
+    """
     if company not in WEBHOOK_URLS:
         logger.error(f"No webhook URL configured for company: {company}")
-        return False
+        return False, False
     
     webhook_url = WEBHOOK_URLS[company]
     
-    try:
-        r = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=REQUEST_TIMEOUT
-        )
-        r.raise_for_status()
-        logger.debug(f"Webhook sent successfully for {company}")
+    # Requests to one webhook go out one at a time so pacing stays accurate
+    with _rate_limiter.lock(webhook_url):
+        for attempt in range(WEBHOOK_MAX_RETRIES + 1):
+            _rate_limiter.wait(webhook_url)
+            
+            try:
+                r = http_client.post(
+                    webhook_url,
+                    json=payload,
+                    timeout=REQUEST_TIMEOUT
+                )
+                _rate_limiter.update(webhook_url, r)
+                
+                if r.status_code == 429:
+                    metrics.incr('retries', kind='webhook', company=company)
+                    logger.warning(
+                        f"Webhook rate limited for {company}, retrying in {retry_after_seconds(r):.2f}s"
+                    )
+                    continue
+                
+                r.raise_for_status()
+                metrics.incr('webhook_messages', company=company)
+                logger.debug(f"Webhook sent successfully for {company}")
+                return True, False
+                
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status < 500:
+                    # Only a 400 is about the payload; other client errors, such as
+                    # a deleted webhook, fail any message sent to it
+                    logger.error(f"Failed to send webhook for {company}: {e}")
+                    return False, status == 400
+                if attempt == WEBHOOK_MAX_RETRIES:
+                    break
+                
+                backoff = 2 ** attempt
+                metrics.incr('retries', kind='webhook', company=company)
+                logger.warning(f"Failed to send webhook for {company}: {e}, retrying in {backoff}s")
+                time.sleep(backoff)
+    
+    logger.error(f"Failed to send webhook for {company} after {WEBHOOK_MAX_RETRIES + 1} attempts")
+    return False, False
+
+def _clamp(text: Any, limit: int) -> str:
+    """Fit a text into a Discord length limit; empty texts become a dash."""
+    text = str(text).strip() if text is not None else ''
+    if not text:
+        return '-'
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+def build_payload(posting: JobPosting) -> Dict[str, Any]:
+    """Render a job posting into a Discord webhook payload.
+    
+    Args:
+        posting: New job posting
+        
+    Returns:
+        Discord webhook payload with one embed.
+    """
+    style = COMPANY_STYLES.get(posting.company, {})
+    embed = {
+        'title': _clamp(f'New Internship: {posting.title}', MAX_TITLE_CHARS),
+        'url': posting.url,
+        'fields': [
+            {'name': _clamp(name, MAX_FIELD_NAME_CHARS), 'value': _clamp(value, MAX_FIELD_VALUE_CHARS)}
+            for name, value in posting.fields[:MAX_FIELDS]
+        ],
+        'timestamp': datetime.datetime.now().isoformat(),
+        'footer': {
+            'text': 'BigTech Internship Monitoring | by wiestju'
+        }
+    }
+    if style.get('thumbnail'):
+        embed['thumbnail'] = {'url': style['thumbnail']}
+    if style.get('color') is not None:
+        embed['color'] = style['color']
+    
+    return {
+        'username': 'BigTech Internship Monitoring',
+        'avatar_url': None,
+        'embeds': [embed]
+    }
+
+def embed_size(embed: Dict[str, Any]) -> int:
+    """Count the characters of an embed that Discord's size limit applies to."""
+    size = len(embed.get('title') or '') + len(embed.get('description') or '')
+    size += len((embed.get('footer') or {}).get('text') or '')
+    size += len((embed.get('author') or {}).get('name') or '')
+    for field in embed.get('fields', []):
+        size += len(str(field.get('name', ''))) + len(str(field.get('value', '')))
+    return size
+
+class WebhookBatcher:
+    """Collects embeds per company and sends them packed into few messages.
+    
+    If on_result is given, it is called after every sent batch with the keys
+    of the batched embeds and whether they were delivered. Discord rejects a
+    whole message for one invalid embed, so the embeds of a batch rejected
+    with a 400 are sent again one at a time and only the rejected ones fail.
+    Other client errors fail the whole batch.
+    """
+    
+    def __init__(self, on_result: Optional[Callable[[List[str], bool], None]] = None):
+        self.on_result = on_result
+        # Pending embeds, their keys and message settings (username, avatar) per company
+        self.embeds: Dict[str, List[Dict[str, Any]]] = {}
+        self.keys: Dict[str, List[str]] = {}
+        self.sizes: Dict[str, int] = {}
+        self.settings: Dict[str, Dict[str, Any]] = {}
+        self.failed = 0
+        self._lock = threading.Lock()
+    
+    def add(self, company: str, payload: Dict[str, Any], key: Optional[str] = None) -> bool:
+        """Queue the embeds of a webhook payload for batched delivery.
+        
+        A batch is sent as soon as one more embed would exceed Discord's
+        per-message limits.
+        
+        Args:
+            company: Company identifier (e.g., 'amazon', 'microsoft')
+            payload: Discord webhook payload with embed data
+            key: Identifier passed to on_result once the embeds were sent
+        
+        Returns:
+            True if queued, False if no webhook is configured for the company.
+        """
+        if company not in WEBHOOK_URLS:
+            logger.error(f"No webhook URL configured for company: {company}")
+            return False
+        
+        for embed in payload.get('embeds', []):
+            size = embed_size(embed)
+            with self._lock:
+                pending = self.embeds.setdefault(company, [])
+                if pending and (
+                    len(pending) >= MAX_EMBEDS_PER_MESSAGE
+                    or self.sizes[company] + size > MAX_EMBED_CHARS_PER_MESSAGE
+                ):
+                    batch = self._take(company)
+                else:
+                    batch = None
+                
+                self.embeds.setdefault(company, []).append(embed)
+                # One entry per embed, so the keys of rejected embeds can be told apart
+                self.keys.setdefault(company, []).append(key)
+                self.sizes[company] = self.sizes.get(company, 0) + size
+                self.settings.setdefault(
+                    company,
+                    {name: value for name, value in payload.items() if name != 'embeds'}
+                )
+            
+            if batch:
+                self._send(company, *batch)
         return True
+    
+    def _take(self, company: str) -> Tuple[Dict[str, Any], List[Optional[str]]]:
+        """Remove the pending embeds of a company and build a message from them."""
+        message = dict(self.settings.get(company, {}))
+        message['embeds'] = self.embeds.pop(company, [])
+        self.sizes.pop(company, None)
+        return message, self.keys.pop(company, [])
+    
+    def _send(self, company: str, message: Dict[str, Any], keys: List[Optional[str]]) -> bool:
+        embeds = message['embeds']
+        delivered, rejected = _deliver(company, message)
+        if delivered:
+            logger.debug(f"Sent batch of {len(embeds)} embeds for {company}")
+            results = [True] * len(embeds)
+        elif rejected and len(embeds) > 1:
+            logger.warning(f"Discord rejected a batch of {len(embeds)} embeds for {company}, sending them one at a time")
+            results = [_deliver(company, {**message, 'embeds': [embed]})[0] for embed in embeds]
+        else:
+            results = [False] * len(embeds)
+        
+        failed = results.count(False)
+        if failed:
+            with self._lock:
+                self.failed += failed
+        
+        if self.on_result is not None:
+            # A key fails if any of its embeds failed
+            failed_keys = {key for key, result in zip(keys, results) if key is not None and not result}
+            delivered_keys = list(dict.fromkeys(
+                key for key in keys if key is not None and key not in failed_keys
+            ))
+            if delivered_keys:
+                self.on_result(delivered_keys, True)
+            if failed_keys:
+                self.on_result(list(dict.fromkeys(key for key in keys if key in failed_keys)), False)
+        return not failed
+    
+    def flush(self) -> bool:
+        """Send all pending batches.
+        
+        Returns:
+            True if every batch was sent, False otherwise.
+        """
+        with self._lock:
+            batches = [(company, *self._take(company)) for company in list(self.embeds)]
         
-    except requests.RequestException as e:
-        logger.error(f"Failed to send webhook for {company}: {e}")
-        return False
+        success = True
+        for company, message, keys in batches:
+            if message['embeds'] and not self._send(company, message, keys):
+                success = False
+        return success
\ No newline at end of file